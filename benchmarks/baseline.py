@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+def load_baseline(path: Path) -> dict | None:
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def save_baseline(path: Path, results: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def regressions(current: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+                metrics: dict[str, bool], tolerance: float) -> list[str]:
+    # metrics maps a metric name to True when higher is better (e.g. rps, ops_per_sec).
+    found = []
+    for name, values in current.items():
+        for metric, higher_is_better in metrics.items():
+            old, new = baseline.get(name, {}).get(metric), values.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                found.append(f"{name}.{metric}: {old:g} -> {new:g} ({change:+.0%})")
+    return found
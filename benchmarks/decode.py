@@ -0,0 +1,141 @@
+import sys
+import random
+import argparse
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from web3 import Web3
+from web3._utils.method_formatters import log_entry_formatter
+
+from benchmarks.baseline import BASELINE_DIR, load_baseline, regressions, save_baseline
+from benchmarks.fake_node import holder_address
+from benchmarks.micro import bench
+from src.services.log_ingestor import TRANSFER_TOPIC, decode_transfer
+from src.services.transfer_decoder import decode_transfers
+from src.testing.fake_chain import TOKEN_ADDRESS
+
+TRANSFER_EVENT_ABI = [{
+    "anonymous": False, "name": "Transfer", "type": "event",
+    "inputs": [
+        {"indexed": True, "name": "from", "type": "address"},
+        {"indexed": True, "name": "to", "type": "address"},
+        {"indexed": False, "name": "value", "type": "uint256"},
+    ],
+}]
+
+
+def synthetic_logs(count: int, holders: int, seed: int = 1) -> list[dict]:
+    # Raw eth_getLogs entries, a few per block, between a fixed pool of holders.
+    rng = random.Random(seed)
+    pool = [holder_address(i).lower() for i in range(holders)]
+    logs = []
+    for i in range(count):
+        block = 50_000_000 + i // 4
+        sender, recipient = rng.choice(pool), rng.choice(pool)
+        logs.append({
+            "address": TOKEN_ADDRESS.lower(),
+            "blockNumber": hex(block),
+            "blockHash": "0x" + f"{block:064x}",
+            "transactionHash": "0x" + rng.randbytes(32).hex(),
+            "transactionIndex": hex(i % 4),
+            "logIndex": hex(i % 4),
+            "topics": [TRANSFER_TOPIC, "0x" + "0" * 24 + sender[2:], "0x" + "0" * 24 + recipient[2:]],
+            "data": "0x" + f"{int(10 ** rng.uniform(0, 24)):064x}",
+            "removed": False,
+        })
+    return logs
+
+
+def ingest_rows(rows) -> tuple[dict, dict, dict]:
+    # The ingestor's per-log aggregation: per-block deltas, block hashes and activity,
+    # then the per-address net that HolderStore.apply folds out of the deltas.
+    deltas: dict[int, dict[str, int]] = {}
+    hashes: dict[int, str] = {}
+    activity: dict[str, tuple[int, str]] = {}
+    for block, sender, recipient, value, block_hash, tx_hash in rows:
+        per_block = deltas.setdefault(block, {})
+        per_block[sender] = per_block.get(sender, 0) - value
+        per_block[recipient] = per_block.get(recipient, 0) + value
+        hashes[block] = block_hash
+        activity[sender] = activity[recipient] = (block, tx_hash)
+    net: dict[str, tuple[int, int]] = {}
+    for block in sorted(deltas):
+        for address, delta in deltas[block].items():
+            total, _ = net.get(address, (0, block))
+            net[address] = (total + delta, block)
+    return net, activity, hashes
+
+
+def with_web3(event, logs: list[dict]):
+    def rows():
+        for log in logs:
+            decoded = event.process_log(log_entry_formatter(log))
+            args = decoded["args"]
+            yield (decoded["blockNumber"], args["from"].lower(), args["to"].lower(), args["value"],
+                   "0x" + decoded["blockHash"].hex().removeprefix("0x"),
+                   "0x" + decoded["transactionHash"].hex().removeprefix("0x"))
+    return ingest_rows(rows())
+
+
+def per_log(logs: list[dict]):
+    return ingest_rows(decode_transfer(log) + (log["blockHash"], log["transactionHash"]) for log in logs)
+
+
+def bulk(logs: list[dict], journal_from: int):
+    batch = decode_transfers(logs)
+    net, activity = batch.net_deltas()
+    batch.block_deltas(journal_from)
+    return net, activity, batch.last_block_hashes()
+
+
+def run(rounds: int, batch_size: int, holders: int) -> dict[str, dict[str, float]]:
+    logs = synthetic_logs(batch_size, holders)
+    event = Web3().eth.contract(address=Web3.to_checksum_address(TOKEN_ADDRESS), abi=TRANSFER_EVENT_ABI).events.Transfer()
+    # Only the tail of a catch-up range falls inside the reorg window and needs per-block deltas.
+    journal_from = int(logs[-1]["blockNumber"], 16) - 128
+    expected = per_log(logs)
+    assert with_web3(event, logs) == expected and bulk(logs, journal_from) == expected
+
+    results = {
+        f"web3_process_log_{batch_size}": bench(lambda: with_web3(event, logs), rounds=max(1, rounds // 10), warmup=1),
+        f"per_log_{batch_size}": bench(lambda: per_log(logs), rounds=rounds),
+        f"bulk_{batch_size}": bench(lambda: bulk(logs, journal_from), rounds=rounds),
+    }
+    for row in results.values():
+        row["logs_per_sec"] = round(batch_size * row["ops_per_sec"])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transfer log decoding: web3 events vs per-log vs bulk decoder")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=10000, help="logs per eth_getLogs range")
+    parser.add_argument("--holders", type=int, default=2000)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_DIR / "decode.json")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.rounds, args.batch_size, args.holders)
+    print(f"{'benchmark':<28}{'mean us':>14}{'p95 us':>14}{'logs/s':>14}")
+    for name, row in results.items():
+        print(f"{name:<28}{row['mean_us']:>14}{row['p95_us']:>14}{row['logs_per_sec']:>14}")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save to record one")
+        return
+    found = regressions(results, baseline, {"mean_us": False, "p95_us": False}, args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
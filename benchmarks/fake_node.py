@@ -0,0 +1,87 @@
+import sys
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+
+from aiohttp import web
+from eth_utils import keccak, to_checksum_address
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.testing.fake_chain import FakeChain
+
+
+@dataclass(frozen=True)
+class NodeProfile:
+    latency: float = 0.02
+    jitter: float = 0.01
+    per_call_latency: float = 0.0
+    error_rate: float = 0.0
+    rate_429: float = 0.0
+    seed: int = 1
+
+
+def holder_address(i: int) -> str:
+    return to_checksum_address(keccak(i.to_bytes(32, "big"))[12:])
+
+
+def synthetic_chain(holders: int, seed: int = 1) -> FakeChain:
+    # Log-uniform balances between 1 and 10^9 tokens, reproducible per seed.
+    rng = random.Random(seed)
+    return FakeChain(balances={holder_address(i): int(10 ** rng.uniform(0, 9)) * 10 ** 18 for i in range(holders)})
+
+
+def build_app(chain: FakeChain, profile: NodeProfile) -> web.Application:
+    # JSON-RPC node over chain that answers every path, so one process can pose as several providers.
+    rng = random.Random(profile.seed)
+    stats = {"requests": 0, "calls": 0, "errors": 0, "rate_limited": 0}
+
+    async def rpc(request: web.Request) -> web.Response:
+        payload = await request.json()
+        calls = payload if isinstance(payload, list) else [payload]
+        stats["requests"] += 1
+        stats["calls"] += len(calls)
+        delay = profile.latency + rng.uniform(-profile.jitter, profile.jitter) + profile.per_call_latency * len(calls)
+        await asyncio.sleep(max(0.0, delay))
+        roll = rng.random()
+        if roll < profile.rate_429:
+            stats["rate_limited"] += 1
+            return web.json_response({"jsonrpc": "2.0", "error": {"code": 429, "message": "Too Many Requests"}},
+                                     status=429, headers={"Retry-After": "1"})
+        if roll < profile.rate_429 + profile.error_rate:
+            stats["errors"] += 1
+            return web.Response(status=503, text="upstream unavailable")
+        answer = lambda item: {"jsonrpc": "2.0", "id": item.get("id"), **chain.handle(item["method"], item.get("params", []))}
+        return web.json_response([answer(c) for c in calls] if isinstance(payload, list) else answer(payload))
+
+    async def node_stats(_request: web.Request) -> web.Response:
+        return web.json_response({**stats, "methods": dict(chain.requests)})
+
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    app.router.add_get("/_stats", node_stats)
+    app.router.add_post("/{tail:.*}", rpc)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local simulated Polygon JSON-RPC node with a synthetic ERC20")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per HTTP request")
+    parser.add_argument("--jitter", type=float, default=0.01, help="+/- seconds added uniformly")
+    parser.add_argument("--per-call-latency", type=float, default=0.0, help="extra seconds per call in a batch")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 503")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered with HTTP 429")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    profile = NodeProfile(args.latency, args.jitter, args.per_call_latency, args.error_rate, args.rate_429, args.seed)
+    web.run_app(build_app(synthetic_chain(args.holders, args.seed), profile), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
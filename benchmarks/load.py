@@ -0,0 +1,193 @@
+import os
+import sys
+import math
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import requests
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from benchmarks.baseline import BASELINE_DIR, load_baseline, regressions, save_baseline
+from benchmarks.fake_node import holder_address
+from scripts.check_functionality import fetch
+from src.testing.fake_chain import MULTICALL_ADDRESS, TOKEN_ADDRESS
+
+DEFAULT_MIX = "get_balance=70,get_balance_batch=10,get_token_info=15,get_top=5"
+BATCH_SIZE = 100
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    return {name.strip(): int(weight) for name, _, weight in (item.partition("=") for item in spec.split(",") if item)}
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    # Nearest-rank percentile of an already sorted list.
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(samples: list[tuple[str, int | None, float]], elapsed: float) -> dict[str, dict[str, float]]:
+    by_endpoint: dict[str, list[tuple[int | None, float]]] = {}
+    for endpoint, status, latency in samples:
+        by_endpoint.setdefault(endpoint, []).append((status, latency))
+    report = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        latencies = sorted(latency for _, latency in rows)
+        report[endpoint] = {
+            "requests": len(rows),
+            "errors": sum(1 for status, _ in rows if status is None or status >= 500),
+            "throttled": sum(1 for status, _ in rows if status == 429),
+            "rps": round(len(rows) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+    return report
+
+
+def request_for(endpoint: str, rng: random.Random, holders: int) -> tuple[str, str, dict]:
+    if endpoint == "get_balance":
+        return "GET", "/api/get_balance", {"params": {"address": holder_address(rng.randrange(holders))}}
+    if endpoint == "get_balance_batch":
+        addresses = [holder_address(rng.randrange(holders)) for _ in range(BATCH_SIZE)]
+        return "POST", "/api/get_balance_batch", {"json": {"addresses": addresses}}
+    if endpoint == "get_top":
+        return "GET", "/api/get_top", {"params": {"n": "10"}}
+    return "GET", f"/api/{endpoint}", {}
+
+
+async def run_load(api: str, concurrency: int, duration: float, mix: dict[str, int], holders: int,
+                   seed: int = 1) -> dict[str, dict[str, float]]:
+    samples: list[tuple[str, int | None, float]] = []
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    async def worker(session: ClientSession, rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            endpoint = rng.choices(names, weights)[0]
+            method, path, kwargs = request_for(endpoint, rng, holders)
+            start = time.perf_counter()
+            resp = await fetch(session, method, api + path, **kwargs)
+            samples.append((endpoint, resp["status"], time.perf_counter() - start))
+
+    started = time.perf_counter()
+    async with ClientSession(timeout=ClientTimeout(total=30), connector=TCPConnector(limit=concurrency)) as session:
+        await asyncio.gather(*(worker(session, random.Random(seed + i)) for i in range(concurrency)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def _wait_ready(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+@contextmanager
+def local_stack(args) -> Iterator[str]:
+    # Fake node plus the API in subprocesses, so the load generator does not share their CPU.
+    node_cmd = [sys.executable, str(Path(__file__).parent / "fake_node.py"), "--port", str(args.node_port),
+                "--holders", str(args.holders), "--latency", str(args.latency), "--jitter", str(args.jitter),
+                "--error-rate", str(args.error_rate), "--rate-429", str(args.rate_429)]
+    node_url = f"http://127.0.0.1:{args.node_port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "POLYGON_RPC_URLS": ",".join(f"{node_url}/{name}" for name in ("a", "b", "c")),
+            "TOKEN_ADDRESS": TOKEN_ADDRESS,
+            "MULTICALL3_ADDRESS": MULTICALL_ADDRESS,
+            "API_HOST": "127.0.0.1",
+            "API_PORT": str(args.api_port),
+            "SERVER_MODE": args.server_mode,
+            "SERVER_WORKERS": str(args.workers),
+            "HOLDER_DB_PATH": str(Path(tmp) / "holders.sqlite3"),
+            "INGEST_FOLLOW": "False",
+            "RATE_LIMIT_DEFAULT": "1000000/second",
+            "RATE_LIMITS": "",
+            "RPC_ENDPOINT_RATE": str(args.rpc_rate),
+            "LOG_LEVEL": "WARNING",
+        }
+        quiet = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+        processes = [subprocess.Popen(node_cmd, cwd=project_root, env=env, **quiet)]
+        try:
+            _wait_ready(f"{node_url}/_stats", 30)
+            processes.append(subprocess.Popen([sys.executable, "main.py"], cwd=project_root, env=env, **quiet))
+            api = f"http://127.0.0.1:{args.api_port}"
+            _wait_ready(f"{api}/ready", 60)
+            yield api
+        finally:
+            for process in reversed(processes):
+                process.terminate()
+                process.wait(timeout=10)
+
+
+def print_report(report: dict[str, dict[str, float]]) -> None:
+    print(f"{'endpoint':<22}{'requests':>10}{'errors':>8}{'429':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, row in report.items():
+        print(f"{endpoint:<22}{row['requests']:>10}{row['errors']:>8}{row['throttled']:>6}{row['rps']:>10}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test of the API against a simulated Polygon node")
+    parser.add_argument("--api", default=None, help="running API to target; by default a local stack is started")
+    parser.add_argument("--server-mode", choices=["sync", "async", "prefork"], default="sync")
+    parser.add_argument("--workers", type=int, default=0, help="SERVER_WORKERS in prefork mode (0 = core count)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight list")
+    parser.add_argument("--holders", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rpc-rate", type=float, default=0, help="RPC_ENDPOINT_RATE for the API (0 = unlimited)")
+    parser.add_argument("--node-port", type=int, default=18545)
+    parser.add_argument("--api-port", type=int, default=18080)
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="compare with this file (default: baselines/load_<mode>.json)")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    if args.api:
+        report = asyncio.run(run_load(args.api, args.concurrency, args.duration, mix, args.holders))
+    else:
+        with local_stack(args) as api:
+            report = asyncio.run(run_load(api, args.concurrency, args.duration, mix, args.holders))
+    print_report(report)
+
+    path = args.baseline or BASELINE_DIR / f"load_{args.server_mode}.json"
+    if args.save:
+        save_baseline(path, report)
+        print(f"Baseline saved to {path}")
+        return
+    baseline = load_baseline(path)
+    if baseline is None:
+        print(f"No baseline at {path}; run with --save to record one")
+        return
+    found = regressions(report, baseline, {"rps": True, "p95_ms": False, "p99_ms": False}, args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
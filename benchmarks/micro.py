@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from typing import Callable
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Measure the client itself, not the outbound budget.
+os.environ.setdefault("RPC_ENDPOINT_RATE", "0")
+
+from benchmarks.baseline import BASELINE_DIR, load_baseline, regressions, save_baseline
+from benchmarks.fake_node import holder_address, synthetic_chain
+from src.testing.fake_chain import MULTICALL_ADDRESS, TOKEN_ADDRESS, fake_session
+from src.services.polygon_client import PolygonClient
+from src.services.token_service import TokenService
+
+
+def bench(fn: Callable[[], object], setup: Callable[[], object] | None = None, rounds: int = 200,
+          warmup: int = 5) -> dict[str, float]:
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    timings = []
+    for _ in range(rounds):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    mean = statistics.fmean(timings)
+    return {
+        "mean_us": round(mean * 1e6, 1),
+        "p50_us": round(timings[len(timings) // 2] * 1e6, 1),
+        "p95_us": round(timings[int(len(timings) * 0.95) - 1] * 1e6, 1),
+        "ops_per_sec": round(1 / mean, 1),
+    }
+
+
+def run(rounds: int, batch_size: int, holders: int) -> dict[str, dict[str, float]]:
+    # In-process fake transport: the numbers are encode/decode, caching and
+    # pool overhead, with no network in the way.
+    chain = synthetic_chain(holders)
+    client = PolygonClient(rpc_urls=["http://bench"], contract_address=TOKEN_ADDRESS,
+                           multicall_address=MULTICALL_ADDRESS, session=fake_session(chain))
+    client.warm_up()
+    service = TokenService(client)
+    addresses = [holder_address(i) for i in range(holders)]
+    batch = addresses[:batch_size]
+    clear = client.balance_cache.clear
+
+    return {
+        "balance_of_cold": bench(lambda: client.balance_of(addresses[0]), setup=clear, rounds=rounds),
+        "balance_of_cached": bench(lambda: client.balance_of(addresses[0]), rounds=rounds),
+        f"get_balance_batch_{batch_size}_cold": bench(lambda: service.get_balance_batch(batch), setup=clear,
+                                                       rounds=max(1, rounds // 10)),
+        f"get_balance_batch_{batch_size}_cached": bench(lambda: service.get_balance_batch(batch), rounds=rounds),
+        "token_info": bench(client.token_info, rounds=rounds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of the balance and token info hot paths")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--holders", type=int, default=2000)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_DIR / "micro.json")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.rounds, args.batch_size, args.holders)
+    print(f"{'benchmark':<34}{'mean us':>12}{'p50 us':>12}{'p95 us':>12}{'ops/s':>12}")
+    for name, row in results.items():
+        print(f"{name:<34}{row['mean_us']:>12}{row['p50_us']:>12}{row['p95_us']:>12}{row['ops_per_sec']:>12}")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save to record one")
+        return
+    found = regressions(results, baseline, {"mean_us": False, "p95_us": False}, args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import json
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 from dotenv import load_dotenv
@@ -9,6 +10,7 @@ ROOT = Path(__file__).parent
 load_dotenv(ROOT.joinpath(".env"))
 
 
+@lru_cache(maxsize=None)
 def load_abi(path: Path) -> List[dict]:
     with open(path, "r", encoding="utf-8") as fh:
         return json.load(fh)
@@ -25,6 +27,15 @@ class ContractConfig:
     abi: List[dict]
 
 
+@dataclass(frozen=True)
+class MulticallConfig:
+    address: str
+    abi: List[dict]
+    max_calls: int
+    gas_budget: int
+    deploy_block: int
+
+
 @dataclass(frozen=True)
 class AppConfig:
     rpc: RpcConfig = field(default_factory=lambda: RpcConfig(
@@ -40,11 +51,78 @@ class AppConfig:
         ),
         abi=load_abi(ROOT.joinpath("abi/erc20.json"))
     ))
+    multicall: MulticallConfig = field(default_factory=lambda: MulticallConfig(
+        address=os.getenv(
+            "MULTICALL3_ADDRESS",
+            "0xcA11bde05977b3631167028862bE2a173976CA11"
+        ),
+        abi=load_abi(ROOT.joinpath("abi/multicall3.json")),
+        max_calls=int(os.getenv("MULTICALL_MAX_CALLS", "500")),
+        gas_budget=int(os.getenv("MULTICALL_GAS_BUDGET", "20000000")),
+        # Multicall3 on Polygon PoS exists from this block; earlier reads use plain eth_calls.
+        deploy_block=int(os.getenv("MULTICALL3_DEPLOY_BLOCK", "25770160"))
+    ))
     host: str = os.getenv("API_HOST", "0.0.0.0")
     port: int = int(os.getenv("API_PORT", "8080"))
     debug: bool = os.getenv("DEBUG", "False").lower() == "true"
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     web3_request_timeout: int = int(os.getenv("WEB3_REQUEST_TIMEOUT", "10"))
     web3_pool_maxsize: int = int(os.getenv("WEB3_POOL_MAXSIZE", "10"))
+    rpc_batch_max_size: int = int(os.getenv("RPC_BATCH_MAX_SIZE", "100"))
+    rpc_hedge_enabled: bool = os.getenv("RPC_HEDGE_ENABLED", "False").lower() == "true"
+    rpc_hedge_min_delay: float = float(os.getenv("RPC_HEDGE_MIN_DELAY", "0.05"))
+    rpc_pool_workers: int = int(os.getenv("RPC_POOL_WORKERS", "32"))
+    rpc_breaker_threshold: int = int(os.getenv("RPC_BREAKER_THRESHOLD", "3"))
+    rpc_breaker_max_backoff: float = float(os.getenv("RPC_BREAKER_MAX_BACKOFF", "60"))
+    total_supply_ttl: float = float(os.getenv("TOTAL_SUPPLY_TTL", "30"))
+    total_supply_stale_ttl: float = float(os.getenv("TOTAL_SUPPLY_STALE_TTL", "300"))
+    head_poll_interval: float = float(os.getenv("HEAD_POLL_INTERVAL", "2"))
+    balance_cache_size: int = int(os.getenv("BALANCE_CACHE_SIZE", "100000"))
+    holder_db_path: str = os.getenv("HOLDER_DB_PATH", str(ROOT.joinpath("data/holders.sqlite3")))
+    ingest_follow: bool = os.getenv("INGEST_FOLLOW", "False").lower() == "true"
+    ingest_start_block: int = int(os.getenv("INGEST_START_BLOCK", "0"))
+    ingest_chunk_size: int = int(os.getenv("INGEST_CHUNK_SIZE", "2000"))
+    ingest_max_chunk_size: int = int(os.getenv("INGEST_MAX_CHUNK_SIZE", "10000"))
+    ingest_reorg_window: int = int(os.getenv("INGEST_REORG_WINDOW", "128"))
+    ingest_poll_interval: float = float(os.getenv("INGEST_POLL_INTERVAL", "2"))
+    activity_search_window: int = int(os.getenv("ACTIVITY_SEARCH_WINDOW", "1000"))
+    activity_search_max_window: int = int(os.getenv("ACTIVITY_SEARCH_MAX_WINDOW", "100000"))
+    activity_search_max_windows: int = int(os.getenv("ACTIVITY_SEARCH_MAX_WINDOWS", "20"))
+    history_finality_depth: int = int(os.getenv("HISTORY_FINALITY_DEPTH", "256"))
+    balance_stream_chunk_size: int = int(os.getenv("BALANCE_STREAM_CHUNK_SIZE", "500"))
+    holder_export_batch_size: int = int(os.getenv("HOLDER_EXPORT_BATCH_SIZE", "65536"))
+    server_mode: str = os.getenv("SERVER_MODE", "sync").lower()
+    async_batch_concurrency: int = int(os.getenv("ASYNC_BATCH_CONCURRENCY", "32"))
+    startup_time_budget: float = float(os.getenv("STARTUP_TIME_BUDGET", "2"))
     rate_limit_default: str = os.getenv("RATE_LIMIT_DEFAULT", "60/minute")
+    rate_limits: str = os.getenv("RATE_LIMITS", "get_balance_batch=20/minute,get_balance_batch_stream=10/minute,"
+                                                "export_holders=2/minute")
+    rpc_endpoint_rate: float = float(os.getenv("RPC_ENDPOINT_RATE", "25"))
+    rpc_endpoint_burst: float = float(os.getenv("RPC_ENDPOINT_BURST", "50"))
+    rpc_queue_max_depth: int = int(os.getenv("RPC_QUEUE_MAX_DEPTH", "500"))
+    rpc_queue_max_wait: float = float(os.getenv("RPC_QUEUE_MAX_WAIT", "5"))
+    tokens: List[str] = field(default_factory=lambda: [
+        token.strip() for token in os.getenv("TOKENS", "").split(",") if token.strip()
+    ])
+    token_registry_max_size: int = int(os.getenv("TOKEN_REGISTRY_MAX_SIZE", "256"))
+    token_balance_cache_size: int = int(os.getenv("TOKEN_BALANCE_CACHE_SIZE", "10000"))
+    balance_matrix_max_cells: int = int(os.getenv("BALANCE_MATRIX_MAX_CELLS", "10000"))
+    response_cache_size: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    http_cache_max_age: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "2"))
+    snapshot_refresh_interval: float = float(os.getenv("SNAPSHOT_REFRESH_INTERVAL", "2"))
+    snapshot_top_size: int = int(os.getenv("SNAPSHOT_TOP_SIZE", "100"))
+    snapshot_top_tx_size: int = int(os.getenv("SNAPSHOT_TOP_TX_SIZE", "10"))
+    snapshot_max_age: float = float(os.getenv("SNAPSHOT_MAX_AGE", "30"))
+    snapshot_max_staleness: float = float(os.getenv("SNAPSHOT_MAX_STALENESS", "30"))
+    watch_max_subscriptions: int = int(os.getenv("WATCH_MAX_SUBSCRIPTIONS", "1000"))
+    watch_max_addresses: int = int(os.getenv("WATCH_MAX_ADDRESSES", "1000"))
+    watch_queue_size: int = int(os.getenv("WATCH_QUEUE_SIZE", "100"))
+    watch_keepalive: float = float(os.getenv("WATCH_KEEPALIVE", "15"))
+    server_workers: int = int(os.getenv("SERVER_WORKERS", "0"))
+    shared_cache_path: str = os.getenv("SHARED_CACHE_PATH", "")
     secret_key: str = os.getenv("SECRET_KEY", "default-secret")
+
+
+@lru_cache(maxsize=1)
+def get_config() -> AppConfig:
+    return AppConfig()
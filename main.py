@@ -1,41 +1,235 @@
+import dataclasses
+import os
+import tempfile
+import time
+
+from aiohttp import web
 from flask import Flask, jsonify
 from flask_cors import CORS
 
-from config import AppConfig
+from config import AppConfig, get_config
 from src.utils.logger import setup_logger
 from src.services.polygon_client import PolygonClient
 from src.services.token_service import TokenService
+from src.services.holder_store import HolderStore
+from src.services.holder_index import HolderIndex
+from src.services.block_times import BlockTimeCache
+from src.services.activity_index import ActivityIndex
+from src.services.log_ingestor import TransferIngestor
+from src.services.history import HistoricalQueries
+from src.services.token_registry import TokenRegistry
+from src.services.snapshots import SnapshotRefresher
+from src.services.watchlist import WatchHub
+from src.services.shared_cache import SharedCache
+from src.services.async_client import AsyncPolygonClient
+from src.services.async_token_service import AsyncTokenService
+from src.services.warmup import Warmup
 from src.api.routes import api_bp
+from src.api.rate_limit import RateLimiter, parse_rate_overrides
+from src.api.http_cache import ResponseCache
+from src.api.prefork import PreforkServer
+from src.api.metrics import (WorkerMetrics, install_flask_metrics, metrics_handler, metrics_middleware,
+                             register_service_metrics)
+from src.api import async_routes
 
-_cfg = AppConfig()
+_cfg = get_config()
 logger = setup_logger(__name__, level=_cfg.log_level)
 
 
-def create_app(config: AppConfig = _cfg) -> Flask:
+def build_services(config: AppConfig, primary: bool = True) -> tuple[TokenService, TransferIngestor, Warmup]:
+    # Nothing here touches the network; RPC probes, the holder index load and
+    # the ingestor start run in the background warm-up. Of several worker
+    # processes only the primary one follows the chain and writes the holder
+    # store; the others read holders from SQLite.
+    shared = None
+    if config.shared_cache_path:
+        shared = SharedCache(config.shared_cache_path, max_balances=config.balance_cache_size)
+    polygon_client = PolygonClient(rpc_urls=config.rpc.urls, contract_address=config.contract.address, abi=config.contract.abi,
+                                   shared=shared)
+    holder_store = HolderStore(config.holder_db_path)
+    block_times = BlockTimeCache(polygon_client, holder_store)
+    activity_index = ActivityIndex(
+        polygon_client, holder_store, block_times,
+        initial_window=config.activity_search_window,
+        max_window=config.activity_search_max_window,
+        max_windows=config.activity_search_max_windows,
+        # Nothing to search before the token existed.
+        floor_block=config.ingest_start_block,
+    )
+    # Until the index is loaded, holder queries fall back to the SQLite store.
+    token_service = TokenService(polygon_client, holder_store=holder_store, activity_index=activity_index,
+                                 stream_chunk_size=config.balance_stream_chunk_size,
+                                 export_batch_size=config.holder_export_batch_size,
+                                 history=HistoricalQueries(polygon_client, holder_store, block_times,
+                                                           finality_depth=config.history_finality_depth),
+                                 registry=TokenRegistry(polygon_client, config.tokens,
+                                                        max_tokens=config.token_registry_max_size,
+                                                        balance_cache_size=config.token_balance_cache_size,
+                                                        max_cells=config.balance_matrix_max_cells))
+
+    ingestor = TransferIngestor(
+        polygon_client, holder_store,
+        start_block=config.ingest_start_block,
+        chunk_size=config.ingest_chunk_size,
+        max_chunk_size=config.ingest_max_chunk_size,
+        reorg_window=config.ingest_reorg_window,
+        poll_interval=config.ingest_poll_interval,
+    )
+    ingestor.subscribe(token_service.on_transfers)
+
+    def load_holder_index() -> None:
+        holder_index = HolderIndex()
+        holder_index.load(holder_store.iter_holders())
+        token_service.holder_index = holder_index
+
+    steps = [("holder_index", load_holder_index)] if primary else []
+    steps.append(("rpc", polygon_client.warm_up))
+    follow = config.ingest_follow and primary
+    if follow and config.ingest_start_block <= 0 and holder_store.checkpoint() is None:
+        # An empty store with no start block would mean indexing every block since genesis.
+        logger.warning("INGEST_FOLLOW is set but the holder store is empty and INGEST_START_BLOCK is not; "
+                       "set it to the token's deployment block to start indexing")
+        follow = False
+    if follow:
+        steps.append(("ingestor", ingestor.start))
+    if config.snapshot_refresh_interval > 0 and primary:
+        token_service.snapshots = SnapshotRefresher(
+            token_service,
+            top_size=config.snapshot_top_size,
+            top_tx_size=config.snapshot_top_tx_size,
+            interval=config.snapshot_refresh_interval,
+            max_age=config.snapshot_max_age,
+            max_staleness=config.snapshot_max_staleness,
+        )
+        ingestor.subscribe(token_service.snapshots.on_transfers)
+        steps.append(("snapshots", token_service.snapshots.start))
+    token_service.watch_hub = WatchHub(
+        polygon_client,
+        max_subscriptions=config.watch_max_subscriptions,
+        max_addresses=config.watch_max_addresses,
+        queue_size=config.watch_queue_size,
+        poll_interval=config.ingest_poll_interval,
+        keepalive=config.watch_keepalive,
+    )
+    # The ingestor already reads every Transfer; without it the hub follows the logs itself.
+    if follow:
+        ingestor.subscribe(token_service.watch_hub.on_transfers)
+    else:
+        steps.append(("watchlist", token_service.watch_hub.start))
+    return token_service, ingestor, Warmup(steps)
+
+
+def _check_startup_budget(warmup: Warmup, started: float, config: AppConfig) -> None:
+    warmup.startup_seconds = round(time.perf_counter() - started, 4)
+    if warmup.startup_seconds > config.startup_time_budget:
+        logger.warning("Startup took %.2fs, over the %.2fs budget", warmup.startup_seconds, config.startup_time_budget)
+
+
+def build_rate_limiter(config: AppConfig) -> RateLimiter:
+    return RateLimiter(config.rate_limit_default, parse_rate_overrides(config.rate_limits))
+
+
+def _readiness(warmup: Warmup) -> tuple[dict, int]:
+    status = warmup.status()
+    return {**status, "success": status["ready"]}, 200 if status["ready"] else 503
+
+
+def create_app(config: AppConfig | None = None, primary: bool = True, worker: int | None = None) -> Flask:
+    started = time.perf_counter()
+    config = config or get_config()
     app = Flask(__name__)
     app.config["DEBUG"] = config.debug
     CORS(app)
 
-    polygon_client = PolygonClient(rpc_urls=config.rpc.urls, contract_address=config.contract.address, abi=config.contract.abi)
-    token_service = TokenService(polygon_client)
-    app.token_service = token_service
-
+    app.token_service, app.ingestor, app.warmup = build_services(config, primary)
+    app.rate_limiter = build_rate_limiter(config)
+    app.response_cache = ResponseCache(config.response_cache_size, config.http_cache_max_age)
     app.register_blueprint(api_bp, url_prefix="/api")
+    if worker is not None and config.shared_cache_path:
+        # A prefork worker answers /metrics for all workers through the shared cache.
+        worker_metrics = WorkerMetrics(SharedCache(config.shared_cache_path), worker)
+        worker_metrics.start()
+        install_flask_metrics(app, worker_metrics.render)
+    else:
+        install_flask_metrics(app)
+    register_service_metrics(app.token_service, app.rate_limiter, response_cache=app.response_cache)
 
     @app.route("/health")
     def health():
         return jsonify({"status": "healthy", "service": "Polygon Token API", "version": "1.0.0"})
 
+    @app.route("/ready")
+    def ready():
+        body, status = _readiness(app.warmup)
+        return jsonify(body), status
+
     @app.errorhandler(404)
     def not_found(_e):
         return jsonify({"error": "Endpoint not found", "success": False}), 404
 
+    app.warmup.start()
+    _check_startup_budget(app.warmup, started, config)
     return app
 
 
+def create_async_app(config: AppConfig | None = None, token_service: TokenService | None = None,
+                     ingestor: TransferIngestor | None = None, rpc_urls: list[str] | None = None) -> web.Application:
+    started = time.perf_counter()
+    config = config or get_config()
+    if token_service is None:
+        token_service, ingestor, warmup = build_services(config)
+    else:
+        warmup = Warmup([("rpc", token_service.client.warm_up)])
+    async_client = AsyncPolygonClient(token_service.client, urls=rpc_urls, request_timeout=config.web3_request_timeout,
+                                      pool_maxsize=max(config.web3_pool_maxsize, config.async_batch_concurrency))
+
+    app = web.Application(middlewares=[metrics_middleware, async_routes.cors_middleware,
+                                       async_routes.error_middleware, async_routes.rate_limit_middleware])
+    app[async_routes.RATE_LIMITER] = build_rate_limiter(config)
+    app[async_routes.RESPONSE_CACHE] = ResponseCache(config.response_cache_size, config.http_cache_max_age)
+    app.router.add_get("/metrics", metrics_handler)
+    register_service_metrics(token_service, app[async_routes.RATE_LIMITER], async_client,
+                             app[async_routes.RESPONSE_CACHE])
+    app[async_routes.TOKEN_SERVICE] = AsyncTokenService(token_service, async_client,
+                                                        batch_concurrency=config.async_batch_concurrency)
+    app[async_routes.WARMUP] = warmup
+    if ingestor is not None:
+        app[async_routes.INGESTOR] = ingestor
+    app.add_routes(async_routes.routes)
+
+    async def start_client(_app: web.Application) -> None:
+        await async_client.start()
+
+    async def close_client(_app: web.Application) -> None:
+        await async_client.close()
+
+    app.on_startup.append(start_client)
+    app.on_cleanup.append(close_client)
+    warmup.start()
+    _check_startup_budget(warmup, started, config)
+    return app
+
+
+def serve_prefork(config: AppConfig) -> None:
+    # Config and ABI are loaded here, before the fork; each worker builds its own app and connections.
+    workers = config.server_workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory(prefix="polygon-api-") as tmp:
+        if not config.shared_cache_path:
+            config = dataclasses.replace(config, shared_cache_path=os.path.join(tmp, "shared_cache.sqlite3"))
+        SharedCache(config.shared_cache_path)
+        server = PreforkServer(lambda index: create_app(config, primary=index == 0, worker=index), config.host, config.port, workers)
+        server.serve()
+
+
 def main():
+    logger.info("Starting Polygon Token API on %s:%d (%s mode)", _cfg.host, _cfg.port, _cfg.server_mode)
+    if _cfg.server_mode == "async":
+        web.run_app(create_async_app(), host=_cfg.host, port=_cfg.port, print=None)
+        return
+    if _cfg.server_mode == "prefork":
+        serve_prefork(_cfg)
+        return
     app = create_app()
-    logger.info("Starting Polygon Token API on %s:%d", _cfg.host, _cfg.port)
     app.run(host=_cfg.host, port=_cfg.port, debug=_cfg.debug)
 
 
@@ -0,0 +1,50 @@
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import get_config
+
+# Runs in a fresh interpreter so module imports are measured cold.
+PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+create = main.create_async_app if {async_mode} else main.create_app
+create()
+created = time.perf_counter()
+print(json.dumps({{"import_seconds": imported - started, "create_app_seconds": created - imported}}))
+"""
+
+
+def measure(async_mode: bool = False) -> dict[str, float]:
+    out = subprocess.run([sys.executable, "-c", PROBE.format(async_mode=async_mode)], cwd=project_root,
+                         capture_output=True, text=True, check=True)
+    timings = json.loads(out.stdout.strip().splitlines()[-1])
+    timings["total_seconds"] = timings["import_seconds"] + timings["create_app_seconds"]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and app creation time against STARTUP_TIME_BUDGET")
+    parser.add_argument("--async", dest="async_mode", action="store_true", help="measure the aiohttp app")
+    parser.add_argument("--budget", type=float, default=None, help="seconds (default: STARTUP_TIME_BUDGET)")
+    args = parser.parse_args()
+
+    budget = get_config().startup_time_budget if args.budget is None else args.budget
+    timings = measure(args.async_mode)
+    for name, value in timings.items():
+        print(f"{name:>20}: {value:.3f}s")
+    if timings["total_seconds"] > budget:
+        print(f"Startup budget exceeded: {timings['total_seconds']:.3f}s > {budget:.3f}s")
+        sys.exit(1)
+    print(f"Within the {budget:.3f}s startup budget")
+
+
+if __name__ == "__main__":
+    main()
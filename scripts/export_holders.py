@@ -0,0 +1,48 @@
+import sys
+import argparse
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import get_config
+from src.utils.logger import setup_logger
+from src.api.errors import ValidationError
+from src.services.holder_store import HolderStore
+from src.services.holder_export import FORMATS, export_holders, resolve_format
+
+logger = setup_logger("holder-export")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export every indexed token holder in a columnar format")
+    parser.add_argument("--format", choices=list(FORMATS), default=None,
+                        help="arrow, parquet or csv (default: arrow if pyarrow is installed, else csv)")
+    parser.add_argument("--output", default=None, help="output file (default: holders_<block>.<format>)")
+    parser.add_argument("--block", type=int, default=None, help="fail unless the index is at this block")
+    parser.add_argument("--batch-size", type=int, default=None, help="rows per record batch / row group")
+    parser.add_argument("--db", default=None, help="path to the SQLite holder store")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cfg = get_config()
+    store = HolderStore(args.db or cfg.holder_db_path)
+    try:
+        fmt = resolve_format(args.format)
+        block, chunks = export_holders(store, fmt, args.batch_size or cfg.holder_export_batch_size, args.block)
+    except ValidationError as e:
+        sys.exit(e.safe_message)
+
+    output = args.output or f"holders_{block if block is not None else 'empty'}.{FORMATS[fmt][1]}"
+    written = 0
+    with open(output, "wb") as out:
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    logger.info("Exported holders at block %s to %s (%s, %d bytes)", block, output, fmt, written)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import sys
+import argparse
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from config import get_config
+from src.utils.logger import setup_logger
+from src.services.polygon_client import PolygonClient
+from src.services.holder_store import HolderStore
+from src.services.log_ingestor import TransferIngestor
+
+logger = setup_logger("transfer-ingestor")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Index token Transfer logs into the local holder store")
+    parser.add_argument("--from-block", type=int, default=None, help="first block to ingest when no checkpoint exists")
+    parser.add_argument("--to-block", type=int, default=None, help="stop the backfill at this block (default: head)")
+    parser.add_argument("--follow", action="store_true", help="keep following the chain head after the backfill")
+    parser.add_argument("--db", default=None, help="path to the SQLite holder store")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cfg = get_config()
+    store = HolderStore(args.db or cfg.holder_db_path)
+    start_block = cfg.ingest_start_block if args.from_block is None else args.from_block
+    if start_block <= 0 and store.checkpoint() is None:
+        sys.exit("The holder store is empty: pass --from-block (or set INGEST_START_BLOCK) to the token's deployment block")
+    client = PolygonClient(rpc_urls=cfg.rpc.urls, contract_address=cfg.contract.address, abi=cfg.contract.abi)
+    client.warm_up()
+    ingestor = TransferIngestor(
+        client, store,
+        start_block=start_block,
+        chunk_size=cfg.ingest_chunk_size,
+        max_chunk_size=cfg.ingest_max_chunk_size,
+        reorg_window=cfg.ingest_reorg_window,
+        poll_interval=cfg.ingest_poll_interval,
+    )
+    try:
+        checkpoint = ingestor.backfill(args.to_block)
+        logger.info("Backfill finished at block %d: %s", checkpoint, ingestor.stats())
+        if args.follow:
+            ingestor.follow()
+    except KeyboardInterrupt:
+        logger.info("Stopped at block %s", store.checkpoint())
+
+
+if __name__ == "__main__":
+    main()
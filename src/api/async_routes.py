@@ -0,0 +1,322 @@
+import json
+import math
+import asyncio
+import functools
+from typing import Any, AsyncIterator
+
+from aiohttp import web
+
+from src.api import common
+from src.api.common import ErrorReply, failure, optional_int, parse_ndjson_line
+from src.api.errors import ApiErrorResponse, ValidationError, ServiceError, TooManyRequestsError
+from src.api.http_cache import CachedResponse, ResponseCache
+from src.api.rate_limit import RateLimiter, endpoint_priority, retry_after_header
+from src.services.rpc_scheduler import set_priority
+from src.services.async_token_service import AsyncTokenService
+from src.services.warmup import Warmup
+from src.utils.logger import setup_logger
+from src.utils.metrics import ERRORS
+
+logger = setup_logger(__name__)
+routes = web.RouteTableDef()
+
+TOKEN_SERVICE = web.AppKey("token_service", AsyncTokenService)
+INGESTOR = web.AppKey("ingestor", object)
+WARMUP = web.AppKey("warmup", Warmup)
+RATE_LIMITER = web.AppKey("rate_limiter", RateLimiter)
+RESPONSE_CACHE = web.AppKey("response_cache", ResponseCache)
+
+
+def jsonify(payload: Any, status: int = 200) -> web.Response:
+    return web.json_response(payload, status=status)
+
+
+def _token_service(request: web.Request) -> AsyncTokenService:
+    svc = request.app.get(TOKEN_SERVICE)
+    if svc is None:
+        raise ServiceError("Token service unavailable")
+    return svc
+
+
+async def _block(svc: AsyncTokenService, source) -> int | None:
+    return await svc.resolve_block(optional_int(source, "block"), optional_int(source, "timestamp"))
+
+
+def _cached_response(request: web.Request, cache: ResponseCache, entry: CachedResponse) -> web.Response:
+    headers = {"ETag": entry.etag, "Cache-Control": entry.cache_control}
+    if cache.revalidated(entry, request.headers.get("If-None-Match")):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=entry.body, content_type="application/json", headers=headers)
+
+
+def block_cached(index: bool = False):
+    # Same contract as routes.block_cached.
+    def decorate(handler):
+        @functools.wraps(handler)
+        async def cached_handler(request: web.Request) -> web.Response:
+            cache = request.app.get(RESPONSE_CACHE)
+            if cache is None:
+                return await handler(request)
+            svc = _token_service(request)
+            pinned = None if index else await _block(svc, request.query)
+            route = request.match_info.route.resource.canonical
+            params = tuple(sorted(request.query.items()))
+            entry = cache.lookup(svc.service, route, params, pinned, index)
+            if entry is not None:
+                return _cached_response(request, cache, entry)
+            response = await handler(request)
+            if response.status != 200:
+                return response
+            entry = cache.store(svc.service, route, params, pinned, response.body, index)
+            return response if entry is None else _cached_response(request, cache, entry)
+        return cached_handler
+    return decorate
+
+
+def guarded(handler):
+    # Same contract as routes.guarded.
+    @functools.wraps(handler)
+    async def guarded_handler(request: web.Request) -> web.Response:
+        try:
+            return await handler(request)
+        except Exception as e:
+            return jsonify(*failure(handler.__name__, e))
+    return guarded_handler
+
+
+async def _json_body(request: web.Request) -> Any:
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler):
+    try:
+        return await handler(request)
+    except TooManyRequestsError as err:
+        ERRORS.labels("api", type(err).__name__).inc()
+        return web.json_response(
+            {"error": err.safe_message, "retry_after": math.ceil(err.retry_after), "success": False},
+            status=429, headers={"Retry-After": retry_after_header(err.retry_after)})
+    except ErrorReply as err:
+        return jsonify(err.payload, err.status)
+    except ValidationError as err:
+        ERRORS.labels("api", type(err).__name__).inc()
+        logger.warning("Validation error: %s", err.safe_message)
+        return jsonify(ApiErrorResponse(error=err.safe_message).__dict__, 400)
+    except web.HTTPNotFound:
+        return jsonify({"error": "Endpoint not found", "success": False}, 404)
+    except web.HTTPException:
+        raise
+    except Exception as err:
+        ERRORS.labels("api", type(err).__name__).inc()
+        logger.exception("Unhandled exception: %s", str(err)[:200])
+        return jsonify(ApiErrorResponse(error="Internal server error").__dict__, 500)
+
+
+@web.middleware
+async def rate_limit_middleware(request: web.Request, handler):
+    if request.path.startswith("/api/"):
+        endpoint = request.path.rsplit("/", 1)[-1]
+        set_priority(endpoint_priority(endpoint))
+        limiter = request.app.get(RATE_LIMITER)
+        if limiter is not None:
+            limiter.check(request.remote or "unknown", endpoint)
+    return await handler(request)
+
+
+@web.middleware
+async def cors_middleware(request: web.Request, handler):
+    if request.method == "OPTIONS":
+        response = web.Response()
+        response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
+        response.headers["Access-Control-Allow-Headers"] = request.headers.get("Access-Control-Request-Headers", "*")
+    else:
+        response = await handler(request)
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    return response
+
+
+@routes.get("/api/get_balance")
+@block_cached()
+@guarded
+async def get_balance(request: web.Request) -> web.Response:
+    address = common.required_address(request.query)
+    svc = _token_service(request)
+    return jsonify(await svc.get_balance(address, block=await _block(svc, request.query)))
+
+
+@routes.post("/api/get_balance_batch")
+@guarded
+async def get_balance_batch(request: web.Request) -> web.Response:
+    body = await _json_body(request) or {}
+    addresses = common.batch_addresses(body)
+    svc = _token_service(request)
+    return jsonify(common.batch_payload(await svc.get_balance_batch(addresses, block=await _block(svc, body))))
+
+
+async def _ndjson_addresses(request: web.Request) -> AsyncIterator[object]:
+    async for raw in request.content:
+        address = parse_ndjson_line(raw)
+        if address is not None:
+            yield address
+
+
+async def _listed(addresses: list) -> AsyncIterator[object]:
+    for address in addresses:
+        yield address
+
+
+@routes.post("/api/get_balance_batch_stream")
+async def get_balance_batch_stream(request: web.Request) -> web.StreamResponse:
+    if request.content_type in common.NDJSON_MIMETYPES:
+        addresses = _ndjson_addresses(request)
+    else:
+        addresses = _listed(common.listed_addresses(await _json_body(request)))
+
+    svc = _token_service(request)
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    try:
+        async for result in svc.stream_balances(addresses):
+            await response.write((json.dumps(result) + "\n").encode())
+    except Exception as e:
+        await response.write(common.stream_error_line(e).encode())
+    await response.write_eof()
+    return response
+
+
+@routes.post("/api/get_balance_matrix")
+@guarded
+async def get_balance_matrix(request: web.Request) -> web.Response:
+    body = await _json_body(request) or {}
+    addresses, tokens = common.matrix_request(body)
+    svc = _token_service(request)
+    result = await svc.get_balance_matrix(addresses, tokens, block=await _block(svc, body))
+    return jsonify(common.matrix_payload(result))
+
+
+@routes.get("/api/watch_balances")
+async def watch_balances(request: web.Request) -> web.StreamResponse:
+    hub = common.watch_hub(_token_service(request).service)
+    sub = hub.subscribe(common.watch_addresses(request.query.get("addresses")))
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    sub.on_event = lambda: loop.call_soon_threadsafe(wake.set)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", **common.SSE_HEADERS})
+    try:
+        await response.prepare(request)
+        await response.write(common.sse_event("balances", await asyncio.to_thread(hub.initial, sub)).encode())
+        while True:
+            try:
+                await asyncio.wait_for(wake.wait(), hub.keepalive)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+            events = sub.drain()
+            if not events:
+                await response.write(common.SSE_KEEPALIVE.encode())
+            for event in events:
+                await response.write(common.sse_event("balances", event).encode())
+    except ConnectionResetError:
+        pass
+    except Exception as e:
+        await response.write(common.sse_error(e).encode())
+    finally:
+        hub.unsubscribe(sub)
+    return response
+
+
+@routes.get("/api/get_token_info")
+@block_cached()
+@guarded
+async def get_token_info(request: web.Request) -> web.Response:
+    svc = _token_service(request)
+    return jsonify(*common.token_info_reply(await svc.get_token_info(block=await _block(svc, request.query))))
+
+
+@routes.get("/api/get_top")
+@block_cached(index=True)
+@guarded
+async def get_top(request: web.Request) -> web.Response:
+    n = common.top_n(request.query)
+    holders, block = await _token_service(request).top_holders_with_block(n)
+    return jsonify(common.top_payload(holders, n, block))
+
+
+@routes.get("/api/get_top_with_transactions")
+@guarded
+async def get_top_with_transactions(request: web.Request) -> web.Response:
+    n = common.top_n(request.query)
+    return jsonify(common.top_tx_payload(await _token_service(request).get_top_holders_with_transactions(n), n))
+
+
+@routes.get("/api/get_ingest_status")
+@guarded
+async def get_ingest_status(request: web.Request) -> web.Response:
+    return jsonify(common.ingest_status_payload(request.app.get(INGESTOR)))
+
+
+@routes.get("/api/get_rpc_status")
+@guarded
+async def get_rpc_status(request: web.Request) -> web.Response:
+    svc = _token_service(request)
+    client = svc.service.client
+    return jsonify(common.rpc_status_payload(client.transport, [client.flight, svc.client.flight]))
+
+
+@routes.get("/api/get_holder_rank")
+@guarded
+async def get_holder_rank(request: web.Request) -> web.Response:
+    address = common.required_address(request.query)
+    return jsonify({**await _token_service(request).get_holder_rank(address), "success": True})
+
+
+@routes.get("/api/get_holders")
+@guarded
+async def get_holders(request: web.Request) -> web.Response:
+    cursor, limit = common.holders_page_args(request.query)
+    return jsonify(common.holders_page_payload(*await _token_service(request).get_holders_page(cursor, limit)))
+
+
+@routes.get("/api/export_holders")
+async def export_holders(request: web.Request) -> web.StreamResponse:
+    svc = _token_service(request)
+    try:
+        fmt, block, chunks = await svc.export_holders(request.query.get("format"),
+                                                      optional_int(request.query, "block"))
+    except Exception as e:
+        return jsonify(*failure("export_holders", e))
+
+    response = web.StreamResponse(headers=common.export_headers(fmt, block))
+    await response.prepare(request)
+    try:
+        async for chunk in chunks:
+            await response.write(chunk)
+    except Exception:
+        logger.exception("Error in export_holders")
+        return response
+    await response.write_eof()
+    return response
+
+
+@routes.get("/api/get_holders_in_band")
+@guarded
+async def get_holders_in_band(request: web.Request) -> web.Response:
+    min_balance, max_balance, limit = common.band_args(request.query)
+    holders = await _token_service(request).get_holders_in_band(min_balance, max_balance, limit)
+    return jsonify(common.band_payload(holders))
+
+
+@routes.get("/health")
+async def health(_request: web.Request) -> web.Response:
+    return jsonify({"status": "healthy", "service": "Polygon Token API", "version": "1.0.0"})
+
+
+@routes.get("/ready")
+async def ready(request: web.Request) -> web.Response:
+    status = request.app[WARMUP].status()
+    return jsonify({**status, "success": status["ready"]}, 200 if status["ready"] else 503)
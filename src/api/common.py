@@ -0,0 +1,245 @@
+import json
+import math
+from typing import Any, Iterable, Mapping
+
+from src.api.errors import ServiceError, TooManyRequestsError, ValidationError
+from src.services.holder_export import FORMATS
+from src.utils.logger import setup_logger
+from src.utils.validators import Address, try_normalize, validate_addresses
+
+# Request parsing, response bodies and error mapping shared by the Flask (routes.py)
+# and aiohttp (async_routes.py) front-ends; their handlers only fetch and await.
+
+logger = setup_logger(__name__)
+
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "text/plain")
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SSE_KEEPALIVE = ": keepalive\n\n"
+
+
+# A complete error response raised while parsing a request, e.g. a 400 for a missing parameter.
+class ErrorReply(Exception):
+    def __init__(self, payload: dict[str, Any], status: int = 400):
+        super().__init__(payload.get("error"))
+        self.payload = payload
+        self.status = status
+
+
+def failure(route: str, exc: Exception) -> tuple[dict[str, Any], int]:
+    # 400s and 429s are answered by the front-end's error handlers, with Retry-After for the latter.
+    if isinstance(exc, (ErrorReply, ValidationError, TooManyRequestsError)):
+        raise exc
+    if isinstance(exc, ServiceError):
+        return {"error": exc.safe_message, "success": False}, exc.status_code
+    logger.exception("Error in %s", route)
+    return {"error": "Internal server error", "success": False}, 500
+
+
+def int_arg(args: Mapping, name: str, default: int, low: int, high: int) -> int:
+    raw = args.get(name, str(default))
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValidationError(f"Parameter {name} must be integer")
+    if not (low <= value <= high):
+        raise ValidationError(f"Parameter {name} must be between {low} and {high}")
+    return value
+
+
+def optional_int(source, name: str) -> int | None:
+    raw = source.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise ValidationError(f"Parameter {name} must be integer")
+    if value < 0:
+        raise ValidationError(f"Parameter {name} must be non-negative")
+    return value
+
+
+def required_address(args: Mapping) -> Address:
+    address = args.get("address")
+    if not address:
+        raise ErrorReply({"error": "Address parameter is required"})
+    canonical = try_normalize(address)
+    if canonical is None:
+        raise ErrorReply({"error": "Invalid Ethereum address"})
+    return canonical
+
+
+def batch_addresses(body: Any) -> list[Address]:
+    addresses = body.get("addresses") if isinstance(body, dict) else None
+    if not addresses or not isinstance(addresses, list):
+        raise ErrorReply({"error": "Addresses array is required"})
+    try:
+        return validate_addresses(addresses)
+    except ValidationError as e:
+        raise ErrorReply({"error": e.safe_message})
+
+
+def listed_addresses(body: Any) -> list:
+    # JSON form of the stream upload; entries are validated one by one as they are streamed.
+    addresses = body.get("addresses") if isinstance(body, dict) else None
+    if not isinstance(addresses, list):
+        raise ErrorReply({"error": "Addresses array is required"})
+    return addresses
+
+
+def matrix_request(body: Any) -> tuple[list, list]:
+    addresses = body.get("addresses") if isinstance(body, dict) else None
+    tokens = body.get("tokens") if isinstance(body, dict) else None
+    if not addresses or not isinstance(addresses, list):
+        raise ErrorReply({"error": "Addresses array is required"})
+    if not tokens or not isinstance(tokens, list):
+        raise ErrorReply({"error": "Tokens array is required"})
+    return addresses, tokens
+
+
+def top_n(args: Mapping) -> int:
+    try:
+        n = int(args.get("n", "10"))
+    except ValueError:
+        raise ErrorReply({"error": "Parameter n must be integer", "success": False})
+    if not (1 <= n <= 1000):
+        raise ErrorReply({"error": "Parameter n must be between 1 and 1000", "success": False})
+    return n
+
+
+def holders_page_args(args: Mapping) -> tuple[str | None, int]:
+    return args.get("cursor"), int_arg(args, "limit", 100, 1, 1000)
+
+
+def band_args(args: Mapping) -> tuple[str, str, int]:
+    max_balance = args.get("max")
+    if max_balance is None:
+        raise ErrorReply({"error": "Parameter max is required", "success": False})
+    return args.get("min", "0"), max_balance, int_arg(args, "limit", 100, 1, 1000)
+
+
+def watch_addresses(raw: str | None) -> list[str]:
+    # ?addresses=0x..,0x.. (EventSource can only send GET requests).
+    return [address.strip() for address in (raw or "").split(",") if address.strip()]
+
+
+def watch_hub(service):
+    if service.watch_hub is None:
+        raise ErrorReply({"error": "Balance watch is not configured", "success": False}, 503)
+    return service.watch_hub
+
+
+def parse_ndjson_line(raw: bytes | str) -> object | None:
+    # Accepts "0x..." (JSON string), {"address": "0x..."} or a bare address per line.
+    line = (raw.decode("utf-8", "replace") if isinstance(raw, bytes) else raw).strip()
+    if not line:
+        return None
+    if line[0] in "\"{":
+        try:
+            value = json.loads(line)
+        except ValueError:
+            return line
+        return value.get("address", "") if isinstance(value, dict) else value
+    return line
+
+
+def batch_payload(results: list[dict]) -> dict[str, Any]:
+    return {"balances": results, "count": len(results), "success": True}
+
+
+def matrix_payload(result: dict[str, Any]) -> dict[str, Any]:
+    return {**result, "count": len(result["balances"]), "success": True}
+
+
+def token_info_reply(result: dict[str, Any]) -> tuple[dict[str, Any], int]:
+    if result.get("success"):
+        return result, 200
+    return {"error": result.get("error", "Unknown"), "success": False}, 502
+
+
+def top_payload(holders: list, n: int, block: int | None) -> dict[str, Any]:
+    payload = {
+        "top_holders": [{"address": a, "balance": b} for a, b in holders],
+        "count": len(holders),
+        "requested_count": n,
+        "success": True
+    }
+    if block is not None:
+        payload["block_number"] = block
+    return payload
+
+
+def top_tx_payload(holders: list, n: int) -> dict[str, Any]:
+    return {
+        "top_holders": [
+            {"address": a, "balance": b, "last_transaction_date": t}
+            for a, b, t in holders
+        ],
+        "count": len(holders),
+        "requested_count": n,
+        "success": True
+    }
+
+
+def holders_page_payload(holders: list, next_cursor: str | None) -> dict[str, Any]:
+    return {
+        "holders": [{"address": a, "balance": b} for a, b in holders],
+        "count": len(holders),
+        "next_cursor": next_cursor,
+        "success": True
+    }
+
+
+def band_payload(holders: list) -> dict[str, Any]:
+    return {
+        "holders": [{"address": a, "balance": b} for a, b in holders],
+        "count": len(holders),
+        "success": True
+    }
+
+
+def ingest_status_payload(ingestor) -> dict[str, Any]:
+    if ingestor is None:
+        raise ErrorReply({"error": "Ingestion is not configured", "success": False}, 503)
+    return {**ingestor.stats(), "success": True}
+
+
+def rpc_status_payload(transport, flights: Iterable) -> dict[str, Any]:
+    coalescing: dict[str, int] = {}
+    for flight in flights:
+        for key, value in flight.stats().items():
+            coalescing[key] = coalescing.get(key, 0) + value
+    return {"endpoints": transport.stats(), "coalescing": coalescing,
+            "scheduler": transport.scheduler.stats(), "success": True}
+
+
+def stream_error_line(exc: Exception) -> str:
+    # Headers are already sent; the client sees where the stream stopped.
+    if isinstance(exc, TooManyRequestsError):
+        payload = {"error": exc.safe_message, "retry_after": math.ceil(exc.retry_after), "success": False}
+    else:
+        logger.exception("Error in get_balance_batch_stream")
+        payload = {"error": "Internal server error", "success": False}
+    return json.dumps(payload) + "\n"
+
+
+def sse_event(name: str, payload: dict) -> str:
+    block = payload.get("block_number")
+    event_id = f"id: {block}\n" if block is not None else ""
+    return f"event: {name}\n{event_id}data: {json.dumps(payload)}\n\n"
+
+
+def sse_error(exc: Exception) -> str:
+    if isinstance(exc, TooManyRequestsError):
+        return sse_event("error", {"error": exc.safe_message, "retry_after": math.ceil(exc.retry_after)})
+    logger.exception("Error in watch_balances")
+    return sse_event("error", {"error": "Internal server error"})
+
+
+def export_headers(fmt: str, block: int | None) -> dict[str, str]:
+    name = f"holders_{block}" if block is not None else "holders"
+    headers = {"Content-Type": FORMATS[fmt][0],
+               "Content-Disposition": f'attachment; filename="{name}.{FORMATS[fmt][1]}"'}
+    if block is not None:
+        headers["X-Block-Number"] = str(block)
+    return headers
@@ -30,3 +30,12 @@ class ServiceError(ApiError):
 
 class BlockchainError(ServiceError):
     status_code = 503
+
+
+class TooManyRequestsError(ApiError):
+    status_code = 429
+    safe_message = "Too many requests"
+
+    def __init__(self, message: str | None = None, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
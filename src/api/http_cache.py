@@ -0,0 +1,95 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from src.services.token_service import TokenService
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    cache_control: str
+    body: bytes
+
+
+def make_etag(route: str, params: tuple, block: int) -> str:
+    digest = hashlib.blake2b(repr((route, params)).encode(), digest_size=8).hexdigest()
+    return f'"{block}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+# Serialized GET bodies keyed by route, query and block; the block comes from the head tracker
+# or index checkpoint, never the network, so a hit skips the service. Old blocks age out of the LRU.
+class ResponseCache:
+    def __init__(self, maxsize: int, max_age: int):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, svc: TokenService, route: str, params: tuple, pinned: int | None,
+               index: bool = False) -> CachedResponse | None:
+        block = svc.cache_block(pinned, index)
+        if block is None:
+            return None
+        with self._lock:
+            entry = self._entries.get((route, params, block))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((route, params, block))
+            self.hits += 1
+            return entry
+
+    def store(self, svc: TokenService, route: str, params: tuple, pinned: int | None, body: bytes,
+              index: bool = False) -> CachedResponse | None:
+        # Only successful payloads are cached. The block is taken from the payload when it names
+        # one: a snapshot can lag the head or checkpoint a lookup keys on, and is then stored
+        # (and tagged) under the block it was computed at instead of the newer one.
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return None
+        if not isinstance(payload, dict) or payload.get("success") is False:
+            return None
+        block = payload.get("block_number")
+        if not isinstance(block, int):
+            block = svc.cache_block(pinned, index)
+        if block is None:
+            return None
+        final = pinned is not None and svc.is_final(pinned)
+        entry = CachedResponse(make_etag(route, params, block),
+                               IMMUTABLE if final else f"public, max-age={self.max_age}", body)
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[route, params, block] = entry
+                self._entries.move_to_end((route, params, block))
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def revalidated(self, entry: CachedResponse, if_none_match: str | None) -> bool:
+        if etag_matches(if_none_match, entry.etag):
+            self.not_modified += 1
+            return True
+        return False
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "not_modified": self.not_modified}
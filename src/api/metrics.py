@@ -0,0 +1,148 @@
+import sqlite3
+import threading
+import time
+from typing import Callable
+
+from aiohttp import web
+from flask import Flask, Response, g, request
+
+from src.services.shared_cache import SharedCache
+from src.utils.logger import setup_logger
+from src.utils.metrics import CONTENT_TYPE, HTTP_REQUEST_DURATION, REGISTRY, merge_expositions
+
+logger = setup_logger(__name__)
+
+_KEY_PREFIX = "metrics:"
+
+
+# Each prefork worker publishes its rendering to the shared cache; a scrape merges all of them
+# with a worker label, leaving out workers silent for 3 * interval.
+class WorkerMetrics:
+    def __init__(self, shared: SharedCache, worker: int, interval: float = 5.0,
+                 clock: Callable[[], float] = time.time):
+        self.shared = shared
+        self.worker = worker
+        self.interval = interval
+        self.clock = clock
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def publish(self) -> None:
+        self.shared.put_json(f"{_KEY_PREFIX}{self.worker}", {"at": self.clock(), "text": REGISTRY.render()})
+
+    def render(self) -> str:
+        try:
+            self.publish()
+            published = self.shared.get_json_prefixed(_KEY_PREFIX)
+        except sqlite3.Error as exc:
+            logger.warning("Shared metrics unavailable, serving this worker's only: %s", exc)
+            return merge_expositions({str(self.worker): REGISTRY.render()}, "worker")
+        oldest = self.clock() - 3 * self.interval
+        return merge_expositions({key.removeprefix(_KEY_PREFIX): entry["text"] for key, entry in published.items()
+                                  if entry["at"] >= oldest}, "worker")
+
+    def run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except sqlite3.Error as exc:
+                logger.warning("Unable to publish worker metrics: %s", exc)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="worker-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def install_flask_metrics(app: Flask, render: Callable[[], str] = REGISTRY.render) -> None:
+    # Routes are labelled by their URL rule, never the raw path, to keep label cardinality bounded.
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def observe(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            HTTP_REQUEST_DURATION.labels(route, request.method, str(response.status_code)).observe(
+                time.perf_counter() - started)
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(render(), content_type=CONTENT_TYPE)
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as exc:
+        status = exc.status
+        raise
+    finally:
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else "unmatched"
+        HTTP_REQUEST_DURATION.labels(route, request.method, str(status)).observe(time.perf_counter() - started)
+
+
+async def metrics_handler(_request: web.Request) -> web.Response:
+    return web.Response(body=REGISTRY.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+def register_service_metrics(token_service, rate_limiter=None, async_client=None, response_cache=None) -> None:
+    client = token_service.client
+    flights = [client.flight] + ([async_client.flight] if async_client is not None else [])
+
+    REGISTRY.counter_callback(
+        "balance_cache_events", "Balance cache hits, misses, evictions and invalidations", ("event",),
+        lambda: {(k,): v for k, v in client.balance_cache.stats().items() if k not in ("size", "maxsize")})
+    REGISTRY.gauge_callback(
+        "balance_cache_entries", "Entries held by the balance cache", (),
+        lambda: {(): len(client.balance_cache)})
+    REGISTRY.counter_callback(
+        "rpc_coalescing_calls", "Contract reads sent upstream vs joined onto an in-flight call", ("kind",),
+        lambda: {("upstream",): sum(f.upstream for f in flights), ("coalesced",): sum(f.coalesced for f in flights)})
+    REGISTRY.gauge_callback(
+        "rpc_scheduler_queue_depth", "Outbound RPC calls waiting for endpoint budget", (),
+        lambda: {(): client.transport.scheduler.stats()["queue_depth"]})
+    REGISTRY.counter_callback(
+        "rpc_scheduler_calls", "Outbound RPC calls admitted, queued first or rejected by the scheduler", ("outcome",),
+        lambda: {(k,): v for k, v in client.transport.scheduler.stats().items() if k != "queue_depth"})
+    REGISTRY.gauge_callback(
+        "rpc_endpoint_circuit_open", "1 while an endpoint's circuit breaker is open", ("endpoint",),
+        lambda: {(e.label,): int(s["circuit_open"]) for e, s in zip(client.transport.endpoints, client.transport.stats())})
+    if token_service.snapshots is not None:
+        snapshots = token_service.snapshots
+        REGISTRY.counter_callback(
+            "snapshot_refreshes", "Times each precomputed aggregate was rebuilt", ("snapshot",),
+            lambda: {(k,): v for k, v in snapshots.refreshes.items()})
+        REGISTRY.gauge_callback(
+            "snapshot_age_seconds", "Seconds since each precomputed aggregate was rebuilt", ("snapshot",),
+            lambda: {(k,): v["age_seconds"] for k, v in snapshots.status()["snapshots"].items()})
+    if token_service.watch_hub is not None:
+        hub = token_service.watch_hub
+        REGISTRY.gauge_callback(
+            "watchlist", "Balance watch subscriptions and watched addresses", ("stat",),
+            lambda: {(k,): v for k, v in hub.stats().items() if k != "events_pushed"})
+        REGISTRY.counter_callback(
+            "watchlist_events_pushed", "Balance events pushed to watchers", (),
+            lambda: {(): hub.stats()["events_pushed"]})
+    if rate_limiter is not None:
+        REGISTRY.counter_callback(
+            "rate_limited_requests", "Inbound requests rejected by the rate limiter", (),
+            lambda: {(): rate_limiter.rejected})
+    if response_cache is not None:
+        REGISTRY.counter_callback(
+            "response_cache_events", "Serialized response cache hits, misses and 304 answers", ("event",),
+            lambda: {(k,): v for k, v in response_cache.stats().items() if k != "size"})
@@ -0,0 +1,111 @@
+import gc
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Callable
+
+from werkzeug.serving import make_server
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# A worker that dies sooner than this after starting is restarted with a growing delay.
+_MIN_UPTIME = 5.0
+_MAX_RESPAWN_DELAY = 30.0
+
+
+# Forked workers accept on one socket and share what the master loaded copy-on-write; the app
+# is built per worker since threads, sockets and SQLite connections do not survive a fork.
+class PreforkServer:
+    def __init__(self, app_factory: Callable[[int], Callable], host: str, port: int, workers: int,
+                 graceful_timeout: float = 10.0, backlog: int = 2048):
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.sock: socket.socket | None = None
+        self._children: dict[int, tuple[int, float]] = {}
+        self._delays: dict[int, float] = {}
+        self._stopping = False
+
+    def serve(self) -> None:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        self.sock = socket.create_server((self.host, self.port), family=family, backlog=self.backlog)
+        self.sock.set_inheritable(True)
+        logger.info("Prefork master %d listening on %s:%d with %d workers",
+                    os.getpid(), self.host, self.sock.getsockname()[1], self.workers)
+        # Keeps the objects loaded so far out of the collector, so it does not unshare their pages.
+        gc.freeze()
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in range(self.workers):
+            self._spawn(index)
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index, started = self._children.pop(pid, (None, 0.0))
+            if index is None or self._stopping:
+                continue
+            uptime = time.monotonic() - started
+            logger.warning("Worker %d (pid %d) exited with status %d after %.1fs",
+                           index, pid, os.waitstatus_to_exitcode(status), uptime)
+            delay = 0.0 if uptime >= _MIN_UPTIME else min(_MAX_RESPAWN_DELAY, self._delays.get(index, 0.5) * 2)
+            self._delays[index] = delay
+            time.sleep(delay)
+            if not self._stopping:
+                self._spawn(index)
+        self.sock.close()
+
+    def _spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid:
+            self._children[pid] = (index, time.monotonic())
+            return
+        code = 1
+        try:
+            self._run_worker(index)
+            code = 0
+        except BaseException:
+            logger.exception("Worker %d failed", index)
+        finally:
+            os._exit(code)
+
+    def _run_worker(self, index: int) -> None:
+        # Ctrl+C reaches the whole process group; the master turns it into SIGTERM for its workers.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        server = make_server(self.host, self.port, self.app_factory(index), threaded=True, fd=self.sock.fileno())
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+        logger.info("Worker %d (pid %d) serving", index, os.getpid())
+        server.serve_forever()
+
+    def _stop(self, *_args) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Stopping %d workers", len(self._children))
+        for pid in list(self._children):
+            self._signal(pid, signal.SIGTERM)
+        timer = threading.Timer(self.graceful_timeout, self._kill)
+        timer.daemon = True
+        timer.start()
+
+    def _kill(self) -> None:
+        for pid in list(self._children):
+            logger.warning("Worker pid %d did not stop in %.0fs, killing it", pid, self.graceful_timeout)
+            self._signal(pid, signal.SIGKILL)
+
+    @staticmethod
+    def _signal(pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
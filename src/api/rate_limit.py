@@ -0,0 +1,72 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from src.api.errors import TooManyRequestsError
+from src.services.rpc_scheduler import BULK, INTERACTIVE, TokenBucket
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Bulk endpoints queue behind interactive lookups for the outbound RPC budget.
+ENDPOINT_PRIORITIES = {"get_balance_batch": BULK, "get_balance_batch_stream": BULK, "get_balance_matrix": BULK}
+
+
+def endpoint_priority(endpoint: str) -> int:
+    return ENDPOINT_PRIORITIES.get(endpoint, INTERACTIVE)
+
+
+def parse_rate(spec: str) -> tuple[int, float]:
+    # "60/minute" -> (60 requests, 60.0 seconds)
+    try:
+        count, period = spec.strip().split("/")
+        return int(count), float(_PERIODS[period.strip().lower().rstrip("s")])
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate limit: {spec!r}")
+
+
+def parse_rate_overrides(spec: str) -> dict[str, tuple[int, float]]:
+    # "get_balance_batch=20/minute,get_balance_batch_stream=10/minute"
+    out = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        endpoint, _, rate = item.partition("=")
+        out[endpoint.strip()] = parse_rate(rate)
+    return out
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+# Inbound token buckets per (client, endpoint); least recently seen buckets beyond max_buckets are dropped.
+class RateLimiter:
+    def __init__(self, default: str, overrides: dict[str, tuple[int, float]] | None = None,
+                 max_buckets: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.default = parse_rate(default)
+        self.overrides = overrides or {}
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.rejected = 0
+        self._buckets: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, client: str, endpoint: str) -> TokenBucket:
+        key = (client, endpoint)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                count, period = self.overrides.get(endpoint, self.default)
+                bucket = self._buckets[key] = TokenBucket(count / period, count, self.clock)
+                if len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
+
+    def check(self, client: str, endpoint: str) -> None:
+        wait = self._bucket(client, endpoint).take()
+        if wait:
+            with self._lock:
+                self.rejected += 1
+            raise TooManyRequestsError("Rate limit exceeded", retry_after=wait)
@@ -1,8 +1,18 @@
-from flask import Blueprint, request, jsonify, current_app
+import json
+import math
+import functools
+from typing import Iterable, Iterator
 
-from src.utils.validators import is_valid_address
-from src.api.errors import ApiErrorResponse, ValidationError, ServiceError
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+
+from src.api import common
+from src.api.common import ErrorReply, failure, optional_int, parse_ndjson_line
+from src.api.errors import ApiErrorResponse, ValidationError, ServiceError, TooManyRequestsError
+from src.api.http_cache import CachedResponse
+from src.api.rate_limit import endpoint_priority, retry_after_header
+from src.services.rpc_scheduler import set_priority
 from src.utils.logger import setup_logger
+from src.utils.metrics import ERRORS
 
 logger = setup_logger(__name__)
 api_bp = Blueprint("api", __name__)
@@ -15,115 +25,241 @@ def _token_service():
     return svc
 
 
+def _block(svc, source) -> int | None:
+    # Optional historical point: ?block=<n> or ?timestamp=<unix seconds>.
+    return svc.resolve_block(optional_int(source, "block"), optional_int(source, "timestamp"))
+
+
+def _cached_response(cache, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": entry.cache_control}
+    if cache.revalidated(entry, request.headers.get("If-None-Match")):
+        return Response(status=304, headers=headers)
+    return Response(entry.body, mimetype="application/json", headers=headers)
+
+
+def block_cached(index: bool = False):
+    # ETag/Cache-Control by the block the data reflects (the head, the requested
+    # block, or the holder index checkpoint with index=True), 304 on If-None-Match
+    # and a serialized response cache for hot keys.
+    def decorate(view):
+        @functools.wraps(view)
+        def cached_view(*args, **kwargs):
+            cache = getattr(current_app, "response_cache", None)
+            if cache is None:
+                return view(*args, **kwargs)
+            svc = _token_service()
+            pinned = None if index else _block(svc, request.args)
+            params = tuple(sorted(request.args.items(multi=True)))
+            entry = cache.lookup(svc, request.endpoint, params, pinned, index)
+            if entry is not None:
+                return _cached_response(cache, entry)
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            entry = cache.store(svc, request.endpoint, params, pinned, response.get_data(), index)
+            return response if entry is None else _cached_response(cache, entry)
+        return cached_view
+    return decorate
+
+
+def guarded(view):
+    # Maps service failures to JSON error responses (see common.failure).
+    @functools.wraps(view)
+    def guarded_view(*args, **kwargs):
+        try:
+            return view(*args, **kwargs)
+        except Exception as e:
+            payload, status = failure(view.__name__, e)
+            return jsonify(payload), status
+    return guarded_view
+
+
+def _ndjson_addresses(lines: Iterable[bytes]) -> Iterator[object]:
+    for raw in lines:
+        address = parse_ndjson_line(raw)
+        if address is not None:
+            yield address
+
+
+@api_bp.before_request
+def throttle():
+    endpoint = (request.endpoint or "").rsplit(".", 1)[-1]
+    set_priority(endpoint_priority(endpoint))
+    limiter = getattr(current_app, "rate_limiter", None)
+    if limiter is not None:
+        limiter.check(request.remote_addr or "unknown", endpoint)
+
+
+@api_bp.app_errorhandler(TooManyRequestsError)
+def handle_too_many_requests(err):
+    ERRORS.labels("api", type(err).__name__).inc()
+    response = jsonify({"error": err.safe_message, "retry_after": math.ceil(err.retry_after), "success": False})
+    response.headers["Retry-After"] = retry_after_header(err.retry_after)
+    return response, 429
+
+
+@api_bp.app_errorhandler(ErrorReply)
+def handle_error_reply(err):
+    return jsonify(err.payload), err.status
+
+
 @api_bp.app_errorhandler(ValidationError)
 def handle_validation(err):
+    ERRORS.labels("api", type(err).__name__).inc()
     logger.warning("Validation error: %s", err.safe_message)
     return jsonify(ApiErrorResponse(error=err.safe_message).__dict__), 400
 
 
 @api_bp.app_errorhandler(Exception)
 def handle_unexpected(err):
+    ERRORS.labels("api", type(err).__name__).inc()
     logger.exception("Unhandled exception: %s", str(err)[:200])
     return jsonify(ApiErrorResponse(error="Internal server error").__dict__), 500
 
 
 @api_bp.route("/get_balance", methods=["GET"])
+@block_cached()
+@guarded
 def get_balance():
-    address = request.args.get("address")
-    if not address:
-        return jsonify({"error": "Address parameter is required"}), 400
-    if not is_valid_address(address):
-        return jsonify({"error": "Invalid Ethereum address"}), 400
-
+    address = common.required_address(request.args)
     svc = _token_service()
-    try:
-        result = svc.get_balance(address)
-        return jsonify(result)
-    except Exception:
-        logger.exception("Error in get_balance")
-        return jsonify({"error": "Internal server error"}), 500
+    return jsonify(svc.get_balance(address, block=_block(svc, request.args)))
 
 
 @api_bp.route("/get_balance_batch", methods=["POST"])
+@guarded
 def get_balance_batch():
     body = request.get_json() or {}
-    addresses = body.get("addresses")
-    if not addresses or not isinstance(addresses, list):
-        return jsonify({"error": "Addresses array is required"}), 400
-    for a in addresses:
-        if not is_valid_address(a):
-            return jsonify({"error": f"Invalid Ethereum address: {a}"}), 400
+    addresses = common.batch_addresses(body)
+    svc = _token_service()
+    return jsonify(common.batch_payload(svc.get_balance_batch(addresses, block=_block(svc, body))))
+
 
+@api_bp.route("/get_balance_batch_stream", methods=["POST"])
+def get_balance_batch_stream():
+    if request.mimetype in common.NDJSON_MIMETYPES:
+        addresses = _ndjson_addresses(request.stream)
+    else:
+        addresses = common.listed_addresses(request.get_json(silent=True))
     svc = _token_service()
-    try:
-        results = svc.get_balance_batch(addresses)
-        return jsonify({"balances": results, "count": len(results), "success": True})
-    except ValidationError as e:
-        return jsonify({"error": e.safe_message}), 400
-    except Exception:
-        logger.exception("Error in get_balance_batch")
-        return jsonify({"error": "Internal server error"}), 500
+
+    def generate():
+        try:
+            for result in svc.stream_balances(addresses):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            yield common.stream_error_line(e)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+@api_bp.route("/get_balance_matrix", methods=["POST"])
+@guarded
+def get_balance_matrix():
+    body = request.get_json(silent=True) or {}
+    addresses, tokens = common.matrix_request(body)
+    svc = _token_service()
+    return jsonify(common.matrix_payload(svc.get_balance_matrix(addresses, tokens, block=_block(svc, body))))
+
+
+@api_bp.route("/watch_balances", methods=["GET"])
+def watch_balances():
+    hub = common.watch_hub(_token_service())
+    sub = hub.subscribe(common.watch_addresses(request.args.get("addresses")))
+
+    def generate():
+        try:
+            yield common.sse_event("balances", hub.initial(sub))
+            while True:
+                events = sub.wait(hub.keepalive)
+                if not events:
+                    yield common.SSE_KEEPALIVE
+                for event in events:
+                    yield common.sse_event("balances", event)
+        except Exception as e:
+            yield common.sse_error(e)
+        finally:
+            hub.unsubscribe(sub)
+
+    response = Response(stream_with_context(generate()), mimetype="text/event-stream", headers=common.SSE_HEADERS)
+    # Also release the subscription if the stream is closed before it starts.
+    response.call_on_close(lambda: hub.unsubscribe(sub))
+    return response
 
 
 @api_bp.route("/get_token_info", methods=["GET"])
+@block_cached()
+@guarded
 def get_token_info():
     svc = _token_service()
-    try:
-        result = svc.get_token_info()
-        if result.get("success"):
-            return jsonify(result)
-        return jsonify({"error": result.get("error", "Unknown"), "success": False}), 502
-    except Exception:
-        logger.exception("Error in get_token_info")
-        return jsonify({"error": "Internal server error", "success": False}), 500
+    payload, status = common.token_info_reply(svc.get_token_info(block=_block(svc, request.args)))
+    return jsonify(payload), status
 
 
 @api_bp.route("/get_top", methods=["GET"])
+@block_cached(index=True)
+@guarded
 def get_top():
-    n_raw = request.args.get("n", "10")
-    try:
-        n = int(n_raw)
-        if not (1 <= n <= 1000):
-            return jsonify({"error": "Parameter n must be between 1 and 1000", "success": False}), 400
-    except ValueError:
-        return jsonify({"error": "Parameter n must be integer", "success": False}), 400
-
-    svc = _token_service()
-    try:
-        holders = svc.get_top_holders(n)
-        return jsonify({
-            "top_holders": [{"address": a, "balance": b} for a, b in holders],
-            "count": len(holders),
-            "requested_count": n,
-            "success": True
-        })
-    except Exception:
-        logger.exception("Error in get_top")
-        return jsonify({"error": "Internal server error", "success": False}), 500
+    n = common.top_n(request.args)
+    holders, block = _token_service().top_holders_with_block(n)
+    return jsonify(common.top_payload(holders, n, block))
 
 
 @api_bp.route("/get_top_with_transactions", methods=["GET"])
+@guarded
 def get_top_with_transactions():
-    n_raw = request.args.get("n", "10")
-    try:
-        n = int(n_raw)
-        if not (1 <= n <= 1000):
-            return jsonify({"error": "Parameter n must be between 1 and 1000", "success": False}), 400
-    except ValueError:
-        return jsonify({"error": "Parameter n must be integer", "success": False}), 400
+    n = common.top_n(request.args)
+    return jsonify(common.top_tx_payload(_token_service().get_top_holders_with_transactions(n), n))
+
 
+@api_bp.route("/get_ingest_status", methods=["GET"])
+@guarded
+def get_ingest_status():
+    return jsonify(common.ingest_status_payload(getattr(current_app, "ingestor", None)))
+
+
+@api_bp.route("/get_rpc_status", methods=["GET"])
+@guarded
+def get_rpc_status():
+    client = _token_service().client
+    return jsonify(common.rpc_status_payload(client.transport, [client.flight]))
+
+
+@api_bp.route("/get_holder_rank", methods=["GET"])
+@guarded
+def get_holder_rank():
+    address = common.required_address(request.args)
+    return jsonify({**_token_service().get_holder_rank(address), "success": True})
+
+
+@api_bp.route("/get_holders", methods=["GET"])
+@guarded
+def get_holders():
+    cursor, limit = common.holders_page_args(request.args)
+    return jsonify(common.holders_page_payload(*_token_service().get_holders_page(cursor, limit)))
+
+
+@api_bp.route("/export_holders", methods=["GET"])
+def export_holders():
     svc = _token_service()
     try:
-        holders = svc.get_top_holders_with_transactions(n)
-        return jsonify({
-            "top_holders": [
-                {"address": a, "balance": b, "last_transaction_date": t}
-                for a, b, t in holders
-            ],
-            "count": len(holders),
-            "requested_count": n,
-            "success": True
-        })
-    except Exception:
-        logger.exception("Error in get_top_with_transactions")
-        return jsonify({"error": "Internal server error", "success": False}), 500
+        fmt, block, chunks = svc.export_holders(request.args.get("format"), optional_int(request.args, "block"))
+    except Exception as e:
+        payload, status = failure("export_holders", e)
+        return jsonify(payload), status
+
+    def generate():
+        try:
+            yield from chunks
+        except Exception:
+            # Headers are already sent; the client sees a truncated file.
+            logger.exception("Error in export_holders")
+
+    return Response(generate(), headers=common.export_headers(fmt, block))
+
+
+@api_bp.route("/get_holders_in_band", methods=["GET"])
+@guarded
+def get_holders_in_band():
+    min_balance, max_balance, limit = common.band_args(request.args)
+    return jsonify(common.band_payload(_token_service().get_holders_in_band(min_balance, max_balance, limit)))
@@ -6,6 +6,7 @@ class BalanceDTO:
     address: str
     balance_wei: str
     balance_formatted: float
+    block_number: int | None = None
     success: bool = True
 
 
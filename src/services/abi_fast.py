@@ -0,0 +1,131 @@
+from typing import Any
+
+from eth_utils import keccak
+
+from src.utils.validators import to_checksum
+
+_WORD = 64  # hex chars per 32-byte ABI word
+
+
+def selector(signature: str) -> str:
+    return keccak(text=signature)[:4].hex()
+
+
+def _bits(abi_type: str) -> int | None:
+    if abi_type.startswith("uint"):
+        bits = int(abi_type[4:] or 256)
+        return bits if bits % 8 == 0 and 8 <= bits <= 256 else None
+    return None
+
+
+def _supported(abi_type: str) -> bool:
+    return abi_type in ("address", "bool") or _bits(abi_type) is not None
+
+
+def _encode_word(abi_type: str, value: Any) -> str:
+    if abi_type == "address":
+        if not isinstance(value, str) or len(value) != 42:
+            raise ValueError(f"Invalid address argument: {value!r}")
+        return "0" * 24 + value[2:].lower()
+    if abi_type == "bool":
+        return "0" * 63 + ("1" if value else "0")
+    if not isinstance(value, int) or not 0 <= value < 1 << _bits(abi_type):
+        raise ValueError(f"Value out of range for {abi_type}: {value!r}")
+    return format(value, "064x")
+
+
+def _decode_word(abi_type: str, word: str) -> Any:
+    value = int(word, 16)
+    if abi_type == "address":
+        if value >> 160:
+            raise ValueError("Invalid address word")
+        return to_checksum(word[24:])
+    if abi_type == "bool":
+        if value > 1:
+            raise ValueError("Invalid bool word")
+        return bool(value)
+    if value >> _bits(abi_type):
+        raise ValueError(f"Value out of range for {abi_type}")
+    return value
+
+
+# Precompiled encoders for functions with static arguments and one static output;
+# dynamic types and overloads are not compiled and fall back to web3.
+class FastAbi:
+    def __init__(self, abi: list[dict]):
+        self.functions: dict[str, tuple[str, list[str], str]] = {}
+        seen: set[str] = set()
+        for item in abi:
+            if item.get("type") != "function":
+                continue
+            name = item["name"]
+            if name in seen:
+                self.functions.pop(name, None)
+                continue
+            seen.add(name)
+            inputs = [arg["type"] for arg in item.get("inputs", [])]
+            outputs = [out["type"] for out in item.get("outputs", [])]
+            if len(outputs) == 1 and all(_supported(t) for t in inputs + outputs):
+                self.functions[name] = ("0x" + selector(f"{name}({','.join(inputs)})"), inputs, outputs[0])
+
+    def supports(self, fn_name: str) -> bool:
+        return fn_name in self.functions
+
+    def encode(self, fn_name: str, *args) -> str:
+        prefix, inputs, _ = self.functions[fn_name]
+        if len(args) != len(inputs):
+            raise ValueError(f"{fn_name} expects {len(inputs)} arguments")
+        return prefix + "".join(_encode_word(t, v) for t, v in zip(inputs, args))
+
+    def encode_many(self, fn_name: str, args_list: list[tuple]) -> list[str]:
+        return [self.encode(fn_name, *args) for args in args_list]
+
+    def decode(self, fn_name: str, data: str) -> Any:
+        output = self.functions[fn_name][2]
+        word = data[2:2 + _WORD] if data.startswith("0x") else data[:_WORD]
+        if len(word) != _WORD:
+            raise ValueError("Return data too short")
+        return _decode_word(output, word)
+
+
+AGGREGATE3_SELECTOR = "0x" + selector("aggregate3((address,bool,bytes)[])")
+
+
+def encode_aggregate3(calls: list[tuple[str, bool, str]]) -> str:
+    # aggregate3((address,bool,bytes)[]) for (target, allowFailure, "0x" calldata) triples.
+    heads, tails, offset = [], [], 32 * len(calls)
+    for target, allow_failure, call_data in calls:
+        data = call_data[2:]
+        padded = data + "0" * (-len(data) % _WORD)
+        tail = (_encode_word("address", target) + _encode_word("bool", allow_failure)
+                + format(96, "064x") + format(len(data) // 2, "064x") + padded)
+        heads.append(format(offset, "064x"))
+        tails.append(tail)
+        offset += len(tail) // 2
+    return (AGGREGATE3_SELECTOR + format(32, "064x") + format(len(calls), "064x")
+            + "".join(heads) + "".join(tails))
+
+
+def decode_aggregate3(data: str) -> list[tuple[bool, bytes]]:
+    # Decodes the (bool success, bytes returnData)[] result, following offsets
+    # rather than assuming a layout.
+    raw = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+
+    def word(pos: int) -> int:
+        if pos + 32 > len(raw):
+            raise ValueError("Return data too short")
+        return int.from_bytes(raw[pos:pos + 32], "big")
+
+    base = word(0)
+    count = word(base)
+    start = base + 32
+    out = []
+    for i in range(count):
+        tuple_pos = start + word(start + 32 * i)
+        success = word(tuple_pos)
+        bytes_pos = tuple_pos + word(tuple_pos + 32)
+        length = word(bytes_pos)
+        if success > 1 or bytes_pos + 32 + length > len(raw):
+            raise ValueError("Malformed aggregate3 result")
+        out.append((bool(success), raw[bytes_pos + 32:bytes_pos + 32 + length]))
+    return out
@@ -0,0 +1,71 @@
+from dataclasses import dataclass
+
+from src.services.block_times import BlockTimeCache
+from src.services.holder_store import HolderStore
+from src.services.log_ingestor import RangeTooLarge, get_transfer_logs
+from src.services.polygon_client import PolygonClient
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class Activity:
+    block: int
+    tx_hash: str
+    timestamp: int | None
+
+
+# Hot addresses come from the store; cold ones are searched backwards from the head
+# in doubling block windows, down to floor_block and at most max_windows windows.
+class ActivityIndex:
+    def __init__(self, client: PolygonClient, store: HolderStore, block_times: BlockTimeCache,
+                 initial_window: int = 1000, max_window: int = 100_000, floor_block: int = 0,
+                 max_windows: int = 20):
+        self.client = client
+        self.store = store
+        self.block_times = block_times
+        self.initial_window = initial_window
+        self.max_window = max_window
+        self.floor_block = floor_block
+        self.max_windows = max_windows
+
+    def last_activity(self, addresses: list[str], search: bool = True) -> dict[str, Activity | None]:
+        known = self.store.activity(addresses)
+        if search:
+            found = {}
+            for address in addresses:
+                if address not in known:
+                    hit = self._search_backwards(address)
+                    if hit is not None:
+                        found[address] = hit
+            if found:
+                self.store.put_activity(found)
+                known.update(found)
+        times = self.block_times.get_many({block for block, _ in known.values()})
+        return {
+            address: Activity(known[address][0], known[address][1], times.get(known[address][0]))
+            if address in known else None
+            for address in addresses
+        }
+
+    def _search_backwards(self, address: str) -> tuple[int, str] | None:
+        upper = self.client.head.current()
+        window = self.initial_window
+        # Bounded per address: past max_windows eth_getLogs ranges the date is reported as unknown.
+        for _ in range(self.max_windows):
+            if upper < self.floor_block:
+                break
+            lower = max(self.floor_block, upper - window + 1)
+            try:
+                logs = (get_transfer_logs(self.client, lower, upper, sender=address)
+                        + get_transfer_logs(self.client, lower, upper, recipient=address))
+            except RangeTooLarge:
+                window = max(1, window // 2)
+                continue
+            if logs:
+                last = max(logs, key=lambda log: (int(log["blockNumber"], 16), int(log.get("logIndex", "0x0"), 16)))
+                return int(last["blockNumber"], 16), last["transactionHash"]
+            upper = lower - 1
+            window = min(self.max_window, window * 2)
+        return None
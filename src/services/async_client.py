@@ -0,0 +1,255 @@
+import asyncio
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+import aiohttp
+from web3 import AsyncHTTPProvider, AsyncWeb3
+from web3.exceptions import ContractLogicError
+
+from src.api.errors import BlockchainError, ServiceError, TooManyRequestsError
+from src.services.polygon_client import PolygonClient
+from src.services.rpc_scheduler import RpcOverloaded
+from src.services.rpc_transport import RateLimitedError, RpcResult, is_rate_limit_error
+from src.services.singleflight import AsyncSingleFlight
+from src.utils.logger import setup_logger
+from src.utils.metrics import CONTRACT_CALL_DURATION, ERRORS, RPC_REQUEST_DURATION, outcome
+from src.utils.validators import to_checksum
+
+logger = setup_logger(__name__)
+
+
+# Shares head tracker, balance cache, metadata and endpoint ranking with PolygonClient;
+# only per-request RPC calls move to the event loop, over one aiohttp session.
+class AsyncPolygonClient:
+    def __init__(self, client: PolygonClient, urls: list[str] | None = None, request_timeout: float = 10.0,
+                 pool_maxsize: int = 100):
+        self.client = client
+        self.request_timeout = request_timeout
+        self.pool_maxsize = pool_maxsize
+        self.session: aiohttp.ClientSession | None = None
+        self.flight = AsyncSingleFlight()
+        self._contracts: dict[str, Any] = {}
+        self._providers: dict[str, AsyncHTTPProvider] = {}
+        for url in urls or [e.url for e in client.transport.endpoints]:
+            provider = AsyncHTTPProvider(url, exception_retry_configuration=None)
+            w3 = AsyncWeb3(provider)
+            self._providers[url] = provider
+            self._contracts[url] = w3.eth.contract(address=client.contract_address, abi=client.abi)
+
+    async def start(self) -> None:
+        if self.session is not None:
+            return
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+        )
+        for provider in self._providers.values():
+            await provider.cache_async_session(self.session)
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _ranked_urls(self) -> list[str]:
+        # Follow the sync pool's health ranking; URLs it does not know go last.
+        known = [e.url for e in self.client.transport.ranked() if e.url in self._contracts]
+        return known + [url for url in self._contracts if url not in known]
+
+    async def _call(self, fn_name: str, *args, block_identifier: int | str = "latest") -> Any:
+        key = (fn_name, *args, block_identifier)
+        return await self.flight.do(key, lambda: self._call_upstream(fn_name, *args, block_identifier=block_identifier))
+
+    async def _budgeted_urls(self) -> list[str]:
+        # Same per-endpoint outbound budget as the sync pool; endpoints out of
+        # budget are skipped, and when all are, the call sleeps until the
+        # earliest refill or gives up with RpcOverloaded.
+        pool = self.client.transport
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + pool.scheduler.max_wait
+        while True:
+            urls = self._ranked_urls()
+            waits = []
+            for i, url in enumerate(urls):
+                wait = pool.reserve(url)
+                if not wait:
+                    return urls[i:] + urls[:i]
+                waits.append(wait)
+            delay = min(waits)
+            if loop.time() + delay > deadline:
+                pool.scheduler.rejected += 1
+                raise RpcOverloaded(retry_after=max(1.0, delay))
+            await asyncio.sleep(delay)
+
+    async def _call_upstream(self, fn_name: str, *args, block_identifier: int | str = "latest") -> Any:
+        start = time.perf_counter()
+        error: Exception | None = None
+        try:
+            return await self._call_endpoints(fn_name, *args, block_identifier=block_identifier)
+        except Exception as exc:
+            error = exc
+            ERRORS.labels("contract", outcome(exc)).inc()
+            raise
+        finally:
+            CONTRACT_CALL_DURATION.labels(fn_name, outcome(error)).observe(time.perf_counter() - start)
+
+    async def _call_endpoints(self, fn_name: str, *args, block_identifier: int | str = "latest") -> Any:
+        # Like the sync client, precompiled reads skip web3's contract machinery,
+        # which adds two eth_chainId round trips to every AsyncWeb3 call.
+        if self.client.fast_abi.supports(fn_name):
+            block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+            tx = {"to": self.client.contract_address, "data": self.client.encode_call(fn_name, *args)}
+            return self.client.decode_call(fn_name, await self._send("eth_call", [tx, block]))
+        pool = self.client.transport
+        last_exc: Exception | None = None
+        for url in await self._budgeted_urls():
+            label = urlsplit(url).hostname or url
+            start = time.perf_counter()
+            try:
+                func = getattr(self._contracts[url].functions, fn_name)(*args)
+                result = await func.call(block_identifier=block_identifier)
+            except ContractLogicError as exc:
+                # A revert is an answer: the endpoint itself is healthy.
+                pool.record(url, time.perf_counter() - start)
+                RPC_REQUEST_DURATION.labels(label, "eth_call", "ContractLogicError").observe(time.perf_counter() - start)
+                raise BlockchainError("Smart contract error") from exc
+            except Exception as exc:
+                last_exc = self._failed(url, label, "eth_call", start, exc)
+            else:
+                pool.record(url, time.perf_counter() - start)
+                RPC_REQUEST_DURATION.labels(label, "eth_call", "ok").observe(time.perf_counter() - start)
+                return result
+        raise ServiceError("RPC call failed") from last_exc
+
+    async def _send(self, method: str, params: list) -> RpcResult:
+        # One JSON-RPC call over the budgeted endpoints in health order, failing over
+        # on transport errors and rate limiting. Outcomes feed the sync pool's health stats.
+        pool = self.client.transport
+        last_exc: Exception | None = None
+        for url in await self._budgeted_urls():
+            label = urlsplit(url).hostname or url
+            start = time.perf_counter()
+            try:
+                resp = await self._providers[url].make_request(method, params)
+                if is_rate_limit_error(resp.get("error")):
+                    raise RateLimitedError()
+            except Exception as exc:
+                last_exc = self._failed(url, label, method, start, exc)
+                continue
+            latency = time.perf_counter() - start
+            pool.record(url, latency)
+            RPC_REQUEST_DURATION.labels(label, method, "ok").observe(latency)
+            return RpcResult(result=resp.get("result"), error=resp.get("error"))
+        raise ServiceError("RPC call failed") from last_exc
+
+    def _failed(self, url: str, label: str, method: str, start: float, exc: Exception) -> Exception:
+        if getattr(exc, "status", None) == 429:
+            exc = RateLimitedError()
+        latency = time.perf_counter() - start
+        RPC_REQUEST_DURATION.labels(label, method, outcome(exc)).observe(latency)
+        ERRORS.labels("rpc", outcome(exc)).inc()
+        self.client.transport.record(url, latency, exc)
+        # Host label and error class only: aiohttp errors repeat the full URL, API key included.
+        logger.warning("Async RPC call %s failed on %s: %s", method, label, outcome(exc))
+        return exc
+
+    async def head(self) -> int:
+        block = self.client.head.peek()
+        if block is None:
+            block = await asyncio.to_thread(self.client.head.current)
+        return block
+
+    async def decimals(self) -> int:
+        metadata = self.client.cached_metadata()
+        if metadata is None:
+            metadata = await asyncio.to_thread(self.client.token_metadata)
+        return metadata["decimals"]
+
+    async def balance_of(self, address: str) -> dict[str, object]:
+        try:
+            checksum = to_checksum(address)
+        except Exception:
+            return {"address": address, "error": "Invalid address", "success": False}
+
+        try:
+            block = await self.head()
+            balance_wei = self.client.balance_cache.get(checksum, block)
+            if balance_wei is None:
+                balance_wei = await self._call("balanceOf", checksum, block_identifier=block)
+                self.client.balance_cache.put(checksum, block, balance_wei)
+            decimals = await self.decimals()
+            return self.client.balance_result(address, balance_wei, decimals, block)
+        except (BlockchainError, ServiceError):
+            return {"address": address, "error": "RPC or contract error", "success": False}
+        except TooManyRequestsError:
+            raise
+        except Exception:
+            return {"address": address, "error": "Internal error", "success": False}
+
+    async def balance_of_batch(self, addresses: list[str], concurrency: int = 32) -> list[dict[str, object]]:
+        # Same Multicall3 aggregate3 chunks as PolygonClient.balance_of_batch; the
+        # chunks run concurrently (up to ``concurrency``) instead of in one JSON-RPC batch.
+        results: list[dict[str, object] | None] = [None] * len(addresses)
+        checksums: list[tuple[int, str]] = []
+        for i, address in enumerate(addresses):
+            try:
+                checksums.append((i, to_checksum(address)))
+            except Exception:
+                results[i] = {"address": address, "error": "Invalid address", "success": False}
+        if not checksums:
+            return results
+
+        try:
+            block = await self.head()
+            decimals = await self.decimals()
+        except (BlockchainError, ServiceError):
+            for i, _ in checksums:
+                results[i] = {"address": addresses[i], "error": "RPC or contract error", "success": False}
+            return results
+
+        balances: dict[str, int | Exception] = {}
+        for _, checksum in checksums:
+            cached = self.client.balance_cache.get(checksum, block)
+            if cached is not None:
+                balances[checksum] = cached
+        missing = list(dict.fromkeys(c for _, c in checksums if c not in balances))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def upstream(chunk: list[str], data: str) -> list[int | Exception]:
+            try:
+                result = await self._send("eth_call", [{"to": self.client.multicall_address, "data": data}, hex(block)])
+            except (BlockchainError, ServiceError):
+                return [ServiceError("RPC or contract error") for _ in chunk]
+            return self.client.decode_balances(chunk, result)
+
+        async def fetch(chunk: list[str], data: str) -> list[int | Exception]:
+            # Concurrent batches asking for the same chunk at the same block share one eth_call.
+            async with semaphore:
+                return await self.flight.do(("aggregate3.balanceOf", tuple(chunk), block),
+                                            lambda: upstream(chunk, data))
+
+        calls = self.client.balance_multicalls(missing)
+        start = time.perf_counter()
+        chunk_outcomes = await asyncio.gather(*(fetch(chunk, data) for chunk, data in calls))
+        CONTRACT_CALL_DURATION.labels("aggregate3.balanceOf", "ok").observe(time.perf_counter() - start)
+        fetched = []
+        for (chunk, _), chunk_outcome in zip(calls, chunk_outcomes):
+            for checksum, value in zip(chunk, chunk_outcome):
+                balances[checksum] = value
+                if not isinstance(value, Exception):
+                    fetched.append((checksum, value))
+        self.client.balance_cache.put_many(block, fetched)
+
+        for i, checksum in checksums:
+            value = balances.get(checksum, ServiceError("RPC or contract error"))
+            if isinstance(value, ServiceError):
+                results[i] = {"address": addresses[i], "error": value.safe_message, "success": False}
+            else:
+                results[i] = self.client.balance_result(addresses[i], value, decimals, block)
+        return results
+
+    async def token_info(self) -> dict[str, object]:
+        # Metadata is immutable and totalSupply is served stale-while-revalidate,
+        # so this rarely leaves the cache; the thread keeps the loop free when it does.
+        return await asyncio.to_thread(self.client.token_info)
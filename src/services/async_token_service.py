@@ -0,0 +1,101 @@
+import asyncio
+from typing import Any, AsyncIterable, AsyncIterator
+
+from src.services.async_client import AsyncPolygonClient
+from src.services.token_service import TokenService
+from src.utils.logger import setup_logger
+from src.utils.validators import try_normalize
+from src.api.errors import TooManyRequestsError, ValidationError
+
+logger = setup_logger(__name__)
+
+
+# Balance lookups go through AsyncPolygonClient; holder queries run the sync service in threads.
+class AsyncTokenService:
+    def __init__(self, service: TokenService, client: AsyncPolygonClient, batch_concurrency: int = 32):
+        self.service = service
+        self.client = client
+        self.batch_concurrency = max(1, batch_concurrency)
+
+    async def resolve_block(self, block: int | None = None, timestamp: int | None = None) -> int | None:
+        if block is None and timestamp is None:
+            return None
+        return await asyncio.to_thread(self.service.resolve_block, block, timestamp)
+
+    async def get_balance(self, address: str, block: int | None = None) -> dict[str, Any]:
+        if block is not None:
+            return await asyncio.to_thread(self.service.get_balance, address, block)
+        return await self.client.balance_of(address)
+
+    async def get_balance_batch(self, addresses: list[str], block: int | None = None) -> list[dict[str, Any]]:
+        if not isinstance(addresses, list) or len(addresses) == 0:
+            raise ValidationError("addresses must be a non-empty list")
+        if block is not None:
+            return await asyncio.to_thread(self.service.get_balance_batch, addresses, block)
+        try:
+            return await self.client.balance_of_batch(addresses, self.batch_concurrency)
+        except TooManyRequestsError:
+            raise
+        except Exception:
+            logger.exception("Error fetching balance batch of %d addresses", len(addresses))
+            return [{"address": addr, "error": "Internal error", "success": False} for addr in addresses]
+
+    async def lookup_chunk(self, chunk: list[str]) -> list[dict[str, Any]]:
+        canonical = [try_normalize(a) for a in chunk]
+        valid = [c for c in canonical if c is not None]
+        found = iter(await self.get_balance_batch(valid) if valid else [])
+        return [next(found) if c is not None else {"address": a, "error": "Invalid Ethereum address", "success": False}
+                for a, c in zip(chunk, canonical)]
+
+    async def stream_balances(self, addresses: AsyncIterable[str]) -> AsyncIterator[dict[str, Any]]:
+        chunk: list[str] = []
+        async for address in addresses:
+            chunk.append(address)
+            if len(chunk) >= self.service.stream_chunk_size:
+                for result in await self.lookup_chunk(chunk):
+                    yield result
+                chunk = []
+        if chunk:
+            for result in await self.lookup_chunk(chunk):
+                yield result
+
+    async def get_balance_matrix(self, addresses: list[str], tokens: list[str],
+                                 block: int | None = None) -> dict[str, Any]:
+        return await asyncio.to_thread(self.service.get_balance_matrix, addresses, tokens, block)
+
+    async def get_token_info(self, block: int | None = None) -> dict[str, Any]:
+        if block is not None:
+            return await asyncio.to_thread(self.service.get_token_info, block)
+        return await self.client.token_info()
+
+    async def get_top_holders(self, n: int = 10) -> list[tuple[str, float]]:
+        return await asyncio.to_thread(self.service.get_top_holders, n)
+
+    async def top_holders_with_block(self, n: int, with_transactions: bool = False) -> tuple[list, int | None]:
+        return await asyncio.to_thread(self.service.top_holders_with_block, n, with_transactions)
+
+    async def get_top_holders_with_transactions(self, n: int = 10):
+        return await asyncio.to_thread(self.service.get_top_holders_with_transactions, n)
+
+    async def get_holder_rank(self, address: str) -> dict[str, Any]:
+        return await asyncio.to_thread(self.service.get_holder_rank, address)
+
+    async def get_holders_page(self, cursor: str | None, limit: int) -> tuple[list[tuple[str, float]], str | None]:
+        return await asyncio.to_thread(self.service.get_holders_page, cursor, limit)
+
+    async def export_holders(self, fmt: str | None = None,
+                             block: int | None = None) -> tuple[str, int | None, AsyncIterator[bytes]]:
+        fmt, indexed, chunks = await asyncio.to_thread(self.service.export_holders, fmt, block)
+
+        async def stream() -> AsyncIterator[bytes]:
+            # SQLite reads and encoding stay off the event loop, one batch at a time.
+            try:
+                while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                    yield chunk
+            finally:
+                chunks.close()
+
+        return fmt, indexed, stream()
+
+    async def get_holders_in_band(self, min_balance: str, max_balance: str, limit: int) -> list[tuple[str, float]]:
+        return await asyncio.to_thread(self.service.get_holders_in_band, min_balance, max_balance, limit)
@@ -0,0 +1,50 @@
+import threading
+
+from src.api.errors import ServiceError
+from src.services.holder_store import HolderStore
+from src.services.polygon_client import PolygonClient
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class BlockTimeCache:
+    def __init__(self, client: PolygonClient, store: HolderStore):
+        self.client = client
+        self.store = store
+        self._memory: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, numbers: list[int] | set[int]) -> dict[int, int]:
+        wanted = set(numbers)
+        out = {n: self._memory[n] for n in wanted if n in self._memory}
+        missing = sorted(wanted - out.keys())
+        if missing:
+            stored = self.store.block_times(missing)
+            out.update(stored)
+            missing = [n for n in missing if n not in stored]
+        if missing:
+            fetched = self._fetch(missing)
+            self.store.put_block_times(fetched)
+            out.update(fetched)
+        with self._lock:
+            self._memory.update(out)
+        return out
+
+    def get(self, number: int) -> int:
+        times = self.get_many([number])
+        if number not in times:
+            raise ServiceError(f"Block {number} not found")
+        return times[number]
+
+    def _fetch(self, numbers: list[int]) -> dict[int, int]:
+        batch = self.client.new_batch()
+        for number in numbers:
+            batch.add("eth_getBlockByNumber", [hex(number), False])
+        out = {}
+        for number, result in zip(numbers, batch.flush()):
+            if result.ok and result.result:
+                out[number] = int(result.result["timestamp"], 16)
+            else:
+                logger.warning("Unable to fetch timestamp of block %d", number)
+        return out
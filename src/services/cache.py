@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_MISSING = object()
+
+
+# Fresh within ttl; between ttl and stale_ttl the stale value is served while one background
+# refresh runs; past stale_ttl the caller loads synchronously.
+class SwrValue:
+    def __init__(self, loader: Callable[[], Any], ttl: float, stale_ttl: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = max(ttl, stale_ttl)
+        self.clock = clock
+        self._value: Any = _MISSING
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self) -> Any:
+        value, age = self._value, self.clock() - self._loaded_at
+        if value is _MISSING or age > self.stale_ttl:
+            return self._load()
+        if age > self.ttl:
+            self._refresh_in_background()
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = _MISSING
+
+    def _load(self) -> Any:
+        with self._lock:
+            if self._value is not _MISSING and self.clock() - self._loaded_at <= self.stale_ttl:
+                return self._value
+            value = self.loader()
+            self._value, self._loaded_at = value, self.clock()
+            return value
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self) -> None:
+        try:
+            value = self.loader()
+        except Exception:
+            logger.warning("Background refresh failed, keeping stale value")
+            with self._lock:
+                self._refreshing = False
+            return
+        with self._lock:
+            self._value, self._loaded_at = value, self.clock()
+            self._refreshing = False
+
+
+# One eth_blockNumber lookup per interval, shared by all callers.
+class HeadTracker:
+    def __init__(self, fetch_head: Callable[[], int], interval: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.fetch_head = fetch_head
+        self.interval = interval
+        self.clock = clock
+        self._head: int | None = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def peek(self) -> int | None:
+        # Fresh head without ever touching the network, for callers that must not block.
+        if self._head is not None and self.clock() - self._fetched_at < self.interval:
+            return self._head
+        return None
+
+    def current(self) -> int:
+        if self._head is not None and self.clock() - self._fetched_at < self.interval:
+            return self._head
+        with self._lock:
+            if self._head is not None and self.clock() - self._fetched_at < self.interval:
+                return self._head
+            try:
+                head, age = self._fetch()
+            except Exception:
+                if self._head is None:
+                    raise
+                logger.warning("Head refresh failed, keeping block %d", self._head)
+                return self._head
+            self._fetched_at = self.clock() - age
+            if self._head is None or head > self._head:
+                self._head = head
+            return self._head
+
+    def _fetch(self) -> tuple[int, float]:
+        # The head and how many seconds old it already is.
+        return self.fetch_head(), 0.0
+
+
+# LRU of balances pinned to the block they were read at; a lookup hits only at that block.
+class BalanceCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[int, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Entries read at any block in _carried_from.._carried_to count as read at _carried_to (see rekey).
+        self._carried_from = self._carried_to = -1
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, address: str, block: int) -> int | None:
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is not None:
+                read_at = self._read_at(entry[0])
+                if read_at == block:
+                    self._entries.move_to_end(address)
+                    self.hits += 1
+                    return entry[1]
+                if read_at < block:
+                    del self._entries[address]
+                    self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, address: str, block: int, balance: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._store(address, block, balance)
+
+    def put_many(self, block: int, balances: list[tuple[str, int]]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for address, balance in balances:
+                self._store(address, block, balance)
+
+    def _read_at(self, block: int) -> int:
+        return self._carried_to if self._carried_from <= block <= self._carried_to else block
+
+    def _store(self, address: str, block: int, balance: int) -> None:
+        if self._carried_from <= block < self._carried_to:
+            # Read before the carried-through block, so it may predate a change rekey has already dropped.
+            return
+        entry = self._entries.get(address)
+        if entry is not None and self._read_at(entry[0]) > block:
+            return
+        self._entries[address] = (block, balance)
+        self._entries.move_to_end(address)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def rekey(self, from_block: int, to_block: int, touched: set[str]) -> None:
+        # Blocks from_block..to_block are known (from their Transfer logs) to change
+        # only ``touched``: drop those and carry the other entries read at
+        # from_block - 1 or later forward to ``to_block``. Older entries may have
+        # missed earlier ranges, so they are left to expire. Only the touched
+        # addresses are visited; the carry is one block range, extended while
+        # ingested ranges are contiguous.
+        with self._lock:
+            for address in touched:
+                if self._entries.pop(address, None) is not None:
+                    self.invalidations += 1
+            if to_block <= self._carried_to:
+                return
+            if from_block - 1 <= self._carried_to:
+                self._carried_from = min(self._carried_from, from_block - 1)
+            else:
+                self._carried_from = from_block - 1
+            self._carried_to = to_block
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,321 @@
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+from src.api.errors import ServiceError
+from src.services.rpc_scheduler import RpcScheduler, TokenBucket
+from src.services.rpc_transport import RateLimitedError, RpcResult, RpcTransport, is_rate_limit_error
+from src.utils.logger import setup_logger
+from src.utils.metrics import ERRORS, RPC_REQUEST_DURATION, outcome
+
+logger = setup_logger(__name__)
+
+# Per-call errors meaning "this node has not seen that block yet": retry elsewhere.
+_LAGGING_NODE_HINTS = ("header not found", "unknown block", "missing trie node", "block not found")
+
+
+class Endpoint:
+    def __init__(self, transport: RpcTransport, default_latency: float, samples: int = 200,
+                 budget: TokenBucket | None = None):
+        self.transport = transport
+        self.budget = budget
+        self.url = transport.url
+        # Metrics label: the host only, since provider URLs often carry API keys.
+        self.label = urlsplit(self.url).hostname or self.url
+        self.latency_ewma = default_latency
+        self.error_ewma = 0.0
+        self.latencies: deque[float] = deque(maxlen=samples)
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.backoff = 0.0
+        self.probing = False
+
+    def score(self) -> float:
+        return self.latency_ewma * (1 + 4 * self.error_ewma) * (1 + self.in_flight)
+
+    def p95(self) -> float | None:
+        if len(self.latencies) < 20:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+# Picks the healthiest endpoint by latency and error EWMAs with circuit breakers, fails over,
+# optionally hedges past the primary's p95 and splits batches across endpoints. Same interface as RpcTransport.
+class EndpointPool:
+    def __init__(self, transports: list[RpcTransport], alpha: float = 0.2, breaker_threshold: int = 3,
+                 breaker_backoff: float = 1.0, breaker_max_backoff: float = 60.0, hedge: bool = False,
+                 hedge_min_delay: float = 0.05, explore_ratio: float = 0.05, default_latency: float = 0.5,
+                 rate: float = 0.0, burst: float = 0.0, scheduler: RpcScheduler | None = None,
+                 workers: int = 32, clock: Callable[[], float] = time.monotonic):
+        if not transports:
+            raise ServiceError("No RPC endpoints configured")
+        self.endpoints = [Endpoint(t, default_latency, budget=TokenBucket(rate, burst or rate, clock) if rate > 0 else None)
+                          for t in transports]
+        self.scheduler = scheduler or RpcScheduler(clock=clock)
+        self.alpha = alpha
+        self.breaker_threshold = breaker_threshold
+        self.breaker_backoff = breaker_backoff
+        self.breaker_max_backoff = breaker_max_backoff
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.explore_ratio = explore_ratio
+        self.clock = clock
+        self.batch_max_size = min(t.batch_max_size for t in transports)
+        self.hedged_requests = 0
+        self._lock = threading.Lock()
+        # Hedged attempts and extra batch chunks run here; a slot is taken before submitting,
+        # so work never waits in the executor queue (see _offload).
+        self.workers = max(1, workers)
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rpc")
+
+    @property
+    def url(self) -> str:
+        return self.endpoints[0].url
+
+    def ranked(self, exclude: set[str] | None = None, prefer: str | None = None) -> list[Endpoint]:
+        now = self.clock()
+        exclude = exclude or set()
+        with self._lock:
+            # Endpoints with an open breaker are skipped; once the backoff has
+            # elapsed a single in-flight probe is allowed through.
+            candidates = [e for e in self.endpoints
+                          if e.url not in exclude and e.open_until <= now and not (e.backoff and e.probing)]
+        # Half-open endpoints go first so the probe actually happens.
+        ranked = sorted(candidates, key=lambda e: (not e.backoff, e.score()))
+        if prefer is not None:
+            ranked.sort(key=lambda e: e.url != prefer)
+        elif len(ranked) > 1 and random.random() < self.explore_ratio:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked
+
+    def _record_success(self, endpoint: Endpoint, latency: float) -> None:
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.latencies.append(latency)
+            endpoint.latency_ewma += self.alpha * (latency - endpoint.latency_ewma)
+            endpoint.error_ewma *= 1 - self.alpha
+            endpoint.consecutive_failures = 0
+            if endpoint.backoff:
+                logger.info("RPC endpoint %s recovered", endpoint.label)
+            endpoint.backoff = 0.0
+            endpoint.open_until = 0.0
+            endpoint.probing = False
+
+    def _record_failure(self, endpoint: Endpoint, exc: Exception) -> None:
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.failures += 1
+            endpoint.error_ewma += self.alpha * (1 - endpoint.error_ewma)
+            endpoint.consecutive_failures += 1
+            endpoint.probing = False
+            retry_after = getattr(exc, "retry_after", None)
+            if isinstance(exc, RateLimitedError):
+                endpoint.rate_limited += 1
+            if endpoint.backoff or endpoint.consecutive_failures >= self.breaker_threshold or retry_after:
+                endpoint.backoff = min(self.breaker_max_backoff, max(self.breaker_backoff, endpoint.backoff * 2))
+                endpoint.open_until = self.clock() + max(endpoint.backoff, retry_after or 0)
+                logger.warning("RPC endpoint %s unavailable for %.1fs: %s", endpoint.label, endpoint.backoff, exc)
+
+    def _timed(self, endpoint: Endpoint, fn: Callable[[RpcTransport], Any], method: str = "call") -> Any:
+        with self._lock:
+            endpoint.in_flight += 1
+        start = time.perf_counter()
+        try:
+            result = fn(endpoint.transport)
+        except ServiceError as exc:
+            RPC_REQUEST_DURATION.labels(endpoint.label, method, outcome(exc)).observe(time.perf_counter() - start)
+            ERRORS.labels("rpc", outcome(exc)).inc()
+            self._record_failure(endpoint, exc)
+            raise
+        finally:
+            with self._lock:
+                endpoint.in_flight -= 1
+        latency = time.perf_counter() - start
+        RPC_REQUEST_DURATION.labels(endpoint.label, method, "ok").observe(latency)
+        self._record_success(endpoint, latency)
+        return result
+
+    def reserve(self, url: str, cost: float = 1) -> float:
+        # Non-blocking budget check for callers outside the pool; 0 means reserved.
+        for endpoint in self.endpoints:
+            if endpoint.url == url and endpoint.budget is not None:
+                return endpoint.budget.take(cost)
+        return 0.0
+
+    def record(self, url: str, latency: float, error: Exception | None = None) -> None:
+        # Outcome of a call made outside the pool (the async client), so health ranking and breakers see it.
+        for endpoint in self.endpoints:
+            if endpoint.url == url:
+                if error is None:
+                    self._record_success(endpoint, latency)
+                else:
+                    self._record_failure(endpoint, error)
+                return
+
+    def _admit(self, ranked: list[Endpoint], cost: float) -> Endpoint:
+        # Take the best-ranked endpoint with budget left, queueing when none has any.
+        if all(e.budget is None for e in ranked):
+            return ranked[0]
+        chosen: list[Endpoint] = []
+
+        def try_take() -> float:
+            waits = []
+            for endpoint in ranked:
+                wait = endpoint.budget.take(cost) if endpoint.budget is not None else 0.0
+                if wait == 0:
+                    chosen.append(endpoint)
+                    return 0.0
+                waits.append(wait)
+            return min(waits)
+
+        self.scheduler.admit(try_take)
+        return chosen[0]
+
+    def _run(self, fn: Callable[[RpcTransport], Any], prefer: str | None = None, cost: float = 1,
+             method: str = "call") -> Any:
+        tried: set[str] = set()
+        last_exc: Exception | None = None
+        while True:
+            ranked = self.ranked(tried, prefer)
+            if not ranked:
+                break
+            primary = self._admit(ranked, cost)
+            tried.add(primary.url)
+            if primary.backoff:
+                with self._lock:
+                    primary.probing = True
+            others = [e for e in ranked if e is not primary]
+            backup = others[0] if self.hedge and others else None
+            try:
+                if backup is None:
+                    return self._timed(primary, fn, method)
+                return self._hedged(primary, backup, fn, cost, method, tried)
+            except ServiceError as exc:
+                last_exc = exc
+        raise ServiceError("All RPC endpoints failed") from last_exc
+
+    def _offload(self, fn: Callable, *args) -> Future | None:
+        # None when every worker is busy: the caller then does the work itself (or skips a hedge)
+        # instead of queueing behind other requests.
+        if not self._slots.acquire(blocking=False):
+            return None
+        return self._executor.submit(self._release_after, contextvars.copy_context(), fn, *args)
+
+    def _release_after(self, ctx: contextvars.Context, fn: Callable, *args) -> Any:
+        try:
+            return ctx.run(fn, *args)
+        finally:
+            self._slots.release()
+
+    def _hedged(self, primary: Endpoint, backup: Endpoint, fn: Callable[[RpcTransport], Any], cost: float = 1,
+                method: str = "call", tried: set[str] | None = None) -> Any:
+        # The backup only counts as tried (for failover) once the hedge was actually sent.
+        first = self._offload(self._timed, primary, fn, method)
+        if first is None:
+            return self._timed(primary, fn, method)
+        futures = {first: primary}
+        delay = max(self.hedge_min_delay, primary.p95() or primary.latency_ewma * 2)
+        done, _ = wait(futures, timeout=delay)
+        # Hedges are optional work: skip them rather than wait for budget or a worker.
+        if not done and (backup.budget is None or backup.budget.take(cost) == 0):
+            hedge = self._offload(self._timed, backup, fn, method)
+            if hedge is not None:
+                with self._lock:
+                    self.hedged_requests += 1
+                futures[hedge] = backup
+                if tried is not None:
+                    tried.add(backup.url)
+        last_exc: Exception | None = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except ServiceError as exc:
+                    last_exc = exc
+        raise last_exc or ServiceError("RPC call failed")
+
+    def request(self, method: str, params: list | None = None) -> dict:
+        def send(transport: RpcTransport) -> dict:
+            resp = transport.request(method, params)
+            if is_rate_limit_error(resp.get("error")):
+                raise RateLimitedError()
+            return resp
+        return self._run(send, method=method)
+
+    def call(self, method: str, params: list | None = None) -> Any:
+        resp = self.request(method, params)
+        if "error" in resp:
+            raise ServiceError(f"RPC error from {method}")
+        return resp.get("result")
+
+    def send_batch(self, calls: list[tuple[str, list]], prefer: str | None = None) -> list[RpcResult]:
+        def send(transport: RpcTransport) -> list[RpcResult]:
+            results = transport.send_batch(calls)
+            if results and all(is_rate_limit_error(r.error) for r in results):
+                raise RateLimitedError()
+            return results
+        # Batches are labelled by their method when homogeneous (e.g. all eth_call).
+        methods = {m for m, _ in calls}
+        return self._run(send, prefer, cost=len(calls), method=f"batch:{methods.pop() if len(methods) == 1 else 'mixed'}")
+
+    def batch(self, calls: list[tuple[str, list]]) -> list[RpcResult]:
+        chunks = [calls[start:start + self.batch_max_size] for start in range(0, len(calls), self.batch_max_size)]
+        if len(chunks) == 1:
+            return self._send_chunk(chunks[0], None)
+        # Spread chunks round-robin over the endpoints that are within 3x of the
+        # best score; failover still applies per chunk.
+        ranked = self.ranked()
+        healthy = [e.url for e in ranked if e.score() <= 3 * ranked[0].score()] if ranked else [None]
+        preferred = [healthy[i % len(healthy)] for i in range(len(chunks))]
+        # The caller sends the first chunk itself, and any chunk no free worker picked up.
+        # Offloaded chunks keep the caller's priority in the scheduler queue.
+        futures = [self._offload(self._send_chunk, chunk, url) for chunk, url in zip(chunks[1:], preferred[1:])]
+        out = self._send_chunk(chunks[0], preferred[0])
+        for future, chunk, url in zip(futures, chunks[1:], preferred[1:]):
+            out.extend(future.result() if future is not None else self._send_chunk(chunk, url))
+        return out
+
+    def _send_chunk(self, calls: list[tuple[str, list]], prefer: str | None) -> list[RpcResult]:
+        try:
+            results = self.send_batch(calls, prefer)
+        except ServiceError as exc:
+            return [RpcResult(error={"code": -32603, "message": str(exc)}) for _ in calls]
+        lagging = [i for i, r in enumerate(results)
+                   if r.error and any(h in str(r.error.get("message", "")).lower() for h in _LAGGING_NODE_HINTS)]
+        if lagging and len(self.endpoints) > 1:
+            try:
+                retried = self.send_batch([calls[i] for i in lagging])
+                for i, result in zip(lagging, retried):
+                    results[i] = result
+            except ServiceError:
+                pass
+        return results
+
+    def stats(self) -> list[dict[str, object]]:
+        now = self.clock()
+        with self._lock:
+            return [{
+                "endpoint": e.label,
+                "latency_ewma_ms": round(e.latency_ewma * 1000, 2),
+                "p95_ms": round(e.p95() * 1000, 2) if e.p95() is not None else None,
+                "error_rate": round(e.error_ewma, 4),
+                "requests": e.requests,
+                "failures": e.failures,
+                "rate_limited": e.rate_limited,
+                "in_flight": e.in_flight,
+                "circuit_open": e.open_until > now,
+                "budget_tokens": round(e.budget.tokens, 2) if e.budget is not None else None,
+            } for e in self.endpoints]
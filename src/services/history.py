@@ -0,0 +1,109 @@
+from typing import Any
+
+from src.api.errors import ServiceError, ValidationError
+from src.services.block_times import BlockTimeCache
+from src.services.holder_store import HolderStore, decode_balance, encode_balance
+from src.services.polygon_client import PolygonClient
+from src.utils.logger import setup_logger
+from src.utils.validators import to_checksum
+
+logger = setup_logger(__name__)
+
+
+# Reads at least finality_depth below the head are final and stored permanently.
+class HistoricalQueries:
+    def __init__(self, client: PolygonClient, store: HolderStore, block_times: BlockTimeCache,
+                 finality_depth: int = 256, probes: int = 8):
+        self.client = client
+        self.store = store
+        self.block_times = block_times
+        self.finality_depth = finality_depth
+        self.probes = probes
+
+    def _kind(self, kind: str) -> str:
+        # Token reads are scoped by contract, so a store reused for another token never serves them.
+        return f"{kind}:{self.client.contract_address}"
+
+    def _is_final(self, block: int, head: int) -> bool:
+        return head - block >= self.finality_depth
+
+    def _check_block(self, block: int) -> int:
+        head = self.client.head.current()
+        if block > head:
+            raise ValidationError(f"Block {block} is ahead of the chain head {head}")
+        return head
+
+    def block_at(self, timestamp: int) -> int:
+        # Last block with a timestamp <= timestamp.
+        key = str(timestamp)
+        cached = self.store.historical("block_at", 0, [key])
+        if cached:
+            return int(cached[key])
+        head = self.client.head.current()
+        times = self.block_times.get_many([0, head])
+        if len(times) < 2:
+            raise ServiceError("Unable to fetch block timestamps")
+        if timestamp < times[0]:
+            raise ValidationError("Timestamp is before the first block")
+        if timestamp >= times[head]:
+            return head
+        # k-ary search: every round fetches ``probes`` headers in one batch and
+        # keeps ts(lo) <= timestamp < ts(hi).
+        lo, hi = 0, head
+        while hi - lo > 1:
+            step = (hi - lo) / (self.probes + 1)
+            points = sorted({lo + int(step * i) for i in range(1, self.probes + 1)} - {lo, hi})
+            probed = self.block_times.get_many(points)
+            if len(probed) < len(points):
+                raise ServiceError("Unable to fetch block timestamps")
+            for point in points:
+                if probed[point] <= timestamp:
+                    lo = point
+                else:
+                    hi = point
+                    break
+        if self._is_final(hi, head):
+            self.store.put_historical("block_at", 0, {key: str(lo)})
+        return lo
+
+    def resolve_block(self, block: int | None, timestamp: int | None) -> int | None:
+        if block is not None and timestamp is not None:
+            raise ValidationError("Pass either block or timestamp, not both")
+        return self.block_at(timestamp) if timestamp is not None else block
+
+    def balances(self, addresses: list[str], block: int) -> list[dict[str, Any]]:
+        results: list[dict[str, Any] | None] = [None] * len(addresses)
+        checksums: dict[int, str] = {}
+        for i, address in enumerate(addresses):
+            try:
+                checksums[i] = to_checksum(address)
+            except Exception:
+                results[i] = {"address": address, "error": "Invalid address", "success": False}
+        cached = self.store.historical(self._kind("balanceOf"), block, list(set(checksums.values())))
+        missing = [i for i, checksum in checksums.items() if checksum not in cached]
+        if missing:
+            head = self._check_block(block)
+            fetched = self.client.balance_of_batch([addresses[i] for i in missing], block=block)
+            for i, result in zip(missing, fetched):
+                results[i] = result
+            if self._is_final(block, head):
+                self.store.put_historical(self._kind("balanceOf"), block, {
+                    checksums[i]: encode_balance(int(result["balance_wei"]))
+                    for i, result in zip(missing, fetched) if result.get("success")
+                })
+        if len(missing) < len(checksums):
+            decimals = self.client.decimals()
+            for i, checksum in checksums.items():
+                if results[i] is None:
+                    results[i] = self.client.balance_result(addresses[i], decode_balance(cached[checksum]), decimals, block)
+        return results
+
+    def token_info(self, block: int) -> dict[str, Any]:
+        cached = self.store.historical(self._kind("totalSupply"), block, [""])
+        if cached:
+            return self.client.token_info(block=block, total_supply=decode_balance(cached[""]))
+        head = self._check_block(block)
+        info = self.client.token_info(block=block)
+        if info.get("success") and self._is_final(block, head):
+            self.store.put_historical(self._kind("totalSupply"), block, {"": encode_balance(int(info["totalSupply"]))})
+        return info
@@ -0,0 +1,130 @@
+import csv
+import importlib.util
+import io
+from array import array
+from typing import Iterable, Iterator, NamedTuple
+
+from src.api.errors import ValidationError
+from src.services.holder_store import HolderStore
+
+# format -> (content type, file extension)
+FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "csv": ("text/csv", "csv"),
+}
+COLUMNS = ("address", "balance_wei", "last_block")
+# decimal256 holds 76 digits; a uint256 can have 78.
+DECIMAL_LIMIT = 10 ** 76
+
+
+def has_pyarrow() -> bool:
+    # pyarrow is optional and heavy, so it is only imported once an Arrow or Parquet export starts.
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def resolve_format(fmt: str | None) -> str:
+    if not fmt:
+        return "arrow" if has_pyarrow() else "csv"
+    fmt = fmt.lower()
+    if fmt not in FORMATS:
+        raise ValidationError(f"format must be one of: {', '.join(FORMATS)}")
+    if fmt != "csv" and not has_pyarrow():
+        raise ValidationError(f"format={fmt} needs pyarrow installed; use format=csv")
+    return fmt
+
+
+class HolderBatch(NamedTuple):
+    addresses: bytearray
+    balances: list[int]
+    last_blocks: array
+
+    def __len__(self) -> int:
+        return len(self.last_blocks)
+
+
+def holder_batches(rows: Iterable[list[tuple[str, str, int]]]) -> Iterator[HolderBatch]:
+    for chunk in rows:
+        addresses = bytearray.fromhex("".join([address[2:] for address, _, _ in chunk]))
+        yield HolderBatch(addresses, [int(balance, 16) for _, balance, _ in chunk],
+                          array("q", [block for _, _, block in chunk]))
+
+
+def _csv_chunks(batches: Iterable[HolderBatch]) -> Iterator[bytes]:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        raw = batch.addresses.hex()
+        writer.writerows(("0x" + raw[i * 40:(i + 1) * 40], balance, block)
+                         for i, (balance, block) in enumerate(zip(batch.balances, batch.last_blocks)))
+        yield out.getvalue().encode()
+        out.seek(0)
+        out.truncate()
+    if out.tell():
+        yield out.getvalue().encode()
+
+
+# Write-only stream for pyarrow writers; whatever they wrote is taken out after every batch.
+class _Sink:
+    closed = False
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _arrow_chunks(batches: Iterable[HolderBatch], fmt: str, block: int | None, top: int) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # The schema is written first, so the balance type is picked from the snapshot's largest balance:
+    # decimal256 when every balance fits, otherwise 32-byte big-endian integers.
+    wide = top >= DECIMAL_LIMIT
+    balance_type = pa.binary(32) if wide else pa.decimal256(76, 0)
+    schema = pa.schema([("address", pa.binary(20)), ("balance_wei", balance_type),
+                        ("last_block", pa.int64())],
+                       metadata={"block_number": str(block) if block is not None else ""})
+    sink = _Sink()
+    stream = pa.PythonFile(sink, mode="w")
+    writer = pq.ParquetWriter(stream, schema) if fmt == "parquet" else pa.ipc.new_stream(stream, schema)
+    for batch in batches:
+        n = len(batch)
+        columns = [
+            pa.Array.from_buffers(pa.binary(20), n, [None, pa.py_buffer(batch.addresses)]),
+            (pa.Array.from_buffers(balance_type, n, [None, pa.py_buffer(
+                b"".join([balance.to_bytes(32, "big") for balance in batch.balances]))])
+             if wide else pa.array(batch.balances, type=balance_type)),
+            pa.Array.from_buffers(pa.int64(), n, [None, pa.py_buffer(batch.last_blocks)]),
+        ]
+        writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def export_holders(store: HolderStore, fmt: str, batch_size: int,
+                   block: int | None = None) -> tuple[int | None, Iterator[bytes]]:
+    # One batch_size batch (record batch or row group) at a time, so memory is bounded by the batch.
+    indexed, top, rows = store.snapshot(batch_size)
+    if block is not None and block != indexed:
+        rows.close()
+        raise ValidationError(f"Holder snapshot is only available at the indexed block {indexed}")
+    block = indexed
+    batches = holder_batches(rows)
+    if fmt == "csv":
+        return block, _csv_chunks(batches)
+    return block, _arrow_chunks(batches, fmt, block, top)
@@ -0,0 +1,225 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, Iterator
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+# Sorted multiset of ints: sorted buckets of about load items, plus a Fenwick tree over
+# bucket sizes for O(log n) rank and select.
+class RankedKeys:
+    def __init__(self, load: int = 1000):
+        self.load = load
+        self._buckets: list[list[int]] = []
+        self._maxes: list[int] = []
+        self._tree: list[int] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _rebuild_tree(self) -> None:
+        tree = [len(bucket) for bucket in self._buckets]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, b: int, delta: int) -> None:
+        tree = self._tree
+        while b < len(tree):
+            tree[b] += delta
+            b |= b + 1
+
+    def _prefix(self, b: int) -> int:
+        total = 0
+        tree = self._tree
+        while b > 0:
+            total += tree[b - 1]
+            b &= b - 1
+        return total
+
+    def _locate(self, pos: int) -> tuple[int, int]:
+        tree = self._tree
+        b = 0
+        step = 1 << (len(tree).bit_length())
+        while step:
+            nxt = b + step
+            if nxt <= len(tree) and tree[nxt - 1] <= pos:
+                b = nxt
+                pos -= tree[nxt - 1]
+            step >>= 1
+        return b, pos
+
+    def load_sorted(self, keys: list[int]) -> None:
+        self._buckets = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._len = len(keys)
+        self._rebuild_tree()
+
+    def add(self, key: int) -> None:
+        if not self._buckets:
+            self.load_sorted([key])
+            return
+        b = bisect_left(self._maxes, key)
+        if b == len(self._maxes):
+            b -= 1
+        bucket = self._buckets[b]
+        insort(bucket, key)
+        self._maxes[b] = bucket[-1]
+        self._len += 1
+        if len(bucket) > 2 * self.load:
+            self._buckets[b:b + 1] = [bucket[:self.load], bucket[self.load:]]
+            self._maxes[b:b + 1] = [bucket[self.load - 1], bucket[-1]]
+            self._rebuild_tree()
+        else:
+            self._tree_add(b, 1)
+
+    def remove(self, key: int) -> None:
+        b = bisect_left(self._maxes, key)
+        if b == len(self._maxes):
+            raise KeyError(key)
+        bucket = self._buckets[b]
+        i = bisect_left(bucket, key)
+        if i == len(bucket) or bucket[i] != key:
+            raise KeyError(key)
+        del bucket[i]
+        self._len -= 1
+        if bucket:
+            self._maxes[b] = bucket[-1]
+            self._tree_add(b, -1)
+        else:
+            del self._buckets[b]
+            del self._maxes[b]
+            self._rebuild_tree()
+
+    def bisect_left(self, key: int) -> int:
+        b = bisect_left(self._maxes, key)
+        if b == len(self._maxes):
+            return self._len
+        return self._prefix(b) + bisect_left(self._buckets[b], key)
+
+    def bisect_right(self, key: int) -> int:
+        b = bisect_right(self._maxes, key)
+        if b == len(self._maxes):
+            return self._len
+        return self._prefix(b) + bisect_right(self._buckets[b], key)
+
+    def iter_desc(self, pos: int) -> Iterator[int]:
+        # Yield keys from position ``pos`` (ascending order) down to the smallest.
+        if pos < 0 or pos >= self._len:
+            return
+        b, i = self._locate(pos)
+        while b >= 0:
+            bucket = self._buckets[b]
+            for j in range(i, -1, -1):
+                yield bucket[j]
+            b -= 1
+            if b >= 0:
+                i = len(self._buckets[b]) - 1
+
+
+# Each holder is one sort key balance << 32 | id over interned addresses, so ranking
+# and balance bands are RankedKeys operations.
+class HolderIndex:
+    def __init__(self, load: int = 1000):
+        self._keys = RankedKeys(load)
+        self._packed = bytearray()
+        self._ids: dict[bytes, int] = {}
+        self._balances: list[int] = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _intern(self, address: str) -> int:
+        raw = bytes.fromhex(address[2:])
+        holder_id = self._ids.get(raw)
+        if holder_id is None:
+            holder_id = len(self._balances)
+            if holder_id > _ID_MASK:
+                raise OverflowError("Too many holders for the index")
+            self._ids[raw] = holder_id
+            self._packed += raw
+            self._balances.append(0)
+        return holder_id
+
+    def _address(self, holder_id: int) -> str:
+        return "0x" + self._packed[holder_id * 20:(holder_id + 1) * 20].hex()
+
+    def _decode(self, key: int) -> tuple[str, int]:
+        return self._address(key & _ID_MASK), key >> _ID_BITS
+
+    def load(self, holders: Iterable[tuple[str, int]]) -> None:
+        with self._lock:
+            keys = []
+            for address, balance in holders:
+                holder_id = self._intern(address.lower())
+                self._balances[holder_id] = balance
+                if balance > 0:
+                    keys.append(balance << _ID_BITS | holder_id)
+            keys.sort()
+            self._keys.load_sorted(keys)
+        logger.info("Holder index loaded with %d holders", len(keys))
+
+    def update(self, address: str, balance: int) -> None:
+        with self._lock:
+            holder_id = self._intern(address.lower())
+            old = self._balances[holder_id]
+            if old == balance:
+                return
+            if old > 0:
+                self._keys.remove(old << _ID_BITS | holder_id)
+            if balance > 0:
+                self._keys.add(balance << _ID_BITS | holder_id)
+            self._balances[holder_id] = balance
+
+    def balance(self, address: str) -> int:
+        holder_id = self._ids.get(bytes.fromhex(address[2:]))
+        return 0 if holder_id is None else self._balances[holder_id]
+
+    def top(self, n: int, offset: int = 0) -> list[tuple[str, int]]:
+        with self._lock:
+            out = []
+            for key in self._keys.iter_desc(len(self._keys) - 1 - offset):
+                if len(out) >= n:
+                    break
+                out.append(self._decode(key))
+            return out
+
+    def rank(self, address: str) -> int | None:
+        with self._lock:
+            holder_id = self._ids.get(bytes.fromhex(address[2:]))
+            if holder_id is None or self._balances[holder_id] == 0:
+                return None
+            key = self._balances[holder_id] << _ID_BITS | holder_id
+            return len(self._keys) - self._keys.bisect_left(key)
+
+    def band(self, min_balance: int, max_balance: int, limit: int) -> list[tuple[str, int]]:
+        with self._lock:
+            upper = self._keys.bisect_right(max_balance << _ID_BITS | _ID_MASK) - 1
+            out = []
+            for key in self._keys.iter_desc(upper):
+                if len(out) >= limit or key >> _ID_BITS < min_balance:
+                    break
+                out.append(self._decode(key))
+            return out
+
+    def page(self, cursor: int | None, limit: int) -> tuple[list[tuple[str, int]], int | None]:
+        # The cursor is the sort key of the last returned holder, so pages stay
+        # consistent while balances keep changing underneath.
+        with self._lock:
+            start = len(self._keys) - 1 if cursor is None else self._keys.bisect_left(cursor) - 1
+            keys = []
+            for key in self._keys.iter_desc(start):
+                if len(keys) >= limit:
+                    break
+                keys.append(key)
+            next_cursor = keys[-1] if len(keys) == limit and start - limit >= 0 else None
+            return [self._decode(key) for key in keys], next_cursor
@@ -0,0 +1,265 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Balances are uint256, wider than SQLite's INTEGER, so they are stored as
+# fixed-width hex text: lexicographic order then equals numeric order.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS holders (
+    address TEXT PRIMARY KEY,
+    balance TEXT NOT NULL,
+    last_block INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS holders_balance ON holders (balance DESC);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    name TEXT PRIMARY KEY,
+    block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deltas (
+    block INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    delta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deltas_block ON deltas (block);
+CREATE TABLE IF NOT EXISTS activity (
+    address TEXT PRIMARY KEY,
+    block INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS activity_block ON activity (block);
+CREATE TABLE IF NOT EXISTS block_times (
+    number INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS historical (
+    kind TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (kind, block, key)
+) WITHOUT ROWID;
+"""
+
+
+def encode_balance(value: int) -> str:
+    return f"{value:064x}"
+
+
+def decode_balance(value: str) -> int:
+    return int(value, 16)
+
+
+class HolderStore:
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # An in-memory database is private to its connection, so share one.
+        self._shared = sqlite3.connect(self.path, check_same_thread=False) if self.path == ":memory:" else None
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._shared is not None:
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def checkpoint(self, name: str = "transfers") -> int | None:
+        row = self._conn().execute("SELECT block FROM checkpoints WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def apply(self, deltas: dict[int, dict[str, int]], block_hashes: dict[int, str], checkpoint: int,
+              journal_from: int, activity: dict[str, tuple[int, str]] | None = None,
+              name: str = "transfers", net: dict[str, tuple[int, int]] | None = None) -> set[str]:
+        # Deltas from journal_from on are journaled for reorg rollback; returns the touched addresses.
+        if net is None:
+            net = {}
+            for block in sorted(deltas):
+                for address, delta in deltas[block].items():
+                    total, _ = net.get(address, (0, block))
+                    net[address] = (total + delta, block)
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                self._apply_net(conn, net)
+                conn.executemany(
+                    "INSERT INTO deltas (block, address, delta) VALUES (?, ?, ?)",
+                    [(block, address, str(delta)) for block in deltas if block >= journal_from
+                     for address, delta in deltas[block].items()],
+                )
+                conn.executemany("INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)",
+                                 [(n, h) for n, h in block_hashes.items() if n >= journal_from])
+                if activity:
+                    self._put_activity(conn, activity)
+                conn.execute("DELETE FROM deltas WHERE block < ?", (journal_from,))
+                conn.execute("DELETE FROM blocks WHERE number < ?", (journal_from,))
+                conn.execute("INSERT OR REPLACE INTO checkpoints (name, block) VALUES (?, ?)", (name, checkpoint))
+        return set(net)
+
+    def _apply_net(self, conn: sqlite3.Connection, net: dict[str, tuple[int, int]]) -> None:
+        for address, (delta, block) in net.items():
+            if address == ZERO_ADDRESS:
+                continue
+            row = conn.execute("SELECT balance, last_block FROM holders WHERE address = ?", (address,)).fetchone()
+            balance = (decode_balance(row[0]) if row else 0) + delta
+            last_block = max(block, row[1]) if row else block
+            if balance < 0:
+                logger.warning("Negative balance for %s at block %d, clamping to zero", address, block)
+                balance = 0
+            if balance == 0:
+                conn.execute("DELETE FROM holders WHERE address = ?", (address,))
+            else:
+                conn.execute("INSERT OR REPLACE INTO holders (address, balance, last_block) VALUES (?, ?, ?)",
+                             (address, encode_balance(balance), last_block))
+
+    def recent_blocks(self) -> list[tuple[int, str]]:
+        return self._conn().execute("SELECT number, hash FROM blocks ORDER BY number DESC").fetchall()
+
+    def rollback(self, block: int, name: str = "transfers") -> set[str]:
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                rows = conn.execute("SELECT address, delta, block FROM deltas WHERE block > ?", (block,)).fetchall()
+                net: dict[str, tuple[int, int]] = {}
+                for address, delta, _ in rows:
+                    total, _ = net.get(address, (0, block))
+                    net[address] = (total - int(delta), block)
+                self._apply_net(conn, net)
+                conn.execute("UPDATE holders SET last_block = ? WHERE last_block > ?", (block, block))
+                # The previous activity of these addresses is unknown; the
+                # activity index searches for it again on demand.
+                conn.execute("DELETE FROM activity WHERE block > ?", (block,))
+                conn.execute("DELETE FROM deltas WHERE block > ?", (block,))
+                conn.execute("DELETE FROM blocks WHERE number > ?", (block,))
+                conn.execute("UPDATE checkpoints SET block = ? WHERE name = ?", (block, name))
+        logger.warning("Rolled back %d balance deltas after block %d", len(rows), block)
+        return set(net)
+
+    def top(self, n: int, offset: int = 0) -> list[tuple[str, int]]:
+        rows = self._conn().execute(
+            "SELECT address, balance FROM holders ORDER BY balance DESC LIMIT ? OFFSET ?", (n, offset)
+        ).fetchall()
+        return [(address, decode_balance(balance)) for address, balance in rows]
+
+    def iter_holders(self, batch_size: int = 10000) -> Iterator[tuple[str, int]]:
+        last = ""
+        while True:
+            rows = self._conn().execute(
+                "SELECT address, balance FROM holders WHERE address > ? ORDER BY address LIMIT ?", (last, batch_size)
+            ).fetchall()
+            for address, balance in rows:
+                yield address, decode_balance(balance)
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
+
+    def snapshot(self, batch_size: int = 10000) -> tuple[int | None, int, Iterator[list[tuple[str, str, int]]]]:
+        # One transaction on a private connection, so every batch reflects the returned checkpoint
+        # while the ingestor keeps writing. Also returns the largest balance.
+        conn = self._shared or sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+
+        def batches() -> Iterator:
+            conn.execute("BEGIN")
+            try:
+                row = conn.execute("SELECT block FROM checkpoints WHERE name = 'transfers'").fetchone()
+                top = conn.execute("SELECT max(balance) FROM holders").fetchone()[0]
+                yield (row[0] if row else None), (decode_balance(top) if top else 0)
+                cursor = conn.execute("SELECT address, balance, last_block FROM holders ORDER BY address")
+                while rows := cursor.fetchmany(batch_size):
+                    yield rows
+            finally:
+                conn.rollback()
+                if conn is not self._shared:
+                    conn.close()
+
+        # Started here, so closing the iterator early also ends the transaction.
+        rows = batches()
+        checkpoint, top = next(rows)
+        return checkpoint, top, rows
+
+    def balance(self, address: str) -> int:
+        row = self._conn().execute("SELECT balance FROM holders WHERE address = ?", (address,)).fetchone()
+        return decode_balance(row[0]) if row else 0
+
+    def _put_activity(self, conn: sqlite3.Connection, activity: dict[str, tuple[int, str]]) -> None:
+        conn.executemany(
+            "INSERT INTO activity (address, block, tx_hash) VALUES (?, ?, ?) "
+            "ON CONFLICT(address) DO UPDATE SET block = excluded.block, tx_hash = excluded.tx_hash "
+            "WHERE excluded.block >= activity.block",
+            [(address, block, tx_hash) for address, (block, tx_hash) in activity.items() if address != ZERO_ADDRESS],
+        )
+
+    def put_activity(self, activity: dict[str, tuple[int, str]]) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                self._put_activity(conn, activity)
+
+    def activity(self, addresses: list[str]) -> dict[str, tuple[int, str]]:
+        out: dict[str, tuple[int, str]] = {}
+        conn = self._conn()
+        for start in range(0, len(addresses), 500):
+            chunk = addresses[start:start + 500]
+            rows = conn.execute(
+                f"SELECT address, block, tx_hash FROM activity WHERE address IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            out.update({address: (block, tx_hash) for address, block, tx_hash in rows})
+        return out
+
+    def block_times(self, numbers: list[int]) -> dict[int, int]:
+        out: dict[int, int] = {}
+        conn = self._conn()
+        for start in range(0, len(numbers), 500):
+            chunk = numbers[start:start + 500]
+            rows = conn.execute(
+                f"SELECT number, timestamp FROM block_times WHERE number IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            out.update(rows)
+        return out
+
+    def put_block_times(self, times: dict[int, int]) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO block_times (number, timestamp) VALUES (?, ?)", times.items())
+
+    def historical(self, kind: str, block: int, keys: list[str]) -> dict[str, str]:
+        # Results read at finalized blocks; they never change, so nothing here is ever invalidated.
+        out: dict[str, str] = {}
+        conn = self._conn()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, value FROM historical WHERE kind = ? AND block = ? AND key IN ({','.join('?' * len(chunk))})",
+                [kind, block, *chunk],
+            ).fetchall()
+            out.update(rows)
+        return out
+
+    def put_historical(self, kind: str, block: int, values: dict[str, str]) -> None:
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO historical (kind, block, key, value) VALUES (?, ?, ?, ?)",
+                                 [(kind, block, key, value) for key, value in values.items()])
+
+    def holder_count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM holders").fetchone()[0]
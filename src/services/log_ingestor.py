@@ -0,0 +1,200 @@
+import threading
+import time
+from typing import Iterator
+
+from eth_utils import keccak
+
+from src.api.errors import ServiceError
+from src.services.holder_store import HolderStore
+from src.services.polygon_client import PolygonClient
+from src.services.transfer_decoder import decode_transfers
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+
+# Substrings providers use when an eth_getLogs range or result set is too big.
+_RANGE_ERROR_HINTS = ("range", "too many", "too large", "too wide", "more than", "response size", "exceed")
+
+
+class RangeTooLarge(ServiceError):
+    safe_message = "Log range too large"
+
+
+def decode_transfer(log: dict) -> tuple[int, str, str, int]:
+    topics = log["topics"]
+    data = log["data"]
+    return (
+        int(log["blockNumber"], 16),
+        "0x" + topics[1][-40:].lower(),
+        "0x" + topics[2][-40:].lower(),
+        int(data, 16) if data not in ("0x", "") else 0,
+    )
+
+
+def address_topic(address: str) -> str:
+    return "0x" + "0" * 24 + address[2:].lower()
+
+
+def get_transfer_logs(client: PolygonClient, from_block: int, to_block: int,
+                      sender: str | None = None, recipient: str | None = None) -> list[dict]:
+    topics: list = [TRANSFER_TOPIC, address_topic(sender) if sender else None]
+    if recipient:
+        topics.append(address_topic(recipient))
+    resp = client.transport.request("eth_getLogs", [{
+        "address": client.contract_address,
+        "topics": topics if sender or recipient else [TRANSFER_TOPIC],
+        "fromBlock": hex(from_block),
+        "toBlock": hex(to_block),
+    }])
+    error = resp.get("error")
+    if error:
+        message = str(error.get("message", "")).lower()
+        too_large = "rate limit" not in message and any(hint in message for hint in _RANGE_ERROR_HINTS)
+        if too_large and to_block > from_block:
+            raise RangeTooLarge()
+        raise ServiceError("eth_getLogs failed")
+    return resp.get("result") or []
+
+
+class TransferIngestor:
+    def __init__(self, client: PolygonClient, store: HolderStore, start_block: int = 0, chunk_size: int = 2000,
+                 max_chunk_size: int = 10000, reorg_window: int = 128, poll_interval: float = 2.0):
+        self.client = client
+        self.store = store
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max(chunk_size, max_chunk_size)
+        self.reorg_window = reorg_window
+        self.poll_interval = poll_interval
+        self.listeners: list = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_at = time.monotonic()
+        self._blocks_ingested = 0
+        self._logs_ingested = 0
+        self._reorgs = 0
+        self._head: int | None = None
+
+    def subscribe(self, listener) -> None:
+        # listener(from_block, to_block, touched_addresses) runs after each applied range.
+        self.listeners.append(listener)
+
+    def _get_logs(self, from_block: int, to_block: int) -> list[dict]:
+        return get_transfer_logs(self.client, from_block, to_block)
+
+    def fetch_ranges(self, from_block: int, to_block: int) -> Iterator[tuple[int, int, list[dict]]]:
+        # Halve the range whenever the provider rejects it and grow it back
+        # additively on success, so the chunk size tracks what the provider allows.
+        start = from_block
+        while start <= to_block:
+            end = min(to_block, start + self.chunk_size - 1)
+            try:
+                logs = self._get_logs(start, end)
+            except RangeTooLarge:
+                self.chunk_size = max(1, (end - start + 1) // 2)
+                logger.info("eth_getLogs range too large, shrinking to %d blocks", self.chunk_size)
+                continue
+            yield start, end, logs
+            start = end + 1
+            self.chunk_size = min(self.max_chunk_size, self.chunk_size + max(1, self.chunk_size // 4))
+
+    def _block_hashes(self, numbers: list[int]) -> dict[int, str | None]:
+        batch = self.client.new_batch()
+        for number in numbers:
+            batch.add("eth_getBlockByNumber", [hex(number), False])
+        return {
+            number: (result.result or {}).get("hash") if result.ok else None
+            for number, result in zip(numbers, batch.flush())
+        }
+
+    def ingest(self, to_block: int) -> int:
+        checkpoint = self.store.checkpoint()
+        start = self.start_block if checkpoint is None else checkpoint + 1
+        journal_from = to_block - self.reorg_window
+        for from_block, end, logs in self.fetch_ranges(start, to_block):
+            batch = decode_transfers(logs)
+            net, activity = batch.net_deltas()
+            hashes = batch.last_block_hashes()
+            if end >= journal_from:
+                end_hash = self._block_hashes([end])[end]
+                if end_hash:
+                    hashes[end] = end_hash
+            touched = self.store.apply(batch.block_deltas(journal_from), hashes, end, journal_from,
+                                       activity=activity, net=net)
+            self._blocks_ingested += end - from_block + 1
+            self._logs_ingested += len(logs)
+            for listener in self.listeners:
+                listener(from_block, end, touched)
+        return self.store.checkpoint() or start - 1
+
+    def check_reorg(self) -> int | None:
+        recent = self.store.recent_blocks()
+        if not recent:
+            return None
+        chain_hashes = self._block_hashes([number for number, _ in recent])
+        if chain_hashes[recent[0][0]] in (recent[0][1], None):
+            return None
+        fork = recent[-1][0] - 1
+        for number, stored_hash in recent:
+            if chain_hashes.get(number) == stored_hash:
+                fork = number
+                break
+        checkpoint = self.store.checkpoint()
+        touched = self.store.rollback(fork)
+        for listener in self.listeners:
+            listener(fork + 1, checkpoint, touched)
+        self._reorgs += 1
+        logger.warning("Reorg detected, rolled back to block %d", fork)
+        return fork
+
+    def backfill(self, to_block: int | None = None) -> int:
+        target = self.client.head.current() if to_block is None else to_block
+        self._head = target
+        return self.ingest(target)
+
+    def step(self) -> int:
+        self._head = self.client.head.current()
+        self.check_reorg()
+        return self.ingest(self._head)
+
+    def follow(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.step()
+                stats = self.stats()
+                logger.info("Ingested up to block %s, lag %s blocks, %.1f logs/s",
+                            stats["checkpoint"], stats["lag_blocks"], stats["logs_per_sec"])
+            except Exception:
+                logger.exception("Transfer ingestion step failed")
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.follow, name="transfer-ingestor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+
+    def stats(self) -> dict[str, object]:
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        checkpoint = self.store.checkpoint()
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "checkpoint": checkpoint,
+            "head": self._head,
+            "lag_blocks": (self._head - checkpoint) if self._head is not None and checkpoint is not None else None,
+            "blocks_ingested": self._blocks_ingested,
+            "logs_ingested": self._logs_ingested,
+            "blocks_per_sec": round(self._blocks_ingested / elapsed, 2),
+            "logs_per_sec": round(self._logs_ingested / elapsed, 2),
+            "chunk_size": self.chunk_size,
+            "reorgs": self._reorgs,
+            "holders": self.store.holder_count(),
+        }
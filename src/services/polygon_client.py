@@ -1,79 +1,341 @@
+import threading
+import time
 from typing import Any
-from web3 import Web3, HTTPProvider
+
+import requests
+from web3 import Web3
 from web3.exceptions import ContractLogicError
 from src.utils.logger import setup_logger
 from src.utils.validators import to_checksum
-from config import AppConfig
-from src.api.errors import BlockchainError, ServiceError
+from config import get_config
+from src.api.errors import BlockchainError, ServiceError, TooManyRequestsError
+from src.services.abi_fast import FastAbi, decode_aggregate3, encode_aggregate3
+from src.services.cache import BalanceCache, HeadTracker, SwrValue
+from src.services.endpoint_pool import EndpointPool
+from src.services.rpc_scheduler import RpcScheduler
+from src.services.rpc_transport import PooledHTTPProvider, RpcBatch, RpcResult, RpcTransport, build_session
+from src.services.shared_cache import SharedBalanceCache, SharedCache, SharedHeadTracker
+from src.services.singleflight import SingleFlight
+from src.utils.metrics import CONTRACT_CALL_DURATION, ERRORS, outcome
 
 logger = setup_logger(__name__)
-_cfg = AppConfig()
+
+# Rough upper bound of gas spent by one balanceOf sub-call inside aggregate3
+# (cold storage read plus the multicall loop overhead).
+BALANCE_OF_CALL_GAS = 30_000
+METADATA_FIELDS = ("symbol", "name", "decimals")
 
 
 class PolygonClient:
-    def __init__(self, rpc_urls: list[str] | None = None, contract_address: str | None = None, abi: list | None = None):
-        self.rpc_urls = rpc_urls or _cfg.rpc.urls
-        self.contract_address = Web3.to_checksum_address(contract_address or _cfg.contract.address)
-        self.abi = abi or _cfg.contract.abi
-        self.w3 = None
+    def __init__(self, rpc_urls: list[str] | None = None, contract_address: str | None = None, abi: list | None = None,
+                 multicall_address: str | None = None, session: requests.Session | None = None,
+                 transport: EndpointPool | None = None, head: HeadTracker | None = None,
+                 shared: SharedCache | None = None, multicall_deploy_block: int | None = None):
+        cfg = get_config()
+        self.rpc_urls = rpc_urls or cfg.rpc.urls
+        self.contract_address = Web3.to_checksum_address(contract_address or cfg.contract.address)
+        self.abi = abi or cfg.contract.abi
+        self.multicall_address = Web3.to_checksum_address(multicall_address or cfg.multicall.address)
+        self.multicall_chunk_size = max(1, min(cfg.multicall.max_calls, cfg.multicall.gas_budget // BALANCE_OF_CALL_GAS))
+        self.multicall_deploy_block = cfg.multicall.deploy_block if multicall_deploy_block is None else multicall_deploy_block
+        self.session = session or build_session(cfg.web3_pool_maxsize)
 
-        for url in self.rpc_urls:
-            try:
-                provider = HTTPProvider(url.strip(), request_kwargs={"timeout": _cfg.web3_request_timeout})
-                w3 = Web3(provider)
-                if w3.is_connected():
-                    self.w3 = w3
-                    self.rpc_url = url.strip()
-                    break
-            except Exception:
-                continue
-        if not self.w3:
-            raise BlockchainError(f"Unable to connect to any RPC: {self.rpc_urls}")
+        # Clients for other tokens (see for_token) share the pool, and so its health stats and budgets.
+        self.transport = transport or EndpointPool(
+            [RpcTransport(url.strip(), self.session, timeout=cfg.web3_request_timeout, batch_max_size=cfg.rpc_batch_max_size)
+             for url in self.rpc_urls if url.strip()],
+            breaker_threshold=cfg.rpc_breaker_threshold,
+            breaker_max_backoff=cfg.rpc_breaker_max_backoff,
+            hedge=cfg.rpc_hedge_enabled,
+            hedge_min_delay=cfg.rpc_hedge_min_delay,
+            workers=cfg.rpc_pool_workers,
+            rate=cfg.rpc_endpoint_rate,
+            burst=cfg.rpc_endpoint_burst,
+            scheduler=RpcScheduler(max_queue=cfg.rpc_queue_max_depth, max_wait=cfg.rpc_queue_max_wait),
+        )
+        # No network I/O here: the pool is probed by warm_up(), so the server can bind right away.
+        self.w3 = Web3(PooledHTTPProvider(self.transport))
+        self.ready = False
+        self.rpc_url = self.transport.url
 
         self._contract = self.w3.eth.contract(address=self.contract_address, abi=self.abi)
-        logger.info("Connected to RPC: %s", self.rpc_url)
+        self.fast_abi = FastAbi(self.abi)
+        self._output_types = {
+            item["name"]: [out["type"] for out in item.get("outputs", [])]
+            for item in self.abi if item.get("type") == "function"
+        }
+        self._metadata: dict[str, Any] | None = None
+        self._metadata_lock = threading.RLock()
+        self._total_supply = SwrValue(lambda: self._call("totalSupply"),
+                                      ttl=cfg.total_supply_ttl, stale_ttl=cfg.total_supply_stale_ttl)
+        # With a shared cache (prefork workers) the head, metadata and balances are shared between processes.
+        self.shared = shared
+        if head is None:
+            fetch_head = lambda: int(self.transport.call("eth_blockNumber"), 16)
+            head = (HeadTracker(fetch_head, interval=cfg.head_poll_interval) if shared is None
+                    else SharedHeadTracker(fetch_head, cfg.head_poll_interval, shared))
+        self.head = head
+        self.balance_cache = self._new_balance_cache(cfg.balance_cache_size)
+        self.flight = SingleFlight()
+        if transport is None:
+            logger.info("Configured RPC pool of %d endpoints", len(self.transport.endpoints))
+
+    def for_token(self, contract_address: str, balance_cache_size: int | None = None) -> "PolygonClient":
+        # Same pool, session and head; own contract, metadata, caches and in-flight table.
+        client = PolygonClient(rpc_urls=self.rpc_urls, contract_address=contract_address, abi=self.abi,
+                               multicall_address=self.multicall_address, session=self.session,
+                               transport=self.transport, head=self.head, shared=self.shared,
+                               multicall_deploy_block=self.multicall_deploy_block)
+        if balance_cache_size is not None:
+            client.balance_cache = client._new_balance_cache(balance_cache_size)
+        return client
+
+    def _new_balance_cache(self, maxsize: int) -> BalanceCache:
+        if self.shared is None:
+            return BalanceCache(maxsize)
+        return SharedBalanceCache(maxsize, self.shared, self.contract_address)
 
     def is_connected(self) -> bool:
-        return bool(self.w3 and self.w3.is_connected())
+        try:
+            return bool(self.w3 and self.w3.is_connected())
+        except Exception:
+            return False
+
+    def warm_up(self) -> None:
+        # Probe the pool and load what every request needs; safe to call again after a failure.
+        if not self.is_connected():
+            raise BlockchainError(f"Unable to connect to any RPC: {self.rpc_urls}")
+        self.token_metadata()
+        self.head.current()
+        if not self.ready:
+            logger.info("RPC pool is warm, head at block %d", self.head.current())
+        self.ready = True
 
-    def _call(self, fn_name: str, *args) -> Any:
+    def new_batch(self) -> RpcBatch:
+        return RpcBatch(self.transport)
+
+    def _call(self, fn_name: str, *args, block_identifier: int | str = "latest") -> Any:
         if not self._contract:
             raise ServiceError("Contract not initialized")
+        # Keyed like the batch path so single and batch lookups share in-flight calls.
+        key = (fn_name, *args, block_identifier)
+        return self.flight.do(key, lambda: self._call_upstream(fn_name, *args, block_identifier=block_identifier))
+
+    def _call_upstream(self, fn_name: str, *args, block_identifier: int | str = "latest") -> Any:
+        start = time.perf_counter()
+        error: Exception | None = None
+        try:
+            return self._call_contract(fn_name, *args, block_identifier=block_identifier)
+        except Exception as exc:
+            error = exc
+            ERRORS.labels("contract", outcome(exc)).inc()
+            raise
+        finally:
+            CONTRACT_CALL_DURATION.labels(fn_name, outcome(error)).observe(time.perf_counter() - start)
+
+    def _call_contract(self, fn_name: str, *args, block_identifier: int | str = "latest") -> Any:
+        if self.fast_abi.supports(fn_name):
+            block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+            resp = self.transport.request("eth_call", [{"to": self.contract_address, "data": self.encode_call(fn_name, *args)}, block])
+            return self.decode_call(fn_name, RpcResult(result=resp.get("result"), error=resp.get("error")))
         try:
             func = getattr(self._contract.functions, fn_name)(*args)
-            return func.call()
+            return func.call(block_identifier=block_identifier)
         except ContractLogicError as exc:
             raise BlockchainError("Smart contract error") from exc
         except Exception as exc:
             raise ServiceError("RPC call failed") from exc
 
+    def encode_call(self, fn_name: str, *args) -> str:
+        if self.fast_abi.supports(fn_name):
+            return self.fast_abi.encode(fn_name, *args)
+        return self._contract.encode_abi(fn_name, args=list(args))
+
+    def decode_call(self, fn_name: str, result: RpcResult) -> Any:
+        if result.reverted:
+            raise BlockchainError("Smart contract error")
+        if not result.ok:
+            raise ServiceError("RPC call failed")
+        try:
+            if self.fast_abi.supports(fn_name):
+                return self.fast_abi.decode(fn_name, result.result)
+            values = self.w3.codec.decode(self._output_types[fn_name], bytes.fromhex(result.result[2:]))
+        except Exception as exc:
+            raise ServiceError("Unable to decode RPC result") from exc
+        return values[0] if len(values) == 1 else values
+
+    def metadata_calls(self) -> list[tuple[str, str]]:
+        # (to, calldata) of the symbol, name and decimals reads, for callers batching several tokens.
+        return [(self.contract_address, self.encode_call(field)) for field in METADATA_FIELDS]
+
+    def set_metadata(self, results: list[RpcResult]) -> dict[str, Any]:
+        # Decodes the answers to metadata_calls(); metadata loaded meanwhile wins.
+        metadata = dict(zip(METADATA_FIELDS, [self.decode_call(field, result)
+                                              for field, result in zip(METADATA_FIELDS, results)]))
+        with self._metadata_lock:
+            if self._metadata is None:
+                if self.shared is not None:
+                    self.shared.put_json(f"metadata:{self.contract_address}", metadata)
+                self._metadata = metadata
+            return self._metadata
+
+    def token_metadata(self) -> dict[str, Any]:
+        # symbol, name and decimals are immutable for a deployed ERC20, so they are loaded once.
+        if self._metadata is None:
+            with self._metadata_lock:
+                if self._metadata is None:
+                    metadata = self.shared.get_json(f"metadata:{self.contract_address}") if self.shared is not None else None
+                    if metadata is not None:
+                        self._metadata = metadata
+                    else:
+                        batch = self.new_batch()
+                        for to, data in self.metadata_calls():
+                            batch.eth_call(to, data)
+                        self.set_metadata(batch.flush())
+        return self._metadata
+
     def decimals(self) -> int:
-        return self._call("decimals")
+        return self.token_metadata()["decimals"]
+
+    def total_supply(self) -> int:
+        return self._total_supply.get()
+
+    def invalidate_total_supply(self) -> None:
+        self._total_supply.invalidate()
 
-    def balance_of(self, address: str) -> dict[str, object]:
+    def balance_of(self, address: str, block: int | None = None) -> dict[str, object]:
         try:
             checksum = to_checksum(address)
         except Exception:
             return {"address": address, "error": "Invalid address", "success": False}
 
         try:
-            balance_wei = self._call("balanceOf", checksum)
+            block = self.head.current() if block is None else block
+            balance_wei = self.balance_cache.get(checksum, block)
+            if balance_wei is None:
+                balance_wei = self._call("balanceOf", checksum, block_identifier=block)
+                self.balance_cache.put(checksum, block, balance_wei)
             decimals = self.decimals()
-            balance_formatted = balance_wei / (10 ** decimals)
-            return {"address": address, "balance_wei": str(balance_wei), "balance_formatted": balance_formatted, "success": True}
+            return self.balance_result(address, balance_wei, decimals, block)
         except (BlockchainError, ServiceError):
             return {"address": address, "error": "RPC or contract error", "success": False}
+        except TooManyRequestsError:
+            raise
         except Exception:
             return {"address": address, "error": "Internal error", "success": False}
 
-    def token_info(self) -> dict[str, object]:
+    def balance_of_batch(self, addresses: list[str], block: int | None = None) -> list[dict[str, object]]:
+        results: list[dict[str, object] | None] = [None] * len(addresses)
+        checksums: list[tuple[int, str]] = []
+        for i, address in enumerate(addresses):
+            try:
+                checksums.append((i, to_checksum(address)))
+            except Exception:
+                results[i] = {"address": address, "error": "Invalid address", "success": False}
+        if not checksums:
+            return results
+
         try:
-            symbol = self._call("symbol")
-            name = self._call("name")
-            total_supply = self._call("totalSupply")
             decimals = self.decimals()
+            block = self.head.current() if block is None else block
+        except (BlockchainError, ServiceError):
+            for i, _ in checksums:
+                results[i] = {"address": addresses[i], "error": "RPC or contract error", "success": False}
+            return results
+
+        pending: list[tuple[int, str]] = []
+        for i, checksum in checksums:
+            cached = self.balance_cache.get(checksum, block)
+            if cached is None:
+                pending.append((i, checksum))
+            else:
+                results[i] = self.balance_result(addresses[i], cached, decimals, block)
+
+        outcomes = self.flight.do_many(
+            [("balanceOf", checksum, block) for _, checksum in pending],
+            lambda keys: self._fetch_balances([key[1] for key in keys], block),
+        )
+        for (i, _), outcome in zip(pending, outcomes):
+            if isinstance(outcome, TooManyRequestsError):
+                raise outcome
+            if isinstance(outcome, ServiceError):
+                results[i] = {"address": addresses[i], "error": outcome.safe_message, "success": False}
+            elif isinstance(outcome, BaseException):
+                results[i] = {"address": addresses[i], "error": "Internal error", "success": False}
+            else:
+                results[i] = self.balance_result(addresses[i], outcome, decimals, block)
+        return results
+
+    def _fetch_balances(self, checksums: list[str], block: int) -> list[int | Exception]:
+        # Every aggregate3 chunk travels in a single JSON-RPC batch.
+        batch = self.new_batch()
+        out: list[int | Exception] = []
+        if block < self.multicall_deploy_block:
+            # aggregate3 cannot run before Multicall3 exists, so each balanceOf is its own eth_call.
+            for checksum in checksums:
+                batch.eth_call(self.contract_address, self.encode_call("balanceOf", checksum), block=hex(block))
+            with CONTRACT_CALL_DURATION.labels("balanceOf", "ok").time():
+                results = batch.flush()
+            for result in results:
+                try:
+                    out.append(self.decode_call("balanceOf", result))
+                except (BlockchainError, ServiceError) as exc:
+                    out.append(exc)
+        else:
+            calls = self.balance_multicalls(checksums)
+            for _, data in calls:
+                batch.eth_call(self.multicall_address, data, block=hex(block))
+            with CONTRACT_CALL_DURATION.labels("aggregate3.balanceOf", "ok").time():
+                chunk_results = batch.flush()
+            for (chunk, _), chunk_result in zip(calls, chunk_results):
+                out.extend(self.decode_balances(chunk, chunk_result))
+        self.balance_cache.put_many(block, [(c, v) for c, v in zip(checksums, out) if not isinstance(v, Exception)])
+        return out
+
+    def balance_multicalls(self, checksums: list[str]) -> list[tuple[list[str], str]]:
+        # (addresses, aggregate3 calldata) per chunk of balanceOf calls; each is one eth_call to the multicall.
+        chunks = [checksums[start:start + self.multicall_chunk_size]
+                  for start in range(0, len(checksums), self.multicall_chunk_size)]
+        return [(chunk, encode_aggregate3([(self.contract_address, True, self.encode_call("balanceOf", c))
+                                           for c in chunk]))
+                for chunk in chunks]
+
+    def decode_balances(self, chunk: list[str], result: RpcResult) -> list[int | Exception]:
+        try:
+            returned = self.decode_aggregate(result)
+        except (BlockchainError, ServiceError):
+            return [ServiceError("RPC or contract error") for _ in chunk]
+        return [int.from_bytes(data[:32], "big") if ok and len(data) >= 32 else BlockchainError("Contract call failed")
+                for _, (ok, data) in zip(chunk, returned)]
+
+    def cached_metadata(self) -> dict[str, Any] | None:
+        # Token metadata if already loaded, without any RPC.
+        return self._metadata
+
+    def decode_aggregate(self, result: RpcResult) -> list[tuple[bool, bytes]]:
+        if result.reverted:
+            raise BlockchainError("Multicall error")
+        if not result.ok:
+            raise ServiceError("RPC call failed")
+        try:
+            return decode_aggregate3(result.result)
+        except Exception as exc:
+            raise ServiceError("Unable to decode multicall result") from exc
+
+    @staticmethod
+    def balance_result(address: str, balance_wei: int, decimals: int, block: int) -> dict[str, object]:
+        balance_formatted = balance_wei / (10 ** decimals)
+        return {"address": address, "balance_wei": str(balance_wei), "balance_formatted": balance_formatted,
+                "block_number": block, "success": True}
+
+    def token_info(self, block: int | None = None, total_supply: int | None = None) -> dict[str, object]:
+        try:
+            metadata = self.token_metadata()
+            symbol, name, decimals = metadata["symbol"], metadata["name"], metadata["decimals"]
+            if total_supply is None:
+                total_supply = self.total_supply() if block is None else self._call("totalSupply", block_identifier=block)
             total_fmt = total_supply / (10 ** decimals)
-            return {
+            info = {
                 "symbol": symbol,
                 "name": name,
                 "totalSupply": str(total_supply),
@@ -82,7 +344,12 @@ class PolygonClient:
                 "address": self.contract_address,
                 "success": True
             }
+            if block is not None:
+                info["block_number"] = block
+            return info
         except (BlockchainError, ServiceError):
             return {"error": "RPC or contract error", "success": False}
+        except TooManyRequestsError:
+            raise
         except Exception:
             return {"error": "Internal error", "success": False}
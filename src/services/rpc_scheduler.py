@@ -0,0 +1,113 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from src.api.errors import TooManyRequestsError
+
+INTERACTIVE = 0
+BULK = 1
+BACKGROUND = 2
+
+# Work without an explicit priority (ingestion, warm-up, refreshes) queues last.
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("rpc_priority", default=BACKGROUND)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def set_priority(priority: int) -> None:
+    _priority.set(priority)
+
+
+@contextmanager
+def rpc_priority(priority: int) -> Iterator[None]:
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+# take returns 0 when admitted, else seconds to wait; a cost above the burst is admitted
+# once the bucket is full and leaves it in debt, so oversized batches are slowed, not starved.
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self.clock = clock
+        self.tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def take(self, cost: float = 1.0) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            needed = min(cost, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= cost
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+
+class RpcOverloaded(TooManyRequestsError):
+    safe_message = "Upstream RPC budget exhausted, retry later"
+
+
+# Waiters queue by priority, FIFO within one, and only the head polls the budget; past max_queue
+# waiters or max_wait seconds callers get RpcOverloaded with a Retry-After.
+class RpcScheduler:
+    def __init__(self, max_queue: int = 500, max_wait: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def admit(self, try_take: Callable[[], float]) -> None:
+        # ``try_take`` returns 0 when it reserved budget, else seconds until it may succeed.
+        with self._cond:
+            wait = try_take() if not self._waiting else None
+            if wait == 0:
+                self.admitted += 1
+                return
+            if len(self._waiting) >= self.max_queue:
+                self.rejected += 1
+                raise RpcOverloaded(retry_after=max(1.0, wait or 1.0))
+            ticket = (current_priority(), next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            self.queued += 1
+            deadline = self.clock() + self.max_wait
+            try:
+                while True:
+                    if self._waiting[0] == ticket:
+                        wait = try_take()
+                        if wait == 0:
+                            self.admitted += 1
+                            return
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise RpcOverloaded(retry_after=max(1.0, wait or 1.0))
+                    self._cond.wait(min(remaining, wait) if wait else remaining)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {"queue_depth": len(self._waiting), "admitted": self.admitted,
+                    "queued": self.queued, "rejected": self.rejected}
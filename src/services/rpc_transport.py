@@ -0,0 +1,148 @@
+import itertools
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3.providers.base import JSONBaseProvider
+
+from src.api.errors import ServiceError
+
+if TYPE_CHECKING:
+    from src.services.endpoint_pool import EndpointPool
+
+
+class RateLimitedError(ServiceError):
+    safe_message = "RPC endpoint rate limited"
+
+    def __init__(self, message: str | None = None, retry_after: float | None = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_rate_limit_error(error: dict | None) -> bool:
+    if not error:
+        return False
+    message = str(error.get("message", "")).lower()
+    return error.get("code") == 429 or "rate limit" in message or "too many requests" in message
+
+
+def build_session(pool_maxsize: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json", "Connection": "keep-alive"})
+    return session
+
+
+@dataclass
+class RpcResult:
+    result: Any = None
+    error: dict | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def reverted(self) -> bool:
+        return bool(self.error) and "revert" in str(self.error.get("message", "")).lower()
+
+
+class RpcTransport:
+    def __init__(self, url: str, session: requests.Session, timeout: float, batch_max_size: int = 100):
+        self.url = url
+        self.session = session
+        self.timeout = timeout
+        self.batch_max_size = max(1, batch_max_size)
+        self._ids = itertools.count(1)
+
+    def _post(self, payload: Any) -> Any:
+        try:
+            resp = self.session.post(self.url, data=json.dumps(payload), timeout=self.timeout)
+            if resp.status_code == 429:
+                retry_after = resp.headers.get("Retry-After")
+                raise RateLimitedError(retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+            resp.raise_for_status()
+            return resp.json()
+        except (requests.RequestException, ValueError) as exc:
+            raise ServiceError("RPC transport error") from exc
+
+    def request(self, method: str, params: list | None = None) -> dict:
+        return self._post({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []})
+
+    def call(self, method: str, params: list | None = None) -> Any:
+        resp = self.request(method, params)
+        if "error" in resp:
+            raise ServiceError(f"RPC error from {method}")
+        return resp.get("result")
+
+    def batch(self, calls: list[tuple[str, list]]) -> list[RpcResult]:
+        out: list[RpcResult] = []
+        for start in range(0, len(calls), self.batch_max_size):
+            chunk = calls[start:start + self.batch_max_size]
+            try:
+                out.extend(self.send_batch(chunk))
+            except ServiceError as exc:
+                out.extend(RpcResult(error={"code": -32603, "message": str(exc)}) for _ in chunk)
+        return out
+
+    def send_batch(self, calls: list[tuple[str, list]]) -> list[RpcResult]:
+        ids = [next(self._ids) for _ in calls]
+        payload = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, (m, p) in zip(ids, calls)]
+        resp = self._post(payload)
+        # Providers that do not support batching answer with a single error object.
+        if not isinstance(resp, list):
+            error = resp.get("error") if isinstance(resp, dict) else None
+            return [RpcResult(error=error or {"code": -32603, "message": "Invalid batch response"}) for _ in calls]
+        by_id = {item.get("id"): item for item in resp if isinstance(item, dict)}
+        results = []
+        for i in ids:
+            item = by_id.get(i)
+            if item is None:
+                results.append(RpcResult(error={"code": -32603, "message": "Missing batch response"}))
+            elif "error" in item:
+                results.append(RpcResult(error=item["error"]))
+            else:
+                results.append(RpcResult(result=item.get("result")))
+        return results
+
+
+class RpcBatch:
+    def __init__(self, transport: "RpcTransport | EndpointPool"):
+        self.transport = transport
+        self._calls: list[tuple[str, list]] = []
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def add(self, method: str, params: list | None = None) -> int:
+        self._calls.append((method, params or []))
+        return len(self._calls) - 1
+
+    def eth_call(self, to: str, data: str, block: str = "latest") -> int:
+        return self.add("eth_call", [{"to": to, "data": data}, block])
+
+    def flush(self) -> list[RpcResult]:
+        calls, self._calls = self._calls, []
+        if not calls:
+            return []
+        return self.transport.batch(calls)
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    def __init__(self, transport: "RpcTransport | EndpointPool", **kwargs: Any):
+        super().__init__(**kwargs)
+        self.transport = transport
+        self.endpoint_uri = transport.url
+
+    def make_request(self, method, params):
+        return self.transport.request(method, params)
+
+    def make_batch_request(self, requests_):
+        return [
+            {"jsonrpc": "2.0", "id": i, **({"error": r.error} if r.error else {"result": r.result})}
+            for i, r in enumerate(self.transport.batch(list(requests_)))
+        ]
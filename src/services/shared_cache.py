@@ -0,0 +1,192 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from src.services.cache import BalanceCache, HeadTracker
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Balances are stored as text: uint256 does not fit SQLite's INTEGER.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS balances (
+    token TEXT NOT NULL,
+    address TEXT NOT NULL,
+    block INTEGER NOT NULL,
+    balance TEXT NOT NULL,
+    PRIMARY KEY (token, address)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS balances_block ON balances (block);
+"""
+
+# How often (in written balances) the balances table is trimmed back to ``max_balances``.
+_PRUNE_EVERY = 1000
+
+# While another worker holds the head lease, the local head is re-checked this soon.
+_LEASE_RETRY = 0.1
+
+
+# SQLite (WAL) cache shared by the prefork workers; connections are opened lazily per process
+# and thread, so an instance built before fork is safe in the children.
+class SharedCache:
+    def __init__(self, path: str | Path, max_balances: int = 100000, clock: Callable[[], float] = time.time):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_balances = max_balances
+        self.clock = clock
+        self._local = threading.local()
+        self._written = 0
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        if getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    def get_json(self, key: str) -> Any:
+        row = self._conn().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_json_prefixed(self, prefix: str) -> dict[str, Any]:
+        rows = self._conn().execute("SELECT key, value FROM kv WHERE substr(key, 1, ?) = ?",
+                                    (len(prefix), prefix)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def put_json(self, key: str, value: Any) -> None:
+        self._conn().execute("INSERT OR REPLACE INTO kv (key, value, updated_at) VALUES (?, ?, ?)",
+                             (key, json.dumps(value), self.clock()))
+
+    def head(self) -> tuple[int, float] | None:
+        # The shared head and how many seconds ago it was fetched.
+        row = self._conn().execute("SELECT value, updated_at FROM kv WHERE key = 'head'").fetchone()
+        return (int(row[0]), max(0.0, self.clock() - row[1])) if row else None
+
+    def put_head(self, block: int) -> None:
+        # Never moves the shared head backwards, e.g. when a lagging endpoint answered.
+        self._conn().execute(
+            "INSERT INTO kv (key, value, updated_at) VALUES ('head', ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at "
+            "WHERE CAST(excluded.value AS INTEGER) >= CAST(kv.value AS INTEGER)",
+            (str(block), self.clock()))
+
+    def claim(self, name: str, ttl: float) -> bool:
+        # A lease: True for exactly one process until it expires or the holder claims it again.
+        now, pid = self.clock(), os.getpid()
+        cur = self._conn().execute(
+            "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+            (name, pid, now + ttl, now))
+        return cur.rowcount == 1
+
+    def get_balance(self, token: str, address: str, block: int) -> int | None:
+        row = self._conn().execute("SELECT balance FROM balances WHERE token = ? AND address = ? AND block = ?",
+                                   (token, address, block)).fetchone()
+        return int(row[0]) if row else None
+
+    def put_balances(self, token: str, block: int, balances: list[tuple[str, int]]) -> None:
+        if not balances or self.max_balances <= 0:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO balances (token, address, block, balance) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (token, address) DO UPDATE SET block = excluded.block, balance = excluded.balance "
+                "WHERE excluded.block >= balances.block",
+                [(token, address, block, str(balance)) for address, balance in balances])
+        self._written += len(balances)
+        if self._written >= _PRUNE_EVERY:
+            self._written = 0
+            self.prune()
+
+    def prune(self) -> None:
+        # Oldest blocks go first; they are the least likely to be asked for again.
+        conn = self._conn()
+        (count,) = conn.execute("SELECT COUNT(*) FROM balances").fetchone()
+        if count > self.max_balances:
+            conn.execute("DELETE FROM balances WHERE (token, address) IN "
+                         "(SELECT token, address FROM balances ORDER BY block LIMIT ?)",
+                         (count - self.max_balances,))
+
+    def stats(self) -> dict[str, int]:
+        (count,) = self._conn().execute("SELECT COUNT(*) FROM balances").fetchone()
+        return {"balances": count}
+
+
+# Workers adopt the shared head while younger than interval; past that the holder of the head
+# lease refreshes it while the others keep their own head.
+class SharedHeadTracker(HeadTracker):
+    def __init__(self, fetch_head: Callable[[], int], interval: float, shared: SharedCache,
+                 clock: Callable[[], float] = time.monotonic):
+        super().__init__(fetch_head, interval, clock)
+        self.shared = shared
+
+    def _fetch(self) -> tuple[int, float]:
+        try:
+            shared = self.shared.head()
+            if shared is not None and shared[1] < self.interval:
+                return shared
+            if self._head is not None and not self.shared.claim("head", self.interval):
+                return self._head, max(0.0, self.interval - _LEASE_RETRY)
+        except sqlite3.Error as exc:
+            logger.warning("Shared head unavailable: %s", exc)
+            return super()._fetch()
+        head = self.fetch_head()
+        try:
+            self.shared.put_head(head)
+        except sqlite3.Error as exc:
+            logger.warning("Unable to publish head %d: %s", head, exc)
+        return head, 0.0
+
+
+# Per-process LRU in front of one token's balances in a SharedCache.
+class SharedBalanceCache(BalanceCache):
+    def __init__(self, maxsize: int, shared: SharedCache, token: str):
+        super().__init__(maxsize)
+        self.shared = shared
+        self.token = token
+        self.shared_hits = 0
+
+    def get(self, address: str, block: int) -> int | None:
+        balance = super().get(address, block)
+        if balance is not None:
+            return balance
+        try:
+            balance = self.shared.get_balance(self.token, address, block)
+        except sqlite3.Error:
+            return None
+        if balance is not None:
+            self.shared_hits += 1
+            super().put(address, block, balance)
+        return balance
+
+    def put_many(self, block: int, balances: list[tuple[str, int]]) -> None:
+        super().put_many(block, balances)
+        try:
+            self.shared.put_balances(self.token, block, balances)
+        except sqlite3.Error as exc:
+            logger.warning("Unable to share %d balances: %s", len(balances), exc)
+
+    def put(self, address: str, block: int, balance: int) -> None:
+        self.put_many(block, [(address, balance)])
+
+    def stats(self) -> dict[str, int]:
+        return {**super().stats(), "shared_hits": self.shared_hits}
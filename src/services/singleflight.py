@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+# Concurrent calls for one key share one upstream call and its result or exception; nothing is cached.
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.upstream = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.upstream += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def do_many(self, keys: Iterable[Hashable], fn: Callable[[list], list]) -> list[Any]:
+        # Batch form: keys already in flight are awaited, the rest are fetched with
+        # one ``fn(missing_keys)`` call returning an outcome per key. Outcomes are
+        # values or exception instances; nothing is raised.
+        keys = list(keys)
+        own: dict[Hashable, _Call] = {}
+        joined: dict[Hashable, _Call] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    own[key] = self._calls[key] = _Call()
+                else:
+                    joined[key] = call
+            self.upstream += len(own)
+            self.coalesced += len(joined)
+        if own:
+            try:
+                outcomes = fn(list(own))
+                for call, outcome in zip(own.values(), outcomes):
+                    if isinstance(outcome, BaseException):
+                        call.error = outcome
+                    else:
+                        call.result = outcome
+            except Exception as exc:
+                for call in own.values():
+                    call.error = exc
+            finally:
+                with self._lock:
+                    for key in own:
+                        del self._calls[key]
+                for call in own.values():
+                    call.event.set()
+        calls = {**joined, **own}
+        out = []
+        for key in keys:
+            call = calls[key]
+            call.event.wait()
+            out.append(call.error if call.error is not None else call.result)
+        return out
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"upstream_calls": self.upstream, "coalesced_calls": self.coalesced, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.upstream = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.upstream += 1
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finished(key, done))
+        # Shielded: a cancelled waiter (e.g. a client that disconnected) leaves the call running for the others.
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved when every waiter was cancelled.
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        return {"upstream_calls": self.upstream, "coalesced_calls": self.coalesced, "in_flight": len(self._calls)}
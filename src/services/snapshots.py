@@ -0,0 +1,126 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+from src.services.holder_store import ZERO_ADDRESS
+from src.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from src.services.token_service import TokenService
+
+logger = setup_logger(__name__)
+
+
+class Snapshot(NamedTuple):
+    value: Any
+    block: int | None
+    computed_at: float
+
+
+# Recomputes token_info after an indexed mint or burn or after max_age, and the top lists when
+# a Transfer or reorg touches them; serves only while the last pass is within max_staleness.
+class SnapshotRefresher:
+    def __init__(self, service: "TokenService", top_size: int = 100, top_tx_size: int = 10,
+                 interval: float = 2.0, max_age: float = 30.0, max_staleness: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.service = service
+        self.top_size = top_size
+        self.top_tx_size = top_tx_size
+        self.interval = interval
+        self.max_age = max_age
+        self.max_staleness = max_staleness
+        self.clock = clock
+        self._snapshots: dict[str, Snapshot] = {}
+        self._checked_at: float | None = None
+        self._touched: set[str] = set()
+        self._holder_source: object = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.refreshes: dict[str, int] = {"token_info": 0, "top": 0, "top_tx": 0}
+
+    def on_transfers(self, _from_block: int, _to_block: int, touched: set[str]) -> None:
+        with self._lock:
+            self._touched |= touched
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as exc:
+                logger.warning("Snapshot refresh failed: %s", str(exc)[:200])
+            self._stop.wait(self.interval)
+
+    def refresh(self) -> list[str]:
+        head = self.service.client.head.current()
+        with self._lock:
+            touched, self._touched = self._touched, set()
+        current = self._snapshots
+        fresh: dict[str, Snapshot] = {}
+
+        info = current.get("token_info")
+        if info is None or ZERO_ADDRESS in touched or self.clock() - info.computed_at > self.max_age:
+            self.service.client.invalidate_total_supply()
+            value = self.service.client.token_info()
+            if value.get("success"):
+                fresh["token_info"] = Snapshot(value, head, self.clock())
+
+        # The index replaces the SQLite fallback once warm-up loads it.
+        source = self.service.holder_index
+        top = current.get("top")
+        if top is None or source is not self._holder_source or self._top_changed(top.value, touched):
+            # The holder lists reflect the index checkpoint, not the head.
+            indexed = self.service.indexed_block()
+            fresh["top"] = Snapshot(self.service.compute_top_holders(self.top_size), indexed, self.clock())
+            if self.top_tx_size > 0:
+                fresh["top_tx"] = Snapshot(self.service.compute_top_holders_with_transactions(self.top_tx_size),
+                                           indexed, self.clock())
+            self._holder_source = source
+
+        if fresh:
+            self._snapshots = {**current, **fresh}
+            for name in fresh:
+                self.refreshes[name] += 1
+        self._checked_at = self.clock()
+        return sorted(fresh)
+
+    def _top_changed(self, top: list[tuple[str, float]], touched: set[str]) -> bool:
+        touched = touched - {ZERO_ADDRESS}
+        if not touched:
+            return False
+        if touched & {address.lower() for address, _ in top} or len(top) < self.top_size:
+            return True
+        floor = self.service.holder_balance(top[-1][0])
+        return any(self.service.holder_balance(address) >= floor for address in touched)
+
+    def get(self, name: str) -> Snapshot | None:
+        if self._checked_at is None or self.clock() - self._checked_at > self.max_staleness:
+            return None
+        return self._snapshots.get(name)
+
+    def top(self, n: int, with_transactions: bool = False) -> tuple[list, int | None] | None:
+        limit = self.top_tx_size if with_transactions else self.top_size
+        snapshot = self.get("top_tx" if with_transactions else "top")
+        if snapshot is None or n > limit:
+            return None
+        return snapshot.value[:n], snapshot.block
+
+    def status(self) -> dict[str, Any]:
+        now = self.clock()
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "checked_seconds_ago": None if self._checked_at is None else round(now - self._checked_at, 3),
+            "snapshots": {name: {"block": s.block, "age_seconds": round(now - s.computed_at, 3)}
+                          for name, s in self._snapshots.items()},
+            "refreshes": dict(self.refreshes),
+        }
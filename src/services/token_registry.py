@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from src.api.errors import BlockchainError, ServiceError, ValidationError
+from src.services.abi_fast import encode_aggregate3
+from src.services.polygon_client import PolygonClient
+from src.utils.logger import setup_logger
+from src.utils.validators import to_checksum
+
+logger = setup_logger(__name__)
+
+
+# Per-token clients sharing one RPC pool and head tracker, LRU-bounded by max_tokens;
+# balance_matrix mixes every token contract into one aggregate3 batch.
+class TokenRegistry:
+    def __init__(self, primary: PolygonClient, tokens: list[str] | None = None, max_tokens: int = 256,
+                 balance_cache_size: int = 10000, max_cells: int = 10000):
+        self.primary = primary
+        self.max_tokens = max(1, max_tokens)
+        self.balance_cache_size = balance_cache_size
+        self.max_cells = max_cells
+        self._clients: OrderedDict[str, PolygonClient] = OrderedDict({primary.contract_address: primary})
+        self._pinned = {primary.contract_address}
+        self._lock = threading.Lock()
+        for token in tokens or []:
+            self._pinned.add(self.get(token).contract_address)
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def tokens(self) -> list[str]:
+        with self._lock:
+            return list(self._clients)
+
+    def get(self, token: str) -> PolygonClient:
+        try:
+            checksum = to_checksum(token)
+        except Exception:
+            raise ValidationError(f"Invalid token address: {token}")
+        with self._lock:
+            client = self._clients.get(checksum)
+            if client is None:
+                client = self._clients[checksum] = self.primary.for_token(checksum, self.balance_cache_size)
+                # Configured tokens are never evicted; ad-hoc ones go least recently used first.
+                while len(self._clients) > self.max_tokens:
+                    stale = next((t for t in self._clients if t not in self._pinned), None)
+                    if stale is None:
+                        break
+                    del self._clients[stale]
+            else:
+                self._clients.move_to_end(checksum)
+            return client
+
+    def load_metadata(self, clients: list[PolygonClient]) -> dict[str, str]:
+        # symbol, name and decimals of every token without metadata yet, in one batch.
+        # Returns token -> error for tokens whose metadata could not be read.
+        missing = [c for c in clients if c.cached_metadata() is None]
+        errors: dict[str, str] = {}
+        if not missing:
+            return errors
+        batch = self.primary.new_batch()
+        calls = [client.metadata_calls() for client in missing]
+        for client_calls in calls:
+            for to, data in client_calls:
+                batch.eth_call(to, data)
+        results = iter(batch.flush())
+        for client, client_calls in zip(missing, calls):
+            client_results = [next(results) for _ in client_calls]
+            try:
+                client.set_metadata(client_results)
+            except (BlockchainError, ServiceError) as exc:
+                errors[client.contract_address] = exc.safe_message
+        return errors
+
+    def balance_matrix(self, addresses: list[str], tokens: list[str], block: int | None = None) -> dict[str, Any]:
+        if not isinstance(addresses, list) or not addresses:
+            raise ValidationError("addresses must be a non-empty list")
+        if not isinstance(tokens, list) or not tokens:
+            raise ValidationError("tokens must be a non-empty list")
+        if len(addresses) * len(tokens) > self.max_cells:
+            raise ValidationError(f"Matrix too large: at most {self.max_cells} address x token cells")
+        clients = list({c.contract_address: c for c in (self.get(t) for t in tokens)}.values())
+        owners: dict[str, str | None] = {}
+        for address in addresses:
+            try:
+                owners[address] = to_checksum(address)
+            except Exception:
+                owners[address] = None
+
+        block = self.primary.head.current() if block is None else block
+        token_errors = self.load_metadata(clients)
+        live = [c for c in clients if c.contract_address not in token_errors]
+
+        # Cells not in a token's balance cache, deduplicated, in one mixed-target aggregate3 batch.
+        unique_owners = list(dict.fromkeys(o for o in owners.values() if o is not None))
+        cells: dict[tuple[str, str], int | str] = {}
+        pending: list[tuple[PolygonClient, str]] = []
+        for client in live:
+            for owner in unique_owners:
+                cached = client.balance_cache.get(owner, block)
+                if cached is None:
+                    pending.append((client, owner))
+                else:
+                    cells[client.contract_address, owner] = cached
+        cells.update(self._fetch_cells(pending, block))
+
+        token_info = {}
+        for client in clients:
+            metadata = client.cached_metadata()
+            token_info[client.contract_address] = ({"symbol": metadata["symbol"], "decimals": metadata["decimals"]}
+                                                   if client.contract_address not in token_errors
+                                                   else {"error": token_errors[client.contract_address]})
+        rows = []
+        for address, owner in owners.items():
+            if owner is None:
+                rows.append({"address": address, "error": "Invalid address", "success": False})
+                continue
+            balances = {}
+            for client in clients:
+                token = client.contract_address
+                value = cells.get((token, owner), token_errors.get(token))
+                if isinstance(value, int):
+                    decimals = client.cached_metadata()["decimals"]
+                    balances[token] = {"balance_wei": str(value), "balance_formatted": value / (10 ** decimals)}
+                else:
+                    balances[token] = {"error": value or "RPC or contract error"}
+            rows.append({"address": address, "balances": balances, "success": True})
+        return {"block_number": block, "tokens": token_info, "balances": rows}
+
+    def _fetch_cells(self, pending: list[tuple[PolygonClient, str]], block: int) -> dict[tuple[str, str], int | str]:
+        out: dict[tuple[str, str], int | str] = {}
+        if not pending:
+            return out
+        size = self.primary.multicall_chunk_size
+        chunks = [pending[start:start + size] for start in range(0, len(pending), size)]
+        batch = self.primary.new_batch()
+        for chunk in chunks:
+            calls = [(c.contract_address, True, c.encode_call("balanceOf", owner)) for c, owner in chunk]
+            batch.eth_call(self.primary.multicall_address, encode_aggregate3(calls), block=hex(block))
+        fetched: dict[PolygonClient, list[tuple[str, int]]] = {}
+        for chunk, result in zip(chunks, batch.flush()):
+            try:
+                returned = self.primary.decode_aggregate(result)
+            except (BlockchainError, ServiceError):
+                out.update({(c.contract_address, owner): "RPC or contract error" for c, owner in chunk})
+                continue
+            for (client, owner), (ok, data) in zip(chunk, returned):
+                if not ok or len(data) < 32:
+                    out[client.contract_address, owner] = "Contract call failed"
+                    continue
+                balance_wei = int.from_bytes(data[:32], "big")
+                fetched.setdefault(client, []).append((owner, balance_wei))
+                out[client.contract_address, owner] = balance_wei
+        for client, balances in fetched.items():
+            client.balance_cache.put_many(block, balances)
+        return out
@@ -1,48 +1,236 @@
-from typing import Any
-from datetime import datetime, timedelta, timezone
+import contextvars
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+from decimal import Decimal, InvalidOperation
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 from src.services.polygon_client import PolygonClient
+from src.services.holder_store import HolderStore
+from src.services.holder_export import export_holders, resolve_format
+from src.services.holder_index import HolderIndex
+from src.services.activity_index import ActivityIndex
+from src.services.history import HistoricalQueries
+from src.services.token_registry import TokenRegistry
 from src.utils.logger import setup_logger
-from src.api.errors import ValidationError
+from src.utils.validators import to_checksum, try_normalize
+from src.api.errors import ServiceError, TooManyRequestsError, ValidationError
+
+if TYPE_CHECKING:
+    from src.services.snapshots import SnapshotRefresher
+    from src.services.watchlist import WatchHub
 
 logger = setup_logger(__name__)
 
 
 class TokenService:
-    def __init__(self, client: PolygonClient):
+    def __init__(self, client: PolygonClient, holder_store: HolderStore | None = None,
+                 holder_index: HolderIndex | None = None, activity_index: ActivityIndex | None = None,
+                 stream_chunk_size: int = 500, history: HistoricalQueries | None = None,
+                 registry: TokenRegistry | None = None, export_batch_size: int = 65536):
         self.client = client
+        self.holder_store = holder_store
+        self.holder_index = holder_index
+        self.activity_index = activity_index
+        self.stream_chunk_size = max(1, stream_chunk_size)
+        self.history = history
+        self.registry = registry
+        self.export_batch_size = max(1, export_batch_size)
+        self._indexed_block: int | None = None
+        self.snapshots: "SnapshotRefresher | None" = None
+        self.watch_hub: "WatchHub | None" = None
+
+    def on_transfers(self, from_block: int, to_block: int, touched: set[str]) -> None:
+        # On a reorg to_block is the checkpoint before the rollback, so prefer the store's.
+        self._indexed_block = self.holder_store.checkpoint() if self.holder_store is not None else to_block
+        # Untouched cached balances stay valid through the range; after a reorg the
+        # indexed block is before from_block, so only the touched ones are dropped.
+        self.client.balance_cache.rekey(from_block, self._indexed_block, {to_checksum(a) for a in touched})
+        if self.holder_index is None or self.holder_store is None:
+            return
+        for address in touched:
+            self.holder_index.update(address, self.holder_store.balance(address))
+
+    def indexed_block(self) -> int | None:
+        if self._indexed_block is None and self.holder_store is not None:
+            self._indexed_block = self.holder_store.checkpoint()
+        return self._indexed_block
+
+    def cache_block(self, block: int | None = None, index: bool = False) -> int | None:
+        # Block a response reflects, without network I/O; None while it is not known.
+        if index:
+            return self.indexed_block()
+        return block if block is not None else self.client.head.peek()
+
+    def is_final(self, block: int) -> bool:
+        head = self.client.head.peek()
+        return self.history is not None and head is not None and head - block >= self.history.finality_depth
+
+    def _format_holders(self, holders: list[tuple[str, int]]) -> list[tuple[str, float]]:
+        scale = 10 ** self.client.decimals()
+        return [(to_checksum(addr), balance / scale) for addr, balance in holders]
 
-    def get_balance(self, address: str) -> dict[str, Any]:
+    def _require_history(self) -> HistoricalQueries:
+        if self.history is None:
+            raise ServiceError("Historical queries unavailable")
+        return self.history
+
+    def _require_registry(self) -> TokenRegistry:
+        if self.registry is None:
+            raise ServiceError("Multi-token queries unavailable")
+        return self.registry
+
+    def resolve_block(self, block: int | None = None, timestamp: int | None = None) -> int | None:
+        if block is None and timestamp is None:
+            return None
+        return self._require_history().resolve_block(block, timestamp)
+
+    def get_balance(self, address: str, block: int | None = None) -> dict[str, Any]:
+        if block is not None:
+            return self._require_history().balances([address], block)[0]
         return self.client.balance_of(address)
 
-    def get_balance_batch(self, addresses: list[str]) -> list[dict[str, Any]]:
+    def get_balance_batch(self, addresses: list[str], block: int | None = None) -> list[dict[str, Any]]:
         if not isinstance(addresses, list) or len(addresses) == 0:
             raise ValidationError("addresses must be a non-empty list")
-        out: list[dict[str, Any]] = []
-        for addr in addresses:
-            try:
-                res = self.get_balance(addr)
-                out.append(res)
-            except Exception:
-                logger.exception("Error fetching address %s", addr)
-                out.append({"address": addr, "error": "Internal error", "success": False})
-        return out
-
-    def get_token_info(self) -> dict[str, Any]:
+        if block is not None:
+            return self._require_history().balances(addresses, block)
+        try:
+            return self.client.balance_of_batch(addresses)
+        except TooManyRequestsError:
+            raise
+        except Exception:
+            logger.exception("Error fetching balance batch of %d addresses", len(addresses))
+            return [{"address": addr, "error": "Internal error", "success": False} for addr in addresses]
+
+    def lookup_chunk(self, chunk: list[str]) -> list[dict[str, Any]]:
+        # Invalid addresses are answered inline instead of failing the whole chunk.
+        canonical = [try_normalize(a) for a in chunk]
+        valid = [c for c in canonical if c is not None]
+        found = iter(self.get_balance_batch(valid) if valid else [])
+        return [next(found) if c is not None else {"address": a, "error": "Invalid Ethereum address", "success": False}
+                for a, c in zip(chunk, canonical)]
+
+    def stream_balances(self, addresses: Iterable[str]) -> Iterator[dict[str, Any]]:
+        # The next chunk is looked up while the current one is written out, so at
+        # most two chunks of input and results are held at any time.
+        addresses = iter(addresses)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="balance-stream") as pool:
+            pending = None
+            while chunk := list(islice(addresses, self.stream_chunk_size)):
+                future = pool.submit(contextvars.copy_context().run, self.lookup_chunk, chunk)
+                if pending is not None:
+                    yield from pending.result()
+                pending = future
+            if pending is not None:
+                yield from pending.result()
+
+    def get_balance_matrix(self, addresses: list[str], tokens: list[str],
+                           block: int | None = None) -> dict[str, Any]:
+        return self._require_registry().balance_matrix(addresses, tokens, block)
+
+    def get_token_info(self, block: int | None = None) -> dict[str, Any]:
+        if block is not None:
+            return self._require_history().token_info(block)
+        snapshot = self.snapshots.get("token_info") if self.snapshots is not None else None
+        if snapshot is not None:
+            # The head the snapshot was taken at, so response caching keys on it rather than the live head.
+            return {**snapshot.value, "block_number": snapshot.block}
         return self.client.token_info()
 
     def get_top_holders(self, n: int = 10) -> list[tuple[str, float]]:
-        sample = [
-            ("0x51f1774249Fc2B0C2603542Ac6184Ae1d048351d", 1500.0),
-            ("0x4830AF4aB9cd9E381602aE50f71AE481a7727f7C", 1200.0),
-            ("0x742E6fB6c6B75C6e0f7943c661a4eB9C90d3eAe1", 800.0),
-        ]
-        return sample[:max(0, min(n, len(sample)))]
+        return self.top_holders_with_block(n)[0]
+
+    def top_holders_with_block(self, n: int, with_transactions: bool = False) -> tuple[list, int | None]:
+        # The list and the index checkpoint it reflects, from the snapshot when it covers n.
+        cached = self.snapshots.top(n, with_transactions) if self.snapshots is not None else None
+        if cached is not None:
+            return cached
+        block = self.indexed_block()
+        if with_transactions:
+            return self.compute_top_holders_with_transactions(n), block
+        return self.compute_top_holders(n), block
+
+    @staticmethod
+    def _holder_key(address: str) -> str:
+        # The holder index and store key addresses by their 0x-prefixed lowercase hex.
+        canonical = try_normalize(address)
+        if canonical is None:
+            raise ValidationError("Invalid Ethereum address")
+        return "0x" + canonical.raw.hex()
+
+    def holder_balance(self, address: str) -> int:
+        key = self._holder_key(address)
+        if self.holder_index is not None:
+            return self.holder_index.balance(key)
+        if self.holder_store is not None:
+            return self.holder_store.balance(key)
+        return 0
+
+    def compute_top_holders(self, n: int) -> list[tuple[str, float]]:
+        if n <= 0:
+            return []
+        if self.holder_index is not None:
+            return self._format_holders(self.holder_index.top(n))
+        if self.holder_store is not None:
+            return self._format_holders(self.holder_store.top(n))
+        return []
+
+    def _require_index(self) -> HolderIndex:
+        if self.holder_index is None:
+            raise ServiceError("Holder index unavailable")
+        return self.holder_index
+
+    def get_holder_rank(self, address: str) -> dict[str, Any]:
+        index = self._require_index()
+        key = self._holder_key(address)
+        balance = index.balance(key)
+        return {
+            "address": address,
+            "rank": index.rank(key),
+            "balance": balance / 10 ** self.client.decimals(),
+            "holders": len(index),
+        }
+
+    def get_holders_page(self, cursor: str | None, limit: int) -> tuple[list[tuple[str, float]], str | None]:
+        try:
+            position = int(cursor, 16) if cursor else None
+        except ValueError:
+            raise ValidationError("Invalid cursor")
+        holders, next_position = self._require_index().page(position, limit)
+        return self._format_holders(holders), (format(next_position, "x") if next_position is not None else None)
+
+    def export_holders(self, fmt: str | None = None,
+                       block: int | None = None) -> tuple[str, int | None, Iterator[bytes]]:
+        if self.holder_store is None:
+            raise ServiceError("Holder store unavailable")
+        fmt = resolve_format(fmt)
+        indexed, chunks = export_holders(self.holder_store, fmt, self.export_batch_size, block)
+        return fmt, indexed, chunks
+
+    def get_holders_in_band(self, min_balance: str, max_balance: str, limit: int) -> list[tuple[str, float]]:
+        scale = 10 ** self.client.decimals()
+        try:
+            low, high = int(Decimal(min_balance) * scale), int(Decimal(max_balance) * scale)
+        except (InvalidOperation, ValueError):
+            raise ValidationError("min and max must be numbers")
+        if low < 0 or high < low:
+            raise ValidationError("Expected 0 <= min <= max")
+        return self._format_holders(self._require_index().band(low, high, limit))
 
     def get_top_holders_with_transactions(self, n: int = 10):
-        holders = self.get_top_holders(n)
+        return self.top_holders_with_block(n, with_transactions=True)[0]
+
+    def compute_top_holders_with_transactions(self, n: int):
+        holders = self.compute_top_holders(n)
+        if self.activity_index is None:
+            return [(addr, bal, None) for addr, bal in holders]
+        activity = self.activity_index.last_activity([addr.lower() for addr, _ in holders])
         result = []
-        for i, (addr, bal) in enumerate(holders):
-            tx_date = (datetime.now(timezone.utc) - timedelta(days=i+1)).strftime("%Y-%m-%d %H:%M:%S")
+        for addr, bal in holders:
+            last = activity.get(addr.lower())
+            tx_date = None
+            if last is not None and last.timestamp is not None:
+                tx_date = datetime.fromtimestamp(last.timestamp, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
             result.append((addr, bal, tx_date))
         return result
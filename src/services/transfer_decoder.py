@@ -0,0 +1,95 @@
+import struct
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+
+def _split(packed: bytes, width: int) -> tuple[bytes, ...]:
+    # One struct call cuts a packed column into per-log values without a Python-level slice per log.
+    return struct.unpack(f"{width}s" * (len(packed) // width), packed)
+
+
+# Columns of one eth_getLogs range: senders and recipients pack 20 bytes per log,
+# blocks is int64 and values uint256. Removed logs are left out.
+class TransferBatch(NamedTuple):
+    blocks: array
+    senders: bytes
+    recipients: bytes
+    values: list[int]
+    block_hashes: list[str]
+    tx_hashes: list[str]
+
+    def __len__(self) -> int:
+        return len(self.blocks)
+
+    def addresses(self) -> set[str]:
+        # Every sender and recipient, without building per-log strings for repeated holders.
+        packed = set(_split(self.senders, 20))
+        packed.update(_split(self.recipients, 20))
+        return {"0x" + address.hex() for address in packed}
+
+    def net_deltas(self) -> tuple[dict[str, tuple[int, int]], dict[str, tuple[int, str]]]:
+        # Per address: (net delta, last block) and (last block, last tx hash), in one pass.
+        senders, recipients = _split(self.senders, 20), _split(self.recipients, 20)
+        net: defaultdict[bytes, int] = defaultdict(int)
+        for address, value in zip(senders, self.values):
+            net[address] -= value
+        for address, value in zip(recipients, self.values):
+            net[address] += value
+        # Later logs overwrite earlier ones, so these hold each address's last log index.
+        last_sent = dict(zip(senders, range(len(senders))))
+        last_received = dict(zip(recipients, range(len(recipients))))
+        deltas, activity = {}, {}
+        for address, delta in net.items():
+            i = max(last_sent.get(address, -1), last_received.get(address, -1))
+            key = "0x" + address.hex()
+            deltas[key] = (delta, self.blocks[i])
+            activity[key] = (self.blocks[i], self.tx_hashes[i])
+        return deltas, activity
+
+    def block_deltas(self, from_block: int) -> dict[int, dict[str, int]]:
+        # Per-block deltas of the logs at or after ``from_block`` (logs arrive in block order).
+        start = bisect_left(self.blocks, from_block)
+        senders = _split(self.senders[20 * start:], 20)
+        recipients = _split(self.recipients[20 * start:], 20)
+        out: dict[int, dict[str, int]] = {}
+        for block, sender, recipient, value in zip(self.blocks[start:], senders, recipients, self.values[start:]):
+            per_block = out.setdefault(block, {})
+            sender, recipient = "0x" + sender.hex(), "0x" + recipient.hex()
+            per_block[sender] = per_block.get(sender, 0) - value
+            per_block[recipient] = per_block.get(recipient, 0) + value
+        return out
+
+    def last_block_hashes(self) -> dict[int, str]:
+        return dict(zip(self.blocks, self.block_hashes))
+
+
+def decode_transfers(logs: Iterable[dict]) -> TransferBatch:
+    # Each column is joined into one hex string and parsed with a single bytes.fromhex; no per-log objects.
+    live = [log for log in logs if not log.get("removed")]
+    if not live:
+        return TransferBatch(array("q"), b"", b"", [], [], [])
+    try:
+        numbers = [int(log["blockNumber"], 16) for log in live]
+        if numbers != sorted(numbers):
+            # Providers return logs in chain order; the net and per-block deltas rely on it.
+            live.sort(key=lambda log: (int(log["blockNumber"], 16), int(log.get("logIndex") or "0x0", 16)))
+            numbers.sort()
+        blocks = array("q", numbers)
+        topics = [log["topics"] for log in live]
+        senders = bytes.fromhex("".join([t[1][-40:] for t in topics]))
+        recipients = bytes.fromhex("".join([t[2][-40:] for t in topics]))
+        data = [log["data"] for log in live]
+        if set(map(len, data)) == {66}:
+            words = bytes.fromhex("".join([word[2:] for word in data]))
+        else:
+            # Some logs carry a short or empty word ("0x" for a zero value); pad them one by one.
+            words = bytes.fromhex("".join([word[2:66].rjust(64, "0") for word in data]))
+    except (IndexError, KeyError, TypeError, ValueError) as exc:
+        raise ValueError("Malformed Transfer log") from exc
+    if len(senders) != 20 * len(live) or len(recipients) != 20 * len(live):
+        raise ValueError("Malformed Transfer log")
+    values = [int.from_bytes(word, "big") for word in _split(words, 32)]
+    return TransferBatch(blocks, senders, recipients, values,
+                         [log["blockHash"] for log in live], [log["transactionHash"] for log in live])
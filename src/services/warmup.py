@@ -0,0 +1,63 @@
+import threading
+import time
+from typing import Callable
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+# Startup steps run in order in a background thread, each retried with backoff until it succeeds.
+class Warmup:
+    def __init__(self, steps: list[tuple[str, Callable[[], None]]], retry_interval: float = 1.0,
+                 max_retry_interval: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.steps = steps
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.clock = clock
+        self.startup_seconds: float | None = None
+        self._started_at = clock()
+        self._done: dict[str, float] = {}
+        self._errors: dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def ready(self) -> bool:
+        return len(self._done) == len(self.steps)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        for name, step in self.steps:
+            delay = self.retry_interval
+            while not self._stop.is_set():
+                try:
+                    step()
+                except Exception as exc:
+                    self._errors[name] = str(exc)[:200]
+                    logger.warning("Startup step %s failed, retrying in %.1fs: %s", name, delay, self._errors[name])
+                    self._stop.wait(delay)
+                    delay = min(self.max_retry_interval, delay * 2)
+                    continue
+                self._errors.pop(name, None)
+                self._done[name] = self.clock() - self._started_at
+                break
+        if self.ready:
+            logger.info("Warm-up finished in %.2fs", self.clock() - self._started_at)
+
+    def status(self) -> dict[str, object]:
+        return {
+            "ready": self.ready,
+            "checks": {name: name in self._done for name, _ in self.steps},
+            "errors": dict(self._errors),
+            "startup_seconds": self.startup_seconds,
+            "warmup_seconds": max(self._done.values()) if self.ready and self._done else None,
+        }
@@ -0,0 +1,166 @@
+import itertools
+import threading
+from collections import deque
+from typing import Any, Callable
+
+from src.api.errors import TooManyRequestsError, ValidationError
+from src.services.log_ingestor import get_transfer_logs
+from src.services.polygon_client import PolygonClient
+from src.services.rpc_scheduler import BULK, rpc_priority
+from src.services.transfer_decoder import decode_transfers
+from src.utils.logger import setup_logger
+from src.utils.validators import to_checksum, validate_addresses
+
+logger = setup_logger(__name__)
+
+# Upper bound on one eth_getLogs range of a standalone poll; longer gaps are walked in steps.
+_MAX_POLL_RANGE = 500
+# Ranges ending further behind the head are backfill: watchers already got the current
+# balances in their first event, and state that old may be pruned by the node.
+_MAX_NOTIFY_LAG = 128
+
+
+# Pending events of one watcher; the oldest are dropped past queue_size.
+class Subscription:
+    def __init__(self, sub_id: int, addresses: list[str], queue_size: int):
+        self.id = sub_id
+        self.addresses = addresses
+        self._events: deque[dict[str, Any]] = deque(maxlen=max(1, queue_size))
+        self._ready = threading.Event()
+        # Extra wake-up hook, e.g. to signal an asyncio consumer from the hub thread.
+        self.on_event: Callable[[], None] | None = None
+        self.dropped = 0
+
+    def push(self, event: dict[str, Any]) -> None:
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(event)
+        self._ready.set()
+        if self.on_event is not None:
+            self.on_event()
+
+    def drain(self) -> list[dict[str, Any]]:
+        self._ready.clear()
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+    def wait(self, timeout: float) -> list[dict[str, Any]]:
+        self._ready.wait(timeout)
+        return self.drain()
+
+
+# Once per ingested range, touched addresses are intersected with the watched set and only those
+# balances are re-read in one multicall. Follows logs itself (start) when no ingestor runs.
+class WatchHub:
+    def __init__(self, client: PolygonClient, max_subscriptions: int = 1000, max_addresses: int = 1000,
+                 queue_size: int = 100, poll_interval: float = 2.0, keepalive: float = 15.0):
+        self.client = client
+        self.max_subscriptions = max_subscriptions
+        self.max_addresses = max_addresses
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.keepalive = keepalive
+        self._subscriptions: dict[int, Subscription] = {}
+        self._watched: dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._last_block: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.pushed = 0
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, addresses: list[str]) -> Subscription:
+        if not addresses:
+            raise ValidationError("At least one address is required")
+        if len(addresses) > self.max_addresses:
+            raise ValidationError(f"At most {self.max_addresses} addresses per watchlist")
+        checksums = list(dict.fromkeys(validate_addresses(addresses)))
+        with self._lock:
+            if len(self._subscriptions) >= self.max_subscriptions:
+                raise TooManyRequestsError("Too many watchlist subscriptions", retry_after=self.keepalive)
+            sub = Subscription(next(self._ids), checksums, self.queue_size)
+            self._subscriptions[sub.id] = sub
+            for address in checksums:
+                key = address.lower()
+                self._watched[key] = self._watched.get(key, 0) + 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if self._subscriptions.pop(sub.id, None) is None:
+                return
+            for address in sub.addresses:
+                key = address.lower()
+                self._watched[key] -= 1
+                if not self._watched[key]:
+                    del self._watched[key]
+
+    def initial(self, sub: Subscription) -> dict[str, Any]:
+        # Current balances, sent once so the watcher has a baseline for the updates.
+        results = self.client.balance_of_batch(sub.addresses)
+        block = next((r["block_number"] for r in results if r.get("success")), None)
+        return {"block_number": block, "balances": results}
+
+    def on_transfers(self, _from_block: int, to_block: int, touched: set[str]) -> None:
+        head = self.client.head.peek()
+        if head is not None and head - to_block > _MAX_NOTIFY_LAG:
+            return
+        with self._lock:
+            affected = [address for address in touched if address in self._watched]
+            if not affected:
+                return
+            subscriptions = list(self._subscriptions.values())
+        with rpc_priority(BULK):
+            results = self.client.balance_of_batch(affected, block=to_block)
+        by_address = {}
+        for result in results:
+            result["address"] = to_checksum(result["address"])
+            by_address[result["address"]] = result
+        for sub in subscriptions:
+            balances = [by_address[address] for address in sub.addresses if address in by_address]
+            if balances:
+                sub.push({"block_number": to_block, "balances": balances})
+                self.pushed += 1
+
+    def poll(self) -> None:
+        # Standalone follower: one eth_getLogs per new head range, skipped while nobody watches.
+        head = self.client.head.current()
+        if self._last_block is None or not self._watched:
+            self._last_block = head
+            return
+        if head <= self._last_block:
+            return
+        # A gap after a stall is read in steps and reported once, with the balances at the head.
+        touched: set[str] = set()
+        for start in range(self._last_block + 1, head + 1, _MAX_POLL_RANGE):
+            end = min(head, start + _MAX_POLL_RANGE - 1)
+            touched |= decode_transfers(get_transfer_logs(self.client, start, end)).addresses()
+        self.on_transfers(self._last_block + 1, head, touched)
+        self._last_block = head
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as exc:
+                logger.warning("Watchlist poll failed: %s", str(exc)[:200])
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="watchlist", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> dict[str, int]:
+        return {"subscriptions": len(self._subscriptions), "watched_addresses": len(self._watched),
+                "events_pushed": self.pushed}
@@ -0,0 +1,212 @@
+import json
+import time
+from collections import Counter
+
+import requests
+from eth_abi import decode, encode
+from eth_utils import function_signature_to_4byte_selector, keccak, to_checksum_address
+from requests.adapters import BaseAdapter
+
+TOKEN_ADDRESS = "0x1a9b54a3075119f1546c52ca0940551a6ce5d2d0"
+MULTICALL_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+BALANCE_OF = function_signature_to_4byte_selector("balanceOf(address)")
+DECIMALS = function_signature_to_4byte_selector("decimals()")
+SYMBOL = function_signature_to_4byte_selector("symbol()")
+NAME = function_signature_to_4byte_selector("name()")
+TOTAL_SUPPLY = function_signature_to_4byte_selector("totalSupply()")
+AGGREGATE3 = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+ZERO = "0x0000000000000000000000000000000000000000"
+
+
+class Revert(Exception):
+    pass
+
+
+class FakeChain:
+    def __init__(self, balances: dict[str, int] | None = None, decimals: int = 18,
+                 symbol: str = "TBY", name: str = "TestToken"):
+        self.token = to_checksum_address(TOKEN_ADDRESS)
+        self.multicall = to_checksum_address(MULTICALL_ADDRESS)
+        self.balances = {to_checksum_address(a): v for a, v in (balances or {}).items()}
+        self.decimals = decimals
+        self.symbol = symbol
+        self.name = name
+        self.reverting: set[str] = set()
+        self.requests: Counter = Counter()
+        self.http_posts = 0
+        self.block_number = 1000
+        self.logs: list[dict] = []
+        self.block_hashes: dict[int, str] = {}
+        self.max_log_range: int | None = None
+        self.tokens: dict[str, "FakeChain"] = {}
+
+    def add_token(self, address: str, balances: dict[str, int] | None = None, decimals: int = 18,
+                  symbol: str = "TB2", name: str = "SecondToken") -> "FakeChain":
+        # Another ERC20 on the same chain, reachable by direct calls and through aggregate3.
+        token = FakeChain(balances, decimals, symbol, name)
+        token.token = to_checksum_address(address)
+        self.tokens[token.token] = token
+        return token
+
+    @property
+    def total_supply(self) -> int:
+        return sum(self.balances.values())
+
+    def block_hash(self, number: int) -> str:
+        return self.block_hashes.get(number, "0x" + f"{number:064x}")
+
+    def transfer(self, sender: str, recipient: str, value: int, block: int) -> None:
+        sender, recipient = to_checksum_address(sender), to_checksum_address(recipient)
+        if sender != to_checksum_address(ZERO):
+            self.balances[sender] = self.balances.get(sender, 0) - value
+        if recipient != to_checksum_address(ZERO):
+            self.balances[recipient] = self.balances.get(recipient, 0) + value
+        self.block_number = max(self.block_number, block)
+        self.logs.append({
+            "address": self.token.lower(),
+            "blockNumber": hex(block),
+            "blockHash": self.block_hash(block),
+            "transactionHash": "0x" + keccak(text=f"{block}:{len(self.logs)}").hex(),
+            "logIndex": hex(len(self.logs)),
+            "topics": [TRANSFER_TOPIC, "0x" + "0" * 24 + sender[2:].lower(), "0x" + "0" * 24 + recipient[2:].lower()],
+            "data": "0x" + f"{value:064x}",
+            "removed": False,
+        })
+
+    def get_logs(self, flt: dict) -> dict:
+        start, end = int(flt["fromBlock"], 16), int(flt["toBlock"], 16)
+        if self.max_log_range is not None and end - start + 1 > self.max_log_range:
+            return {"error": {"code": -32005, "message": "block range is too large"}}
+        topics = flt.get("topics") or []
+        return {"result": [
+            log for log in self.logs
+            if start <= int(log["blockNumber"], 16) <= end
+            and all(t is None or t == log["topics"][i] for i, t in enumerate(topics))
+        ]}
+
+    def block_timestamp(self, number: int) -> int:
+        return 1_700_000_000 + 2 * number
+
+    def call(self, to: str, data: bytes) -> bytes:
+        to = to_checksum_address(to)
+        selector, args = data[:4], data[4:]
+        if to == self.multicall and selector == AGGREGATE3:
+            (calls,) = decode(["(address,bool,bytes)[]"], args)
+            out = []
+            for target, allow_failure, call_data in calls:
+                try:
+                    out.append((True, self.call(target, call_data)))
+                except Revert:
+                    if not allow_failure:
+                        raise
+                    out.append((False, b""))
+            return encode(["(bool,bytes)[]"], [out])
+        if to in self.tokens:
+            return self.tokens[to].call(to, data)
+        if to != self.token:
+            raise Revert()
+        if selector == BALANCE_OF:
+            (owner,) = decode(["address"], args)
+            owner = to_checksum_address(owner)
+            if owner in self.reverting:
+                raise Revert()
+            return encode(["uint256"], [self.balances.get(owner, 0)])
+        if selector == DECIMALS:
+            return encode(["uint8"], [self.decimals])
+        if selector == SYMBOL:
+            return encode(["string"], [self.symbol])
+        if selector == NAME:
+            return encode(["string"], [self.name])
+        if selector == TOTAL_SUPPLY:
+            return encode(["uint256"], [self.total_supply])
+        raise Revert()
+
+    def handle(self, method: str, params: list) -> dict:
+        self.requests[method] += 1
+        if method == "web3_clientVersion":
+            return {"result": "FakeChain/1.0"}
+        if method == "eth_chainId":
+            return {"result": hex(137)}
+        if method == "eth_blockNumber":
+            return {"result": hex(self.block_number)}
+        if method == "eth_getLogs":
+            return self.get_logs(params[0])
+        if method == "eth_getBlockByNumber":
+            number = int(params[0], 16)
+            if number > self.block_number:
+                return {"result": None}
+            return {"result": {"number": params[0], "hash": self.block_hash(number),
+                               "timestamp": hex(self.block_timestamp(number))}}
+        if method == "eth_call":
+            tx = params[0]
+            try:
+                out = self.call(tx["to"], bytes.fromhex(tx["data"][2:]))
+            except Revert:
+                return {"error": {"code": 3, "message": "execution reverted", "data": "0x"}}
+            return {"result": "0x" + out.hex()}
+        return {"error": {"code": -32601, "message": f"method {method} not found"}}
+
+
+class FakeAdapter(BaseAdapter):
+    # behaviour maps an endpoint URL to "down", "429" or a response delay in seconds.
+    def __init__(self, chain: FakeChain, behaviour: dict | None = None):
+        super().__init__()
+        self.chain = chain
+        self.behaviour = behaviour if behaviour is not None else {}
+        self.posts_by_url: Counter = Counter()
+
+    def _answer(self, item: dict) -> dict:
+        return {"jsonrpc": "2.0", "id": item.get("id"), **self.chain.handle(item["method"], item.get("params", []))}
+
+    def send(self, request, **kwargs):
+        url = request.url.rstrip("/")
+        self.posts_by_url[url] += 1
+        action = self.behaviour.get(url)
+        if action == "down":
+            raise requests.ConnectionError(f"{url} is down")
+        if isinstance(action, (int, float)):
+            time.sleep(action)
+        self.chain.http_posts += 1
+        payload = json.loads(request.body)
+        if isinstance(payload, list):
+            body = [self._answer(item) for item in payload]
+        else:
+            body = self._answer(payload)
+        resp = requests.Response()
+        resp.status_code = 200
+        if action == "429":
+            resp.status_code = 429
+            resp.headers["Retry-After"] = "5"
+            body = {"jsonrpc": "2.0", "error": {"code": 429, "message": "Too Many Requests"}}
+        resp._content = json.dumps(body).encode()
+        resp.headers["Content-Type"] = "application/json"
+        resp.request = request
+        resp.url = request.url
+        return resp
+
+    def close(self):
+        pass
+
+
+def fake_session(chain: FakeChain, behaviour: dict | None = None) -> requests.Session:
+    session = requests.Session()
+    session.mount("http://", FakeAdapter(chain, behaviour))
+    return session
+
+
+def fake_node_app(chain: FakeChain):
+    # The same chain served over real HTTP, for async clients that bring their own transport.
+    from aiohttp import web
+
+    async def rpc(request):
+        payload = await request.json()
+        chain.http_posts += 1
+        answer = lambda item: {"jsonrpc": "2.0", "id": item.get("id"), **chain.handle(item["method"], item.get("params", []))}
+        body = [answer(item) for item in payload] if isinstance(payload, list) else answer(payload)
+        return web.json_response(body)
+
+    app = web.Application()
+    app.router.add_post("/", rpc)
+    return app
@@ -2,16 +2,14 @@ import logging
 import sys
 from typing import Optional
 
-from config import AppConfig
-
-_cfg = AppConfig()
+from config import get_config
 
 
 def setup_logger(name: str, level: Optional[str] = None) -> logging.Logger:
     logger = logging.getLogger(name)
     if logger.handlers:
         return logger
-    lvl = (level or _cfg.log_level).upper()
+    lvl = (level or get_config().log_level).upper()
     logger.setLevel(getattr(logging, lvl, logging.INFO))
     handler = logging.StreamHandler(sys.stdout)
     fmt = "%(asctime)s %(name)s %(levelname)s %(message)s"
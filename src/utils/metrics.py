@@ -0,0 +1,265 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans a cache hit (sub-millisecond) up to a timed-out RPC call.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        ...
+
+
+class _LabelledMetric(_Metric):
+    # A metric whose samples live in per-label-set children updated by the code being measured.
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        ...
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_LabelledMetric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for values, child in sorted(self._children.items()):
+            lines.append(f"{self.name}_total{_labels(self.labelnames, values)} {_number(child.value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_LabelledMetric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for values, child in sorted(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {cumulative}")
+        return lines
+
+
+# Gauge read at scrape time, for state kept elsewhere.
+class GaugeCallback(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...],
+                 collect: Callable[[], dict[tuple[str, ...], float]]):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for values, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, tuple(map(str, values)))} {_number(value)}")
+        return lines
+
+
+# Counter read at scrape time, for monotonic counts kept elsewhere (cache hits, rejections).
+class CounterCallback(GaugeCallback):
+    kind = "counter"
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for values, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}_total{_labels(self.labelnames, tuple(map(str, values)))} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        # Re-registering a name replaces it, so rebuilding the app swaps its callbacks.
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, labelnames: tuple[str, ...],
+                       collect: Callable[[], dict[tuple[str, ...], float]]) -> GaugeCallback:
+        return self.register(GaugeCallback(name, documentation, labelnames, collect))
+
+    def counter_callback(self, name: str, documentation: str, labelnames: tuple[str, ...],
+                         collect: Callable[[], dict[tuple[str, ...], float]]) -> CounterCallback:
+        return self.register(CounterCallback(name, documentation, labelnames, collect))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # One broken callback must not take the whole scrape down, but it has to be visible.
+                logger.exception("Metric %s failed to render, skipping it", metric.name)
+        return "\n".join(lines) + "\n"
+
+
+def merge_expositions(texts: dict[str, str], label: str) -> str:
+    # One exposition out of several processes' renderings, each sample tagged with its source
+    # under ``label``; HELP/TYPE are kept once per metric and samples grouped under them.
+    headers: dict[str, list[str]] = {}
+    samples: dict[str, list[str]] = {}
+    for source, text in sorted(texts.items()):
+        family = ""
+        extra = f'{label}="{_escape(source)}"'
+        for line in text.splitlines():
+            if line.startswith("#"):
+                parts = line.split(" ", 3)
+                family = parts[2] if len(parts) > 2 else family
+                if parts[1:2] in (["HELP"], ["TYPE"]):
+                    headers.setdefault(family, [])
+                    if len(headers[family]) < 2:
+                        headers[family].append(line)
+                continue
+            if not line:
+                continue
+            head, value = line.rsplit(" ", 1)
+            head = head[:-1] + "," + extra + "}" if head.endswith("}") else head + "{" + extra + "}"
+            samples.setdefault(family, []).append(f"{head} {value}")
+    lines: list[str] = []
+    for family, header in headers.items():
+        lines.extend(header)
+        lines.extend(samples.get(family, []))
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "API request latency by route template and status",
+    ("route", "method", "status"))
+RPC_REQUEST_DURATION = REGISTRY.histogram(
+    "rpc_request_duration_seconds", "JSON-RPC round trips by endpoint, method and outcome",
+    ("endpoint", "method", "outcome"))
+CONTRACT_CALL_DURATION = REGISTRY.histogram(
+    "contract_call_duration_seconds", "Token contract reads by function and outcome",
+    ("function", "outcome"))
+ERRORS = REGISTRY.counter("errors", "Errors by layer and exception class", ("layer", "error"))
+
+
+def outcome(exc: BaseException | None) -> str:
+    return "ok" if exc is None else type(exc).__name__
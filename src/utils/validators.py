@@ -1,14 +1,78 @@
-from web3 import Web3
+from functools import lru_cache
+from typing import Iterable
 
+from eth_utils import keccak
 
-def is_valid_address(address: str) -> bool:
+from src.api.errors import ValidationError
+
+_HEX = frozenset("0123456789abcdefABCDEF")
+
+# Distinct addresses kept parsed; hot holders and watchlists stay resident.
+INTERN_CACHE_SIZE = 65536
+# Invalid entries named in a validate_addresses error; the rest are only counted.
+MAX_LISTED_INVALID = 5
+
+
+# Validated address built only by normalize: str value is the EIP-55 checksum form, raw its 20 bytes.
+class Address(str):
+    raw: bytes
+
+    def __new__(cls, checksum: str, raw: bytes):
+        obj = super().__new__(cls, checksum)
+        obj.raw = raw
+        return obj
+
+
+def _checksum(lower_hex: str) -> str:
+    digest = keccak(text=lower_hex).hex()
+    return "0x" + "".join(c.upper() if d >= "8" else c for c, d in zip(lower_hex, digest))
+
+
+@lru_cache(maxsize=INTERN_CACHE_SIZE)
+def _intern(value: str) -> Address:
+    # Same inputs Web3.is_address accepts: 40 hex digits in any case, optionally 0x-prefixed.
+    body = value[2:] if value[:2] in ("0x", "0X") else value
+    if len(body) != 40 or not _HEX.issuperset(body):
+        raise ValueError(f"Invalid address: {value!r}")
+    lower = body.lower()
+    return Address(_checksum(lower), bytes.fromhex(lower))
+
+
+def normalize(address: str) -> Address:
+    if isinstance(address, Address):
+        return address
     if not isinstance(address, str):
-        return False
+        raise ValueError(f"Invalid address: {address!r}")
+    return _intern(address)
+
+
+def try_normalize(address: object) -> Address | None:
     try:
-        return Web3.is_address(address)
-    except Exception:
-        return False
+        return normalize(address)
+    except ValueError:
+        return None
+
+
+def validate_addresses(addresses: Iterable[object]) -> list[Address]:
+    # One pass; the error names the first few invalid entries and counts the rest.
+    normalized, invalid, more = [], [], 0
+    for address in addresses:
+        canonical = try_normalize(address)
+        if canonical is None:
+            if len(invalid) < MAX_LISTED_INVALID:
+                invalid.append(str(address))
+            else:
+                more += 1
+        normalized.append(canonical)
+    if invalid:
+        listed = ", ".join(invalid) + (f" and {more} more" if more else "")
+        raise ValidationError(f"Invalid Ethereum address: {listed}")
+    return normalized
+
+
+def is_valid_address(address: str) -> bool:
+    return try_normalize(address) is not None
 
 
-def to_checksum(address: str) -> str:
-    return Web3.to_checksum_address(address)
+def to_checksum(address: str) -> Address:
+    return normalize(address)
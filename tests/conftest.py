@@ -20,6 +20,7 @@ def mock_polygon_client():
         return {"address": address, "error": "Invalid address", "success": False}
 
     client.balance_of.side_effect = balance_side_effect
+    client.balance_of_batch.side_effect = lambda addresses: [balance_side_effect(a) for a in addresses]
 
     client.token_info.return_value = {
         "symbol": "TBY",
@@ -37,6 +38,26 @@ def mock_polygon_client():
     return client
 
 
+@pytest.fixture
+def fake_chain():
+    from src.testing.fake_chain import FakeChain
+
+    return FakeChain(balances={
+        "0x0000000000000000000000000000000000000001": 100 * 10 ** 18,
+        "0x0000000000000000000000000000000000000002": 200 * 10 ** 18,
+    })
+
+
+@pytest.fixture
+def polygon_client(fake_chain):
+    from src.testing.fake_chain import fake_session, TOKEN_ADDRESS, MULTICALL_ADDRESS
+    from src.services.polygon_client import PolygonClient
+
+    return PolygonClient(rpc_urls=["http://fake"], contract_address=TOKEN_ADDRESS,
+                         multicall_address=MULTICALL_ADDRESS, session=fake_session(fake_chain),
+                         multicall_deploy_block=0)
+
+
 @pytest.fixture
 def token_service(mock_polygon_client):
     from src.services.token_service import TokenService
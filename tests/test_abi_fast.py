@@ -0,0 +1,62 @@
+import pytest
+from eth_abi import decode, encode
+from web3 import Web3
+
+from config import AppConfig
+from src.services.abi_fast import FastAbi, decode_aggregate3, encode_aggregate3
+
+ADDRESS = Web3.to_checksum_address("0x51f1774249fc2b0c2603542ac6184ae1d048351d")
+TOKEN = Web3.to_checksum_address("0x1a9b54a3075119f1546c52ca0940551a6ce5d2d0")
+
+
+@pytest.fixture(scope="module")
+def cfg():
+    return AppConfig()
+
+
+@pytest.fixture(scope="module")
+def contracts(cfg):
+    w3 = Web3()
+    return (w3.eth.contract(address=TOKEN, abi=cfg.contract.abi),
+            w3.eth.contract(address=cfg.multicall.address, abi=cfg.multicall.abi))
+
+
+def test_compiles_only_static_erc20_reads(cfg):
+    fast = FastAbi(cfg.contract.abi)
+    assert sorted(fast.functions) == ["balanceOf", "decimals", "totalSupply"]
+    assert not fast.supports("symbol")
+
+
+def test_encoding_matches_web3(cfg, contracts):
+    fast = FastAbi(cfg.contract.abi)
+    token, _ = contracts
+    assert fast.encode("balanceOf", ADDRESS) == token.encode_abi("balanceOf", args=[ADDRESS])
+    assert fast.encode("totalSupply") == token.encode_abi("totalSupply")
+    assert fast.encode_many("balanceOf", [(ADDRESS,), (TOKEN,)]) == [
+        token.encode_abi("balanceOf", args=[a]) for a in (ADDRESS, TOKEN)
+    ]
+    with pytest.raises(ValueError):
+        fast.encode("balanceOf")
+
+
+def test_decoding_checks_ranges(cfg):
+    fast = FastAbi(cfg.contract.abi)
+    assert fast.decode("balanceOf", "0x" + encode(["uint256"], [2 ** 255 + 7]).hex()) == 2 ** 255 + 7
+    assert fast.decode("decimals", "0x" + encode(["uint8"], [18]).hex()) == 18
+    with pytest.raises(ValueError):
+        fast.decode("decimals", "0x" + encode(["uint256"], [256]).hex())
+    with pytest.raises(ValueError):
+        fast.decode("totalSupply", "0x")
+
+
+def test_aggregate3_roundtrip_matches_web3(cfg, contracts):
+    fast = FastAbi(cfg.contract.abi)
+    _, multicall = contracts
+    calls = [(TOKEN, True, fast.encode("balanceOf", ADDRESS)), (TOKEN, False, "0x313ce567"), (ADDRESS, True, "0x")]
+    expected = multicall.encode_abi("aggregate3", args=[[(t, f, bytes.fromhex(d[2:])) for t, f, d in calls]])
+    assert encode_aggregate3(calls) == expected
+
+    results = [(True, encode(["uint256"], [5])), (False, b""), (True, b"\x01" * 33)]
+    assert decode_aggregate3("0x" + encode(["(bool,bytes)[]"], [results]).hex()) == results
+    with pytest.raises(ValueError):
+        decode_aggregate3("0x" + encode(["(bool,bytes)[]"], [results]).hex()[:-128])
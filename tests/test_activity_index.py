@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+from src.testing.fake_chain import ZERO
+
+from src.services.activity_index import ActivityIndex
+from src.services.block_times import BlockTimeCache
+from src.services.holder_store import HolderStore
+from src.services.log_ingestor import TransferIngestor
+
+A = "0x00000000000000000000000000000000000000aa"
+B = "0x00000000000000000000000000000000000000bb"
+
+
+def make_index(polygon_client, store, **kwargs):
+    polygon_client.head.interval = 0
+    return ActivityIndex(polygon_client, store, BlockTimeCache(polygon_client, store), **kwargs)
+
+
+def test_activity_is_kept_from_ingested_logs(polygon_client, fake_chain):
+    fake_chain.transfer(ZERO, A, 100, block=1001)
+    fake_chain.transfer(A, B, 10, block=1004)
+    store = HolderStore(":memory:")
+    TransferIngestor(polygon_client, store, start_block=1000).backfill()
+    index = make_index(polygon_client, store)
+
+    activity = index.last_activity([A, B])
+    assert activity[A].block == 1004
+    assert activity[A].tx_hash == fake_chain.logs[1]["transactionHash"]
+    assert activity[B].timestamp == fake_chain.block_timestamp(1004)
+
+    calls = fake_chain.requests["eth_getBlockByNumber"]
+    index.last_activity([A, B])
+    assert fake_chain.requests["eth_getBlockByNumber"] == calls
+
+
+def test_cold_address_is_found_by_backwards_search(polygon_client, fake_chain):
+    fake_chain.transfer(ZERO, A, 100, block=1200)
+    fake_chain.block_number = 5000
+    store = HolderStore(":memory:")
+    index = make_index(polygon_client, store, initial_window=100)
+
+    assert index.last_activity([A])[A].block == 1200
+    assert store.activity([A]) == {A: (1200, fake_chain.logs[0]["transactionHash"])}
+    assert index.last_activity([B], search=False) == {B: None}
+
+
+def test_backwards_search_stops_at_the_floor_and_the_window_cap(polygon_client, fake_chain):
+    fake_chain.transfer(ZERO, A, 100, block=1200)
+    fake_chain.block_number = 5000
+    store = HolderStore(":memory:")
+    assert make_index(polygon_client, store, initial_window=100, floor_block=1500).last_activity([A]) == {A: None}
+    calls = fake_chain.requests["eth_getLogs"]
+    assert make_index(polygon_client, store, initial_window=100, max_windows=3).last_activity([A]) == {A: None}
+    assert fake_chain.requests["eth_getLogs"] - calls == 6
+
+
+def test_top_holders_with_transactions_report_real_dates(polygon_client, fake_chain):
+    from src.services.holder_index import HolderIndex
+    from src.services.token_service import TokenService
+
+    fake_chain.transfer(ZERO, A, 10 ** 18, block=1001)
+    store = HolderStore(":memory:")
+    TransferIngestor(polygon_client, store, start_block=1000).backfill()
+    holder_index = HolderIndex()
+    holder_index.load(store.iter_holders())
+    svc = TokenService(polygon_client, holder_store=store, holder_index=holder_index,
+                       activity_index=make_index(polygon_client, store))
+
+    [(address, balance, date)] = svc.get_top_holders_with_transactions(5)
+    expected = datetime.fromtimestamp(fake_chain.block_timestamp(1001), timezone.utc)
+    assert address.lower() == A
+    assert balance == 1
+    assert date == expected.strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,197 @@
+import asyncio
+import json
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from config import AppConfig
+from src.testing.fake_chain import fake_node_app
+from src.api import async_routes
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+ADDR_2 = "0x0000000000000000000000000000000000000002"
+
+
+def run_with_client(fake_chain, polygon_client, scenario, **service_kwargs):
+    from main import create_async_app
+    from src.services.token_service import TokenService
+
+    async def runner():
+        node = TestServer(fake_node_app(fake_chain))
+        await node.start_server()
+        app = create_async_app(AppConfig(), token_service=TokenService(polygon_client, **service_kwargs),
+                               rpc_urls=[str(node.make_url("/"))])
+        async with TestClient(TestServer(app)) as client:
+            await scenario(client)
+        await node.close()
+
+    asyncio.run(runner())
+
+
+def test_async_get_balance_matches_sync_contract(fake_chain, polygon_client):
+    async def scenario(client):
+        resp = await client.get("/api/get_balance", params={"address": ADDR_1})
+        assert resp.status == 200
+        body = await resp.json()
+        assert body["success"] is True
+        assert body["balance_wei"] == str(100 * 10 ** 18)
+        assert body["block_number"] == 1000
+        assert fake_chain.requests["eth_chainId"] == 0
+
+        resp = await client.get("/api/get_balance", params={"address": "0x123"})
+        assert resp.status == 400
+        assert (await resp.json())["error"] == "Invalid Ethereum address"
+
+    run_with_client(fake_chain, polygon_client, scenario)
+
+
+def test_async_balance_batch_uses_multicall(fake_chain, polygon_client):
+    polygon_client.token_metadata()
+    calls = fake_chain.requests["eth_call"]
+
+    async def scenario(client):
+        resp = await client.post("/api/get_balance_batch", json={"addresses": [ADDR_1, ADDR_2, ADDR_1]})
+        assert resp.status == 200
+        body = await resp.json()
+        assert body["count"] == 3
+        assert [b["balance_formatted"] for b in body["balances"]] == [100, 200, 100]
+        # One aggregate3 eth_call for the whole batch, like the sync server.
+        assert fake_chain.requests["eth_call"] == calls + 1
+
+        resp = await client.post("/api/get_balance_batch", json={})
+        assert resp.status == 400
+
+    run_with_client(fake_chain, polygon_client, scenario)
+
+
+def test_concurrent_async_batches_share_chunks(fake_chain, polygon_client):
+    polygon_client.token_metadata()
+    polygon_client.head.current()
+    calls = fake_chain.requests["eth_call"]
+
+    async def scenario(client):
+        bodies = await asyncio.gather(*(client.post("/api/get_balance_batch", json={"addresses": [ADDR_1, ADDR_2]})
+                                        for _ in range(3)))
+        assert all(resp.status == 200 for resp in bodies)
+        assert fake_chain.requests["eth_call"] == calls + 1
+
+    run_with_client(fake_chain, polygon_client, scenario)
+
+
+def test_async_validation_and_not_found(fake_chain, polygon_client):
+    async def scenario(client):
+        resp = await client.get("/api/get_top", params={"n": "0"})
+        assert resp.status == 400
+        resp = await client.get("/api/get_holders", params={"limit": "abc"})
+        assert resp.status == 400
+        assert await resp.json() == {"error": "Parameter limit must be integer", "success": False}
+        resp = await client.get("/api/nope")
+        assert resp.status == 404
+        assert (await resp.json())["success"] is False
+        resp = await client.get("/api/get_token_info")
+        assert (await resp.json())["symbol"] == "TBY"
+
+    run_with_client(fake_chain, polygon_client, scenario)
+
+
+def test_async_balance_stream(fake_chain, polygon_client):
+    async def scenario(client):
+        body = f"{ADDR_1}\nbad\n{{\"address\": \"{ADDR_2}\"}}\n"
+        resp = await client.post("/api/get_balance_batch_stream", data=body,
+                                 headers={"Content-Type": "application/x-ndjson"})
+        assert resp.status == 200
+        lines = [json.loads(line) for line in (await resp.text()).splitlines()]
+        assert [line["success"] for line in lines] == [True, False, True]
+        assert lines[2]["balance_formatted"] == 200
+
+    run_with_client(fake_chain, polygon_client, scenario)
+
+
+def test_async_metrics_use_route_templates(fake_chain, polygon_client):
+    async def scenario(client):
+        await client.get("/api/get_balance", params={"address": ADDR_2})
+        await client.get("/api/nope")
+        resp = await client.get("/metrics")
+        assert resp.status == 200
+        text = await resp.text()
+        assert 'http_request_duration_seconds_count{route="/api/get_balance",method="GET",status="200"}' in text
+        assert 'route="unmatched",method="GET",status="404"' in text
+
+    run_with_client(fake_chain, polygon_client, scenario)
+
+
+def test_async_balance_carries_etag_and_answers_304(fake_chain, polygon_client):
+    async def scenario(client):
+        first = await client.get("/api/get_balance", params={"address": ADDR_1})
+        etag = first.headers["ETag"]
+        assert etag.startswith('"1000-')
+        posts = fake_chain.http_posts
+        resp = await client.get("/api/get_balance", params={"address": ADDR_1}, headers={"If-None-Match": etag})
+        assert resp.status == 304
+        assert resp.headers["Cache-Control"] == "public, max-age=2"
+        assert fake_chain.http_posts == posts
+
+    run_with_client(fake_chain, polygon_client, scenario)
+
+
+def test_async_watch_balances_pushes_updates(fake_chain, polygon_client):
+    from src.services.watchlist import WatchHub
+
+    async def scenario(client):
+        svc = client.app[async_routes.TOKEN_SERVICE].service
+        svc.watch_hub = hub = WatchHub(polygon_client, keepalive=5)
+        resp = await client.get("/api/watch_balances", params={"addresses": ADDR_1})
+        assert resp.headers["Content-Type"] == "text/event-stream"
+        initial = await resp.content.readuntil(b"\n\n")
+        assert b'"balance_formatted": 100.0' in initial
+
+        fake_chain.transfer(ADDR_1, ADDR_2, 40 * 10 ** 18, block=1001)
+        await asyncio.to_thread(hub.on_transfers, 1001, 1001, {ADDR_1.lower()})
+        update = await resp.content.readuntil(b"\n\n")
+        assert update.startswith(b"event: balances\nid: 1001\n")
+        assert b'"balance_formatted": 60.0' in update
+        resp.close()
+
+    run_with_client(fake_chain, polygon_client, scenario)
+
+
+def test_async_export_holders_streams_csv(fake_chain, polygon_client):
+    from src.services.holder_store import HolderStore
+
+    store = HolderStore(":memory:")
+    store.apply({900: {ADDR_1: 5, ADDR_2: 7}}, {}, 900, 1000)
+
+    async def scenario(client):
+        resp = await client.get("/api/export_holders", params={"format": "csv"})
+        assert resp.status == 200
+        assert resp.headers["X-Block-Number"] == "900"
+        assert (await resp.text()).splitlines() == ["address,balance_wei,last_block", f"{ADDR_1},5,900",
+                                                    f"{ADDR_2},7,900"]
+        resp = await client.get("/api/export_holders", params={"format": "csv", "block": "1"})
+        assert resp.status == 400
+
+    run_with_client(fake_chain, polygon_client, scenario, holder_store=store, export_batch_size=1)
+
+
+def test_async_and_flask_share_error_replies(fake_chain, polygon_client):
+    from flask import Flask
+    from src.api.routes import api_bp
+    from src.services.token_service import TokenService
+
+    flask_app = Flask(__name__)
+    flask_app.token_service = TokenService(polygon_client)
+    flask_app.register_blueprint(api_bp, url_prefix="/api")
+    flask_client = flask_app.test_client()
+    cases = [("get", "/api/get_balance", {}), ("get", "/api/get_top", {"n": "x"}),
+             ("get", "/api/get_holders_in_band", {}), ("get", "/api/get_ingest_status", {}),
+             ("post", "/api/get_balance_batch", {"addresses": [ADDR_1, "0x12"]}),
+             ("post", "/api/get_balance_matrix", {"addresses": [ADDR_1]})]
+
+    async def scenario(client):
+        for method, path, params in cases:
+            if method == "get":
+                resp, expected = await client.get(path, params=params), flask_client.get(path, query_string=params)
+            else:
+                resp, expected = await client.post(path, json=params), flask_client.post(path, json=params)
+            assert (resp.status, await resp.json()) == (expected.status_code, expected.get_json()), path
+
+    run_with_client(fake_chain, polygon_client, scenario)
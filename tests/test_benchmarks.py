@@ -0,0 +1,48 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from benchmarks.baseline import regressions
+from benchmarks.decode import run as run_decode
+from benchmarks.fake_node import NodeProfile, build_app, holder_address, synthetic_chain
+from benchmarks.load import percentile, summarize
+
+
+def test_summary_reports_percentiles_and_failures():
+    samples = [("get_balance", 200, i / 1000) for i in range(1, 101)] + [("get_balance", 429, 0.5), ("x", None, 1.0)]
+    report = summarize(samples, elapsed=2.0)
+    assert report["get_balance"]["requests"] == 101
+    assert report["get_balance"]["throttled"] == 1
+    assert report["get_balance"]["p50_ms"] == 51.0
+    assert report["get_balance"]["p99_ms"] == 100.0
+    assert report["x"]["errors"] == 1
+    assert percentile([], 95) == 0.0
+
+
+def test_regressions_respect_direction_and_tolerance():
+    baseline = {"a": {"rps": 100, "p95_ms": 10}}
+    assert regressions({"a": {"rps": 90, "p95_ms": 11}}, baseline, {"rps": True, "p95_ms": False}, 0.25) == []
+    found = regressions({"a": {"rps": 50, "p95_ms": 20}}, baseline, {"rps": True, "p95_ms": False}, 0.25)
+    assert found == ["a.rps: 100 -> 50 (-50%)", "a.p95_ms: 10 -> 20 (+100%)"]
+
+
+def test_fake_node_serves_synthetic_holders_and_injects_429():
+    chain = synthetic_chain(50)
+    assert len(chain.balances) == 50
+    assert holder_address(3) in chain.balances
+
+    async def scenario():
+        async with TestClient(TestServer(build_app(chain, NodeProfile(latency=0, jitter=0, rate_429=1.0)))) as client:
+            resp = await client.post("/any", json={"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber"})
+            assert resp.status == 429
+            assert resp.headers["Retry-After"] == "1"
+            stats = await (await client.get("/_stats")).json()
+            assert stats["rate_limited"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_decode_benchmark_paths_agree():
+    results = run_decode(rounds=2, batch_size=20, holders=5)
+    assert set(results) == {"web3_process_log_20", "per_log_20", "bulk_20"}
+    assert all(row["logs_per_sec"] > 0 for row in results.values())
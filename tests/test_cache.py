@@ -0,0 +1,114 @@
+import threading
+
+from src.services.cache import BalanceCache, HeadTracker, SwrValue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_swr_value_serves_fresh_then_stale_then_reloads():
+    clock = FakeClock()
+    loads = []
+    refreshed = threading.Event()
+
+    def loader():
+        loads.append(clock.now)
+        if len(loads) == 2:
+            refreshed.set()
+        return len(loads)
+
+    value = SwrValue(loader, ttl=10, stale_ttl=60, clock=clock)
+    assert value.get() == 1
+    clock.now = 5
+    assert value.get() == 1
+    clock.now = 20
+    # stale: old value is served while a refresh runs in the background
+    assert value.get() == 1
+    assert refreshed.wait(1)
+    assert value.get() == 2
+    clock.now = 200
+    assert value.get() == 3
+
+
+def test_swr_value_keeps_stale_value_when_refresh_fails():
+    clock = FakeClock()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("rpc down")
+        return "v1"
+
+    value = SwrValue(loader, ttl=1, stale_ttl=100, clock=clock)
+    assert value.get() == "v1"
+    clock.now = 5
+    value._refreshing = True
+    value._refresh()
+    assert not value._refreshing
+    assert value.get() == "v1"
+    assert len(calls) >= 2
+
+
+def test_head_tracker_fetches_once_per_interval_and_never_goes_back():
+    clock = FakeClock()
+    heads = iter([10, 10, 12, 11])
+    tracker = HeadTracker(lambda: next(heads), interval=2, clock=clock)
+    assert tracker.current() == 10
+    clock.now = 1
+    assert tracker.current() == 10
+    clock.now = 3
+    assert tracker.current() == 10
+    clock.now = 6
+    assert tracker.current() == 12
+    clock.now = 9
+    assert tracker.current() == 12
+
+
+def test_balance_cache_lru_and_block_keys():
+    cache = BalanceCache(maxsize=2)
+    cache.put("a", 1, 100)
+    cache.put("b", 1, 200)
+    assert cache.get("a", 1) == 100
+    cache.put("c", 1, 300)
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 2) is None
+    assert cache.get("a", 1) is None
+    cache.put("c", 2, 301)
+    cache.rekey(3, 3, touched={"x"})
+    assert cache.get("c", 3) == 301
+    assert cache.stats() == {"size": 1, "maxsize": 2, "hits": 2, "misses": 3, "evictions": 1, "invalidations": 1}
+
+
+def test_balance_cache_rekey_only_carries_entries_covered_by_the_range():
+    cache = BalanceCache(maxsize=10)
+    cache.put("fresh", 9, 1)
+    cache.put("old", 5, 2)
+    cache.put("moved", 9, 3)
+    cache.rekey(10, 12, touched={"moved"})
+    assert cache.get("fresh", 12) == 1
+    assert cache.get("old", 12) is None
+    assert cache.get("moved", 12) is None
+
+
+def test_balance_cache_rekey_carries_entries_across_contiguous_ranges():
+    cache = BalanceCache(maxsize=10)
+    cache.put("a", 9, 1)
+    cache.put("b", 9, 2)
+    cache.rekey(10, 12, touched=set())
+    cache.rekey(13, 15, touched={"b"})
+    assert cache.get("a", 15) == 1
+    assert cache.get("b", 15) is None
+    # A late read at an already carried block may predate a dropped change, so it is not cached.
+    cache.put("b", 11, 5)
+    assert cache.get("b", 15) is None
+    cache.put("b", 15, 6)
+    assert cache.get("b", 15) == 6
+    # A gap in the ingested ranges stops the carry.
+    cache.rekey(20, 21, touched=set())
+    assert cache.get("a", 21) is None
@@ -0,0 +1,115 @@
+import time
+
+from src.testing.fake_chain import FakeChain, fake_session
+
+from src.services.endpoint_pool import EndpointPool
+from src.services.rpc_transport import RpcTransport
+
+URLS = ["http://a", "http://b", "http://c"]
+
+
+def make_pool(behaviour, **kwargs):
+    chain = FakeChain()
+    session = fake_session(chain, behaviour)
+    transports = [RpcTransport(url, session, timeout=1, batch_max_size=2) for url in URLS]
+    kwargs.setdefault("explore_ratio", 0)
+    return EndpointPool(transports, **kwargs), session.get_adapter("http://a")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fails_over_trips_breaker_and_probes_back():
+    clock = FakeClock()
+    behaviour = {"http://a": "down"}
+    pool, adapter = make_pool(behaviour, breaker_threshold=1, breaker_backoff=10, clock=clock)
+    for _ in range(3):
+        assert pool.request("eth_blockNumber")["result"] == hex(1000)
+    stats = {s["endpoint"]: s for s in pool.stats()}
+    assert stats["a"]["failures"] == 1
+    assert stats["a"]["circuit_open"] is True
+    assert adapter.posts_by_url["http://a"] == 1
+
+    # after the backoff a single probe goes to the recovered endpoint and closes the breaker
+    del behaviour["http://a"]
+    clock.now += 11
+    pool.request("eth_blockNumber")
+    assert adapter.posts_by_url["http://a"] == 2
+    assert pool.endpoints[0].backoff == 0
+
+
+def test_rate_limited_endpoint_is_parked():
+    pool, adapter = make_pool({"http://a": "429"})
+    pool.request("eth_blockNumber")
+    pool.request("eth_blockNumber")
+    stats = {s["endpoint"]: s for s in pool.stats()}
+    assert stats["a"]["rate_limited"] == 1
+    assert stats["a"]["circuit_open"] is True
+    assert adapter.posts_by_url["http://a"] == 1
+
+
+def test_routes_to_fastest_endpoint():
+    pool, adapter = make_pool({"http://a": 0.03, "http://b": 0.01}, default_latency=0.001)
+    for _ in range(20):
+        pool.request("eth_blockNumber")
+    assert adapter.posts_by_url["http://c"] > adapter.posts_by_url["http://a"]
+    assert adapter.posts_by_url["http://c"] > adapter.posts_by_url["http://b"]
+
+
+def test_hedged_request_beats_slow_primary():
+    pool, adapter = make_pool({"http://a": 0.5}, hedge=True, hedge_min_delay=0.02, default_latency=0.001)
+    pool.endpoints[0].latency_ewma = 0.0001
+    start = time.perf_counter()
+    assert pool.request("eth_blockNumber")["result"] == hex(1000)
+    assert time.perf_counter() - start < 0.4
+    assert pool.hedged_requests == 1
+
+
+def test_failover_retries_a_backup_that_was_never_hedged_to():
+    pool, adapter = make_pool({"http://a": "down"}, hedge=True, hedge_min_delay=5, breaker_threshold=10)
+    assert pool.request("eth_blockNumber")["result"] == hex(1000)
+    assert pool.hedged_requests == 0
+    assert adapter.posts_by_url.get("http://b") == 1
+    assert adapter.posts_by_url.get("http://c") is None
+
+
+def test_outcomes_recorded_outside_the_pool_drive_the_breaker():
+    clock = FakeClock()
+    pool, _ = make_pool({}, breaker_threshold=2, breaker_backoff=10, clock=clock)
+    pool.record("http://a", 0.01, ConnectionError("reset"))
+    pool.record("http://a", 0.01, ConnectionError("reset"))
+    pool.record("http://unknown", 0.01, ConnectionError("reset"))
+    assert [e.url for e in pool.ranked()] == ["http://b", "http://c"]
+    clock.now += 11
+    pool.record("http://a", 0.01)
+    assert pool.endpoints[0].backoff == 0 and pool.endpoints[0].failures == 2
+
+
+def test_batch_is_spread_across_endpoints():
+    pool, adapter = make_pool({})
+    results = pool.batch([("eth_blockNumber", [])] * 6)
+    assert [r.result for r in results] == [hex(1000)] * 6
+    assert sorted(adapter.posts_by_url.values()) == [1, 1, 1]
+
+
+def test_budget_moves_traffic_to_endpoints_with_tokens_left():
+    clock = FakeClock()
+    pool, adapter = make_pool({}, rate=1, burst=1, clock=clock)
+    for _ in range(3):
+        pool.request("eth_blockNumber")
+    assert sorted(adapter.posts_by_url.values()) == [1, 1, 1]
+    assert all(s["budget_tokens"] == 0 for s in pool.stats())
+
+
+def test_saturated_pool_sends_inline_without_hedging():
+    pool, adapter = make_pool({"http://a": 0.01, "http://b": 0.01}, hedge=True, hedge_min_delay=0.001, workers=1)
+    assert pool._slots.acquire(blocking=False)
+    assert pool.request("eth_blockNumber")["result"] == hex(1000)
+    assert pool.hedged_requests == 0
+    assert len(pool.batch([("eth_blockNumber", [])] * (2 * pool.batch_max_size + 1))) == 2 * pool.batch_max_size + 1
+    pool._slots.release()
@@ -0,0 +1,75 @@
+import pytest
+
+from src.api.errors import ValidationError
+from src.services.block_times import BlockTimeCache
+from src.services.history import HistoricalQueries
+from src.services.holder_store import HolderStore
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+ADDR_2 = "0x0000000000000000000000000000000000000002"
+
+
+@pytest.fixture
+def store():
+    return HolderStore(":memory:")
+
+
+def make_history(client, store, depth=100):
+    return HistoricalQueries(client, store, BlockTimeCache(client, store), finality_depth=depth)
+
+
+def test_block_at_resolves_timestamp_and_persists(polygon_client, fake_chain, store):
+    history = make_history(polygon_client, store)
+    ts = fake_chain.block_timestamp(300) + 1
+    assert history.block_at(ts) == 300
+    assert history.block_at(fake_chain.block_timestamp(301)) == 301
+    assert history.block_at(fake_chain.block_timestamp(2000)) == 1000
+    with pytest.raises(ValidationError):
+        history.block_at(1)
+
+    # a fresh process reuses the stored resolution without any header lookups
+    fresh = make_history(polygon_client, store)
+    before = fake_chain.requests["eth_getBlockByNumber"]
+    assert fresh.block_at(ts) == 300
+    assert fake_chain.requests["eth_getBlockByNumber"] == before
+
+
+def test_final_snapshot_is_served_from_disk(polygon_client, fake_chain, store):
+    history = make_history(polygon_client, store)
+    first = history.balances([ADDR_1, "bad", ADDR_2], 500)
+    assert [r["success"] for r in first] == [True, False, True]
+    assert first[0]["block_number"] == 500
+    info = history.token_info(500)
+    assert info["totalSupply"] == str(300 * 10 ** 18) and info["block_number"] == 500
+
+    before = sum(fake_chain.requests.values())
+    again = make_history(polygon_client, store)
+    assert again.balances([ADDR_1, "bad", ADDR_2], 500) == first
+    assert again.token_info(500) == info
+    assert sum(fake_chain.requests.values()) == before
+
+
+def test_recent_blocks_are_not_cached(polygon_client, fake_chain, store):
+    history = make_history(polygon_client, store)
+    history.balances([ADDR_1], 950)
+    kind = f"balanceOf:{polygon_client.contract_address}"
+    assert store.historical(kind, 950, [polygon_client.w3.to_checksum_address(ADDR_1)]) == {}
+    with pytest.raises(ValidationError):
+        history.balances([ADDR_1], 5000)
+
+
+def test_final_reads_are_scoped_to_the_token(polygon_client, fake_chain, store):
+    make_history(polygon_client, store).balances([ADDR_1], 500)
+    other = polygon_client.for_token("0x00000000000000000000000000000000000000ff")
+    result = make_history(other, store).balances([ADDR_1], 500)
+    assert result[0]["success"] is False
+
+
+def test_blocks_before_multicall3_use_plain_calls(polygon_client, fake_chain, store):
+    # No Multicall3 at this address: any aggregate3 call reverts.
+    polygon_client.multicall_address = "0x00000000000000000000000000000000000000ee"
+    polygon_client.multicall_deploy_block = 600
+    history = make_history(polygon_client, store)
+    result = history.balances([ADDR_1, ADDR_2], 500)
+    assert [r["balance_formatted"] for r in result] == [100, 200]
+    assert history.balances([ADDR_1], 700)[0]["success"] is False
@@ -0,0 +1,86 @@
+import csv
+import io
+
+import pytest
+from flask import Flask
+
+from src.api.routes import api_bp
+from src.services.holder_export import export_holders
+from src.services.holder_store import HolderStore
+from src.services.token_service import TokenService
+
+
+def addr(i: int) -> str:
+    return "0x" + f"{i:040x}"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HolderStore(tmp_path / "holders.sqlite3")
+    store.apply({100: {addr(i): i * 10 ** 18 for i in range(1, 6)}, 120: {addr(7): 2 ** 200}}, {}, 120, 200)
+    return store
+
+
+@pytest.fixture
+def client(polygon_client, store):
+    app = Flask(__name__)
+    app.token_service = TokenService(polygon_client, holder_store=store, export_batch_size=2)
+    app.register_blueprint(api_bp, url_prefix="/api")
+    return app.test_client()
+
+
+def test_csv_export_streams_every_holder(client):
+    resp = client.get("/api/export_holders", query_string={"format": "csv"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+    assert resp.headers["X-Block-Number"] == "120"
+    assert 'filename="holders_120.csv"' in resp.headers["Content-Disposition"]
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [row["address"] for row in rows] == [addr(i) for i in (1, 2, 3, 4, 5, 7)]
+    assert rows[0]["balance_wei"] == str(10 ** 18) and rows[0]["last_block"] == "100"
+    assert rows[-1]["balance_wei"] == str(2 ** 200) and rows[-1]["last_block"] == "120"
+
+
+def test_export_params_are_validated(client):
+    assert client.get("/api/export_holders", query_string={"format": "xml"}).status_code == 400
+    resp = client.get("/api/export_holders", query_string={"format": "csv", "block": "110"})
+    assert resp.status_code == 400
+    assert "120" in resp.get_json()["error"]
+
+
+def test_snapshot_ignores_writes_made_during_the_export(store):
+    block, chunks = export_holders(store, "csv", batch_size=2)
+    first = next(chunks)
+    store.apply({130: {addr(1): -10 ** 18, addr(9): 1}}, {}, 130, 200)
+    text = (first + b"".join(chunks)).decode()
+    assert block == 120
+    assert addr(1) in text and addr(9) not in text
+    assert export_holders(store, "csv", batch_size=2)[0] == 130
+
+
+def test_arrow_and_parquet_exports_write_one_batch_per_chunk(client):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    resp = client.get("/api/export_holders", query_string={"format": "arrow"})
+    reader = pa.ipc.open_stream(resp.get_data())
+    assert reader.schema.metadata[b"block_number"] == b"120"
+    table = reader.read_all()
+    assert table.num_rows == 6 and len(table.to_batches()) == 3
+    assert table.column("address")[0].as_py() == bytes.fromhex(addr(1)[2:])
+    assert int(table.column("balance_wei")[5].as_py()) == 2 ** 200
+
+    resp = client.get("/api/export_holders", query_string={"format": "parquet"})
+    parquet = pq.ParquetFile(io.BytesIO(resp.get_data()))
+    assert parquet.metadata.num_row_groups == 3
+    assert parquet.read().column("last_block").to_pylist() == [100] * 5 + [120]
+
+
+def test_arrow_export_falls_back_to_binary_for_wide_balances(store):
+    pa = pytest.importorskip("pyarrow")
+    store.apply({130: {addr(8): 2 ** 256 - 1}}, {}, 130, 200)
+    block, chunks = export_holders(store, "arrow", batch_size=2)
+    table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+    assert table.schema.field("balance_wei").type == pa.binary(32)
+    balances = [int.from_bytes(value, "big") for value in table.column("balance_wei").to_pylist()]
+    assert balances == [i * 10 ** 18 for i in range(1, 6)] + [2 ** 200, 2 ** 256 - 1]
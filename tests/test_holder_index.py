@@ -0,0 +1,54 @@
+import random
+
+from src.services.holder_index import HolderIndex, RankedKeys
+
+
+def addr(i: int) -> str:
+    return "0x" + f"{i:040x}"
+
+
+def test_ranked_keys_match_sorted_reference():
+    rng = random.Random(7)
+    keys = RankedKeys(load=8)
+    reference = []
+    for _ in range(3000):
+        if reference and rng.random() < 0.4:
+            key = rng.choice(reference)
+            reference.remove(key)
+            keys.remove(key)
+        else:
+            key = rng.randrange(500)
+            reference.append(key)
+            keys.add(key)
+        reference.sort()
+    assert len(keys) == len(reference)
+    assert list(keys.iter_desc(len(keys) - 1)) == reference[::-1]
+    for probe in range(0, 500, 17):
+        assert keys.bisect_left(probe) == sum(1 for k in reference if k < probe)
+        assert keys.bisect_right(probe) == sum(1 for k in reference if k <= probe)
+
+
+def test_holder_index_top_rank_band_and_pages():
+    index = HolderIndex(load=4)
+    index.load((addr(i), i * 10) for i in range(1, 51))
+    assert index.top(3) == [(addr(50), 500), (addr(49), 490), (addr(48), 480)]
+    assert index.top(2, offset=1) == [(addr(49), 490), (addr(48), 480)]
+    assert index.rank(addr(50)) == 1
+    assert index.rank(addr(1)) == 50
+
+    index.update(addr(1), 10_000)
+    index.update(addr(50), 0)
+    assert index.rank(addr(1)) == 1
+    assert index.rank(addr(50)) is None
+    assert len(index) == 49
+
+    assert index.band(200, 250, limit=10) == [(addr(i), i * 10) for i in (25, 24, 23, 22, 21, 20)]
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = index.page(cursor, limit=10)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert seen == index.top(100)
+    assert len(seen) == 49
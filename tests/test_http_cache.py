@@ -0,0 +1,104 @@
+import pytest
+from flask import Flask
+
+from src.api.http_cache import IMMUTABLE, ResponseCache, etag_matches
+from src.api.routes import api_bp
+from src.services.history import HistoricalQueries
+from src.services.block_times import BlockTimeCache
+from src.services.holder_store import HolderStore
+from src.services.snapshots import SnapshotRefresher
+from src.services.token_service import TokenService
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+
+
+@pytest.fixture
+def app(polygon_client, tmp_path):
+    store = HolderStore(tmp_path / "holders.sqlite3")
+    app = Flask(__name__)
+    app.token_service = TokenService(polygon_client, holder_store=store,
+                                     history=HistoricalQueries(polygon_client, store, BlockTimeCache(polygon_client, store),
+                                                               finality_depth=100))
+    app.response_cache = ResponseCache(16, max_age=2)
+    app.register_blueprint(api_bp, url_prefix="/api")
+    return app
+
+
+def test_etag_matching():
+    assert etag_matches('"1-a", W/"2-b"', '"2-b"')
+    assert etag_matches("*", '"1-a"')
+    assert not etag_matches(None, '"1-a"')
+    assert not etag_matches('"1-b"', '"1-a"')
+
+
+def test_balance_is_served_from_cache_and_revalidated_without_rpc(app, fake_chain):
+    client = app.test_client()
+    first = client.get("/api/get_balance", query_string={"address": ADDR_1})
+    assert first.status_code == 200
+    assert first.headers["ETag"].startswith('"1000-')
+    assert first.headers["Cache-Control"] == "public, max-age=2"
+
+    fake_chain.http_posts = 0
+    again = client.get("/api/get_balance", query_string={"address": ADDR_1})
+    assert again.get_data() == first.get_data()
+    not_modified = client.get("/api/get_balance", query_string={"address": ADDR_1},
+                              headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b""
+    assert fake_chain.http_posts == 0
+    assert app.response_cache.stats() == {"size": 1, "hits": 2, "misses": 0, "not_modified": 1}
+
+
+def test_new_head_changes_the_etag(app, fake_chain, polygon_client):
+    client = app.test_client()
+    polygon_client.head.current()
+    first = client.get("/api/get_token_info")
+    assert first.headers["ETag"].startswith('"1000-')
+    polygon_client.head._fetched_at = 0
+    fake_chain.block_number = 1001
+    polygon_client.head.current()
+    second = client.get("/api/get_token_info", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"].startswith('"1001-')
+
+
+def test_final_historical_blocks_are_immutable(app):
+    client = app.test_client()
+    resp = client.get("/api/get_balance", query_string={"address": ADDR_1, "block": "800"})
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"] == IMMUTABLE
+    recent = client.get("/api/get_balance", query_string={"address": ADDR_1, "block": "950"})
+    assert recent.headers["Cache-Control"] == "public, max-age=2"
+
+
+def test_top_is_keyed_by_index_checkpoint_and_errors_are_not_cached(app):
+    client = app.test_client()
+    assert "ETag" not in client.get("/api/get_top").headers
+    app.token_service.holder_store.apply({}, {}, 990, 990)
+    app.token_service.on_transfers(1, 990, set())
+    assert client.get("/api/get_top").headers["ETag"].startswith('"990-')
+    assert "ETag" not in client.get("/api/get_balance", query_string={"address": "0x12"}).headers
+
+
+def test_lagging_snapshot_is_tagged_with_its_own_block(app, fake_chain, polygon_client):
+    svc = app.token_service
+    svc.holder_store.apply({}, {}, 990, 990)
+    svc.on_transfers(1, 990, set())
+    svc.snapshots = SnapshotRefresher(svc)
+    svc.snapshots.refresh()
+    # The index and the head move on before the next refresh pass.
+    svc.holder_store.apply({}, {}, 995, 995)
+    svc.on_transfers(991, 995, set())
+    polygon_client.head._fetched_at = 0
+    fake_chain.block_number = 1001
+    polygon_client.head.current()
+
+    client = app.test_client()
+    top = client.get("/api/get_top")
+    assert top.headers["ETag"].startswith('"990-') and top.get_json()["block_number"] == 990
+    info = client.get("/api/get_token_info")
+    assert info.headers["ETag"].startswith('"1000-') and info.get_json()["block_number"] == 1000
+    # Stored under the snapshot blocks, so lookups at the newer ones never return them.
+    assert app.response_cache.stats()["hits"] == 0
+    client.get("/api/get_top")
+    assert app.response_cache.stats()["hits"] == 0
@@ -0,0 +1,73 @@
+from src.testing.fake_chain import ZERO
+
+from src.services.holder_store import HolderStore
+from src.services.log_ingestor import TransferIngestor
+from src.services.token_service import TokenService
+
+A = "0x00000000000000000000000000000000000000aa"
+B = "0x00000000000000000000000000000000000000bb"
+C = "0x00000000000000000000000000000000000000cc"
+
+
+def make_ingestor(polygon_client, **kwargs):
+    polygon_client.head.interval = 0
+    return TransferIngestor(polygon_client, HolderStore(":memory:"), start_block=1000, **kwargs)
+
+
+def test_backfill_builds_holder_balances(polygon_client, fake_chain):
+    fake_chain.transfer(ZERO, A, 500, block=1001)
+    fake_chain.transfer(A, B, 200, block=1010)
+    fake_chain.transfer(A, C, 50, block=1050)
+    fake_chain.transfer(C, ZERO, 50, block=1060)
+    fake_chain.max_log_range = 16
+    ingestor = make_ingestor(polygon_client, chunk_size=100)
+
+    assert ingestor.backfill() == 1060
+    assert ingestor.store.top(10) == [(A, 250), (B, 200)]
+    assert ingestor.chunk_size <= 20
+    stats = ingestor.stats()
+    assert stats["logs_ingested"] == 4
+    assert stats["lag_blocks"] == 0
+    assert stats["holders"] == 2
+
+
+def test_resumes_from_checkpoint(polygon_client, fake_chain):
+    fake_chain.transfer(ZERO, A, 100, block=1001)
+    ingestor = make_ingestor(polygon_client)
+    ingestor.backfill()
+    fake_chain.transfer(A, B, 40, block=1005)
+    assert ingestor.step() == 1005
+    assert ingestor.store.top(10) == [(A, 60), (B, 40)]
+
+
+def test_reorg_rolls_back_and_reapplies(polygon_client, fake_chain):
+    fake_chain.transfer(ZERO, A, 100, block=1001)
+    fake_chain.transfer(A, B, 30, block=1003)
+    ingestor = make_ingestor(polygon_client)
+    ingestor.backfill()
+    assert ingestor.store.balance(B) == 30
+
+    # block 1003 is replaced: the transfer now goes to C instead of B
+    fake_chain.logs.pop()
+    fake_chain.block_hashes[1003] = "0x" + "ee" * 32
+    fake_chain.transfer(A, C, 30, block=1003)
+    ingestor.step()
+    assert ingestor.store.balance(B) == 0
+    assert ingestor.store.balance(C) == 30
+    assert ingestor.stats()["reorgs"] == 1
+
+
+def test_cached_balances_are_carried_over_ranges_that_do_not_touch_them(polygon_client, fake_chain):
+    fake_chain.transfer(ZERO, A, 100, block=1001)
+    ingestor = make_ingestor(polygon_client)
+    ingestor.subscribe(TokenService(polygon_client, holder_store=ingestor.store).on_transfers)
+    ingestor.backfill()
+    polygon_client.balance_of_batch([A, B])
+
+    fake_chain.transfer(ZERO, B, 5, block=1003)
+    ingestor.step()
+    hits = polygon_client.balance_cache.hits
+    assert polygon_client.balance_of(A)["block_number"] == 1003
+    assert polygon_client.balance_cache.hits == hits + 1
+    assert polygon_client.balance_of(B)["balance_wei"] == "5"
+    assert polygon_client.balance_cache.hits == hits + 1
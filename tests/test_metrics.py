@@ -0,0 +1,80 @@
+import time
+
+from flask import Flask
+
+from src.api.metrics import WorkerMetrics, install_flask_metrics, register_service_metrics
+from src.api.routes import api_bp
+from src.services.shared_cache import SharedCache
+from src.services.token_service import TokenService
+from src.utils import metrics
+from src.utils.metrics import Registry
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+
+
+def test_histogram_and_counter_text_format():
+    registry = Registry()
+    latency = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0))
+    errors = registry.counter("op_errors", "Op errors", ("error",))
+    latency.labels("read").observe(0.05)
+    latency.labels("read").observe(0.5)
+    latency.labels("read").observe(5)
+    errors.labels('Bad"Thing').inc()
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="1"} 2' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 3' in text
+    assert 'op_seconds_count{op="read"} 3' in text
+    assert 'op_errors_total{error="Bad\\"Thing"} 1' in text
+
+
+def test_broken_gauge_is_logged_and_skipped(monkeypatch):
+    logged = []
+    monkeypatch.setattr(metrics.logger, "exception", lambda msg, *args: logged.append(msg % args))
+    registry = Registry()
+    registry.gauge_callback("broken", "Always fails", (), lambda: 1 / 0)
+    registry.counter("ok", "Still rendered").inc()
+    text = registry.render()
+    assert "broken" not in text and "ok_total 1" in text
+    assert logged == ["Metric broken failed to render, skipping it"]
+
+
+def test_metrics_endpoint_covers_routes_rpc_and_caches(polygon_client):
+    app = Flask(__name__)
+    app.token_service = TokenService(polygon_client)
+    app.register_blueprint(api_bp, url_prefix="/api")
+    install_flask_metrics(app)
+    register_service_metrics(app.token_service)
+    client = app.test_client()
+    client.get("/api/get_balance", query_string={"address": ADDR_1})
+    client.get("/api/get_balance", query_string={"address": ADDR_1})
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain; version=0.0.4")
+    text = resp.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{route="/api/get_balance",method="GET",status="200"}' in text
+    assert 'contract_call_duration_seconds_count{function="balanceOf",outcome="ok"}' in text
+    assert 'rpc_request_duration_seconds_count{endpoint="fake",method="eth_call",outcome="ok"}' in text
+    assert "# TYPE balance_cache_events counter" in text
+    assert 'balance_cache_events_total{event="hits"} 1' in text
+    assert "# TYPE balance_cache_entries gauge" in text and "balance_cache_entries 1" in text
+    assert 'rpc_scheduler_calls_total{outcome="admitted"}' in text and "rpc_scheduler_queue_depth 0" in text
+    assert ADDR_1[2:] not in text.lower()
+
+
+def test_prefork_workers_are_scraped_together(tmp_path):
+    shared = SharedCache(tmp_path / "shared.sqlite3")
+    other = Registry()
+    other.counter("errors", "Errors by layer and exception class", ("layer", "error")).labels("api", "X").inc(3)
+    shared.put_json("metrics:1", {"at": time.time(), "text": other.render()})
+    shared.put_json("metrics:2", {"at": time.time() - 60, "text": other.render()})
+    metrics.ERRORS.labels("rpc", "Y").inc()
+
+    text = WorkerMetrics(shared, 0).render()
+    assert text.count("# TYPE errors counter") == 1
+    assert 'errors_total{layer="api",error="X",worker="1"} 3' in text
+    assert 'errors_total{layer="rpc",error="Y",worker="0"}' in text
+    # Worker 2 stopped publishing a minute ago.
+    assert 'worker="2"' not in text
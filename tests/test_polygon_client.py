@@ -19,3 +19,66 @@ def test_top_holders(mock_polygon_client):
 def test_top_holders_with_transactions(mock_polygon_client):
     holders = mock_polygon_client.get_top_holders_with_transactions(1)
     assert holders == [("0x0000000000000000000000000000000000000001", 100, "2025-11-22")]
+
+
+def test_balance_of_batch_uses_multicall(polygon_client, fake_chain):
+    addresses = [
+        "0x0000000000000000000000000000000000000001",
+        "0x0000000000000000000000000000000000000002",
+        "0x0000000000000000000000000000000000000003",
+    ]
+    polygon_client.token_metadata()
+    polygon_client.head.current()
+    fake_chain.requests.clear()
+    fake_chain.http_posts = 0
+    res = polygon_client.balance_of_batch(addresses)
+    assert [r["balance_formatted"] for r in res] == [100, 200, 0]
+    assert all(r["success"] for r in res)
+    assert fake_chain.requests["eth_call"] == 1
+    assert fake_chain.http_posts == 1
+
+
+def test_balance_of_batch_chunks_and_keeps_failures(polygon_client, fake_chain):
+    fake_chain.reverting.add("0x0000000000000000000000000000000000000002")
+    polygon_client.multicall_chunk_size = 1
+    addresses = [
+        "0x0000000000000000000000000000000000000001",
+        "0x0000000000000000000000000000000000000002",
+        "not-an-address",
+        "0x0000000000000000000000000000000000000001",
+    ]
+    res = polygon_client.balance_of_batch(addresses)
+    assert res[0]["success"] is True
+    assert res[1] == {"address": addresses[1], "error": "Contract call failed", "success": False}
+    assert res[2] == {"address": "not-an-address", "error": "Invalid address", "success": False}
+    assert res[3]["balance_wei"] == str(100 * 10 ** 18)
+    # three metadata calls plus one aggregate3 chunk per distinct address
+    assert fake_chain.requests["eth_call"] == 5
+
+
+def test_metadata_is_fetched_once(polygon_client, fake_chain):
+    polygon_client.balance_of("0x0000000000000000000000000000000000000001")
+    polygon_client.balance_of("0x0000000000000000000000000000000000000002")
+    polygon_client.token_info()
+    polygon_client.token_info()
+    # symbol/name/decimals once, two balanceOf, totalSupply once within its TTL
+    assert fake_chain.requests["eth_call"] == 6
+
+
+def test_balance_cache_follows_head(polygon_client, fake_chain):
+    address = "0x0000000000000000000000000000000000000001"
+    first = polygon_client.balance_of(address)
+    assert first["block_number"] == 1000
+    polygon_client.balance_of_batch([address, "0x0000000000000000000000000000000000000002"])
+    calls_before = fake_chain.requests["eth_call"]
+    assert polygon_client.balance_of(address) == first
+    assert fake_chain.requests["eth_call"] == calls_before
+    assert polygon_client.balance_cache.stats()["hits"] == 2
+
+    fake_chain.block_number = 1001
+    fake_chain.balances[polygon_client.w3.to_checksum_address(address)] = 5 * 10 ** 18
+    polygon_client.head.interval = 0
+    res = polygon_client.balance_of(address)
+    assert res["block_number"] == 1001
+    assert res["balance_formatted"] == 5
+    assert polygon_client.balance_cache.stats()["invalidations"] == 1
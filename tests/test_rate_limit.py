@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from src.api.errors import TooManyRequestsError
+from src.api.rate_limit import RateLimiter, parse_rate, parse_rate_overrides
+from src.services.rpc_scheduler import BULK, INTERACTIVE, RpcOverloaded, RpcScheduler, TokenBucket, rpc_priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_rate():
+    assert parse_rate("60/minute") == (60, 60.0)
+    assert parse_rate("5/seconds") == (5, 1.0)
+    assert parse_rate_overrides("a=1/hour, b=2/day") == {"a": (1, 3600.0), "b": (2, 86400.0)}
+    with pytest.raises(ValueError):
+        parse_rate("lots")
+
+
+def test_token_bucket_refills_and_lets_oversized_costs_into_debt():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=4, clock=clock)
+    assert bucket.take(10) == 0
+    assert bucket.take() == pytest.approx(3.5)
+    clock.now += 3.5
+    assert bucket.take() == 0
+
+
+def test_limiter_is_per_client_and_endpoint():
+    clock = FakeClock()
+    limiter = RateLimiter("2/minute", {"get_balance_batch": (1, 60.0)}, clock=clock)
+    limiter.check("1.1.1.1", "get_balance")
+    limiter.check("1.1.1.1", "get_balance")
+    with pytest.raises(TooManyRequestsError) as exc:
+        limiter.check("1.1.1.1", "get_balance")
+    assert exc.value.retry_after == pytest.approx(30)
+    limiter.check("2.2.2.2", "get_balance")
+    limiter.check("1.1.1.1", "get_balance_batch")
+    with pytest.raises(TooManyRequestsError):
+        limiter.check("1.1.1.1", "get_balance_batch")
+    clock.now += 30
+    limiter.check("1.1.1.1", "get_balance")
+
+
+def test_scheduler_rejects_when_queue_is_full():
+    scheduler = RpcScheduler(max_queue=0)
+    with pytest.raises(RpcOverloaded) as exc:
+        scheduler.admit(lambda: 2.5)
+    assert exc.value.retry_after == 2.5
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_scheduler_admits_interactive_work_before_bulk():
+    scheduler = RpcScheduler(max_wait=5)
+    tokens = [0]
+    order = []
+
+    def try_take():
+        if tokens[0]:
+            tokens[0] -= 1
+            return 0.0
+        return 0.01
+
+    def worker(name, priority):
+        with rpc_priority(priority):
+            scheduler.admit(try_take)
+        order.append(name)
+
+    threads = [threading.Thread(target=worker, args=("bulk", BULK)),
+               threading.Thread(target=worker, args=("interactive", INTERACTIVE))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    assert scheduler.stats()["queue_depth"] == 2
+    tokens[0] = 1
+    time.sleep(0.1)
+    assert order == ["interactive"]
+    tokens[0] = 1
+    for thread in threads:
+        thread.join(timeout=2)
+    assert order == ["interactive", "bulk"]
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from flask import Flask
+
+from src.api.errors import TooManyRequestsError
+from src.api.routes import api_bp
+from src.services.token_service import TokenService
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+ADDR_2 = "0x0000000000000000000000000000000000000002"
+
+
+@pytest.fixture
+def client(polygon_client):
+    app = Flask(__name__)
+    app.token_service = TokenService(polygon_client, stream_chunk_size=2)
+    app.register_blueprint(api_bp, url_prefix="/api")
+    return app.test_client()
+
+
+def test_balance_stream_accepts_ndjson_upload(client):
+    body = "\n".join([json.dumps(ADDR_1), json.dumps({"address": ADDR_2}), "", "nope", ADDR_1]) + "\n"
+    resp = client.post("/api/get_balance_batch_stream", data=body, content_type="application/x-ndjson")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [line["address"] for line in lines] == [ADDR_1, ADDR_2, "nope", ADDR_1]
+    assert [line["success"] for line in lines] == [True, True, False, True]
+
+
+def test_balance_stream_accepts_json_list(client):
+    resp = client.post("/api/get_balance_batch_stream", json={"addresses": [ADDR_2, "0x12"]})
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert lines[0]["balance_formatted"] == 200
+    assert lines[1]["error"] == "Invalid Ethereum address"
+
+    assert client.post("/api/get_balance_batch_stream", json={}).status_code == 400
+
+
+def test_historical_params_are_validated(client):
+    resp = client.get("/api/get_balance", query_string={"address": ADDR_1, "block": "-1"})
+    assert resp.status_code == 400
+    resp = client.get("/api/get_token_info", query_string={"block": "10"})
+    assert resp.status_code == 502
+    assert resp.get_json()["error"] == "Historical queries unavailable"
+
+
+def test_inbound_rate_limit_returns_429_with_retry_after(polygon_client):
+    from src.api.rate_limit import RateLimiter
+
+    app = Flask(__name__)
+    app.token_service = TokenService(polygon_client)
+    app.rate_limiter = RateLimiter("2/minute")
+    app.register_blueprint(api_bp, url_prefix="/api")
+    client = app.test_client()
+    for _ in range(2):
+        assert client.get("/api/get_balance", query_string={"address": ADDR_1}).status_code == 200
+    resp = client.get("/api/get_balance", query_string={"address": ADDR_1})
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "30"
+    assert resp.get_json()["success"] is False
+    assert client.get("/api/get_token_info").status_code == 200
+
+
+def test_batch_reports_all_invalid_addresses_and_echoes_checksums(client):
+    resp = client.post("/api/get_balance_batch", json={"addresses": [ADDR_1, "0x12", "nope"]})
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "Invalid Ethereum address: 0x12, nope"
+
+    lower = "0x00000000000000000000000000000000000000aa"
+    resp = client.get("/api/get_balance", query_string={"address": lower})
+    assert resp.get_json()["address"] == "0x00000000000000000000000000000000000000AA"
+
+
+def test_holder_rank_accepts_any_address_form_and_echoes_the_checksum(client):
+    from src.services.holder_index import HolderIndex
+
+    client.application.token_service.holder_index = index = HolderIndex()
+    index.load([("0x00000000000000000000000000000000000000aa", 5 * 10 ** 18), (ADDR_1, 10 ** 18)])
+    body = client.get("/api/get_holder_rank", query_string={"address": "00000000000000000000000000000000000000aA"}).get_json()
+    assert body["address"] == "0x00000000000000000000000000000000000000AA"
+    assert body["rank"] == 1 and body["balance"] == 5
+    assert client.get("/api/get_holder_rank", query_string={"address": "0xzz"}).status_code == 400
+
+
+def test_rpc_status_does_not_leak_endpoint_keys(fake_chain):
+    from src.testing.fake_chain import TOKEN_ADDRESS, fake_session
+    from src.services.polygon_client import PolygonClient
+
+    client = PolygonClient(rpc_urls=["http://fake/v2/SECRETKEY?apikey=TOKEN"], contract_address=TOKEN_ADDRESS,
+                           session=fake_session(fake_chain))
+    app = Flask(__name__)
+    app.token_service = TokenService(client)
+    app.register_blueprint(api_bp, url_prefix="/api")
+    resp = app.test_client().get("/api/get_rpc_status")
+    assert resp.status_code == 200
+    assert resp.get_json()["endpoints"][0]["endpoint"] == "fake"
+    assert "SECRETKEY" not in resp.get_data(as_text=True) and "TOKEN" not in resp.get_data(as_text=True)
+
+
+def test_holder_routes_pass_upstream_rate_limits_through(client, polygon_client, monkeypatch):
+    def limited():
+        raise TooManyRequestsError("RPC budget exhausted", retry_after=3)
+    monkeypatch.setattr(polygon_client, "decimals", limited)
+    resp = client.get("/api/get_holders_in_band", query_string={"min": "0", "max": "1"})
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "3"
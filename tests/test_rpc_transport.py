@@ -0,0 +1,30 @@
+from src.testing.fake_chain import FakeChain, fake_session, TOKEN_ADDRESS, DECIMALS
+
+from src.services.rpc_transport import RpcBatch, RpcTransport
+
+
+def test_batch_returns_per_call_results_and_errors():
+    chain = FakeChain()
+    transport = RpcTransport("http://fake", fake_session(chain), timeout=1)
+    batch = RpcBatch(transport)
+    batch.eth_call(TOKEN_ADDRESS, "0x" + DECIMALS.hex())
+    batch.add("eth_unknownMethod", [])
+    ok, failed = batch.flush()
+    assert ok.ok and int(ok.result, 16) == 18
+    assert not failed.ok and failed.error["code"] == -32601
+    assert chain.http_posts == 1
+    assert len(batch) == 0
+
+
+def test_batch_is_split_by_max_size():
+    chain = FakeChain()
+    transport = RpcTransport("http://fake", fake_session(chain), timeout=1, batch_max_size=2)
+    results = transport.batch([("web3_clientVersion", [])] * 5)
+    assert [r.result for r in results] == ["FakeChain/1.0"] * 5
+    assert chain.http_posts == 3
+
+
+def test_token_metadata_is_one_http_request(polygon_client, fake_chain):
+    fake_chain.http_posts = 0
+    assert polygon_client.token_metadata() == {"symbol": "TBY", "name": "TestToken", "decimals": 18}
+    assert fake_chain.http_posts == 1
@@ -0,0 +1,118 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from src.testing.fake_chain import MULTICALL_ADDRESS, TOKEN_ADDRESS, fake_session
+from src.services.polygon_client import PolygonClient
+from src.services.shared_cache import SharedCache, SharedHeadTracker
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+ADDR_2 = "0x0000000000000000000000000000000000000002"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _worker_client(chain, shared: SharedCache) -> PolygonClient:
+    return PolygonClient(rpc_urls=["http://fake"], contract_address=TOKEN_ADDRESS, multicall_address=MULTICALL_ADDRESS,
+                         session=fake_session(chain), shared=shared)
+
+
+def test_workers_share_metadata_head_and_balances(tmp_path, fake_chain):
+    first = _worker_client(fake_chain, SharedCache(tmp_path / "shared.sqlite3"))
+    second = _worker_client(fake_chain, SharedCache(tmp_path / "shared.sqlite3"))
+    first.balance_of_batch([ADDR_1, ADDR_2])
+    fake_chain.http_posts = 0
+
+    results = second.balance_of_batch([ADDR_1, ADDR_2])
+    assert [r["balance_formatted"] for r in results] == [100, 200]
+    assert fake_chain.http_posts == 0
+    assert second.balance_cache.stats()["shared_hits"] == 2
+    assert second.token_metadata()["decimals"] == 18
+
+
+def test_one_worker_fetches_the_head_per_interval(tmp_path):
+    clock, wall = Clock(), Clock()
+    shared = SharedCache(tmp_path / "shared.sqlite3", clock=wall)
+    fetches = []
+
+    def fetch() -> int:
+        fetches.append(1)
+        return 100 * len(fetches)
+
+    first = SharedHeadTracker(fetch, 2.0, shared, clock=clock)
+    second = SharedHeadTracker(fetch, 2.0, shared, clock=clock)
+    assert first.current() == 100
+    assert second.current() == 100
+    assert len(fetches) == 1
+
+    # Past the interval only the lease holder fetches; the others keep their head until it publishes.
+    clock.now += 2.5
+    wall.now += 2.5
+    shared._conn().execute("INSERT OR REPLACE INTO leases VALUES ('head', 1, ?)", (wall.now + 2,))
+    assert first.current() == 100
+    shared.put_head(150)
+    clock.now += 0.2
+    assert first.current() == 150
+    assert second.current() == 150
+    assert len(fetches) == 1
+
+    wall.now += 2.5
+    clock.now += 2.5
+    assert second.current() == 200
+    assert first.current() == 200
+    assert len(fetches) == 2
+
+
+def test_balances_are_pruned_to_the_limit(tmp_path):
+    shared = SharedCache(tmp_path / "shared.sqlite3", max_balances=3)
+    for block in range(5):
+        shared.put_balances("token", block, [(f"0x{block}", block)])
+    shared.prune()
+    assert shared.stats()["balances"] == 3
+    assert shared.get_balance("token", "0x0", 0) is None
+    assert shared.get_balance("token", "0x4", 4) == 4
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork needs os.fork")
+def test_prefork_server_serves_from_workers_and_stops(tmp_path):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    script = textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {str(Path(__file__).parent.parent)!r})
+        from src.api.prefork import PreforkServer
+
+        def app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            return [str(os.getpid()).encode()]
+
+        PreforkServer(lambda index: app, "127.0.0.1", {port}, 2, graceful_timeout=2).serve()
+    """)
+    master = subprocess.Popen([sys.executable, "-c", script])
+    try:
+        pids = set()
+        deadline = time.monotonic() + 10
+        while not pids and time.monotonic() < deadline:
+            try:
+                pids.add(int(requests.get(f"http://127.0.0.1:{port}/", timeout=1).text))
+            except requests.ConnectionError:
+                time.sleep(0.05)
+        assert pids and master.pid not in pids
+    finally:
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=10) == 0
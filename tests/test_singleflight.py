@@ -0,0 +1,133 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.testing.fake_chain import fake_session, TOKEN_ADDRESS, MULTICALL_ADDRESS
+from src.services.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        release.wait(2)
+        return 42
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, "key", upstream) for _ in range(8)]
+        while flight.stats()["coalesced_calls"] < 7:
+            pass
+        release.set()
+        assert [f.result() for f in futures] == [42] * 8
+    assert len(calls) == 1
+    assert flight.stats() == {"upstream_calls": 1, "coalesced_calls": 7, "in_flight": 0}
+
+
+def test_exception_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(2)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "key", failing) for _ in range(4)]
+        while flight.stats()["coalesced_calls"] < 3:
+            pass
+        release.set()
+        for f in futures:
+            with pytest.raises(ValueError):
+                f.result()
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_do_many_joins_in_flight_keys():
+    flight = SingleFlight()
+    release = threading.Event()
+    fetched = []
+
+    def slow(keys):
+        fetched.append(keys)
+        release.wait(2)
+        return [k.upper() for k in keys]
+
+    with ThreadPoolExecutor(1) as pool:
+        first = pool.submit(flight.do_many, ["a", "b"], slow)
+        while flight.stats()["in_flight"] < 2:
+            pass
+        second = threading.Thread(target=lambda: results.append(flight.do_many(["b", "c", "c"], slow)))
+        results = []
+        second.start()
+        while fetched != [["a", "b"], ["c"]]:
+            pass
+        release.set()
+        second.join()
+        assert first.result() == ["A", "B"]
+    assert results == [["B", "C", "C"]]
+
+
+def test_async_single_flight():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "v"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", upstream) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["v"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["coalesced_calls"] == 4
+
+
+def test_async_single_flight_survives_a_cancelled_leader():
+    flight = AsyncSingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.02)
+        return "v"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", upstream))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "v"
+        assert leader.cancelled()
+        await asyncio.sleep(0)
+        return flight.stats()
+
+    assert asyncio.run(run()) == {"upstream_calls": 1, "coalesced_calls": 1, "in_flight": 0}
+
+
+def test_client_coalesces_single_and_batch_lookups(fake_chain):
+    from src.services.polygon_client import PolygonClient
+
+    session = fake_session(fake_chain)
+    client = PolygonClient(rpc_urls=["http://fake"], contract_address=TOKEN_ADDRESS,
+                           multicall_address=MULTICALL_ADDRESS, session=session)
+    client.token_metadata()
+    client.head.current()
+    session.adapters["http://"].behaviour["http://fake"] = 0.2
+    before = fake_chain.requests["eth_call"]
+
+    address = "0x0000000000000000000000000000000000000001"
+    with ThreadPoolExecutor(6) as pool:
+        singles = [pool.submit(client.balance_of, address) for _ in range(5)]
+        batch = pool.submit(client.balance_of_batch, [address, "0x0000000000000000000000000000000000000002"])
+        results = [f.result() for f in singles] + batch.result()
+
+    assert all(r["success"] for r in results)
+    # One balanceOf for the shared address, one aggregate3 for the other one at most.
+    assert fake_chain.requests["eth_call"] - before <= 2
+    assert client.flight.stats()["coalesced_calls"] >= 4
@@ -0,0 +1,82 @@
+from src.services.holder_index import HolderIndex
+from src.services.snapshots import SnapshotRefresher
+from src.services.token_service import TokenService
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+ADDR_2 = "0x0000000000000000000000000000000000000002"
+ADDR_3 = "0x0000000000000000000000000000000000000003"
+ADDR_4 = "0x0000000000000000000000000000000000000004"
+ZERO = "0x0000000000000000000000000000000000000000"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def build(polygon_client, clock):
+    index = HolderIndex()
+    index.load([(ADDR_1, 100 * 10 ** 18), (ADDR_2, 200 * 10 ** 18), (ADDR_3, 50 * 10 ** 18)])
+    svc = TokenService(polygon_client, holder_index=index)
+    svc.snapshots = SnapshotRefresher(svc, top_size=2, top_tx_size=1, max_age=30, max_staleness=10, clock=clock)
+    return svc
+
+
+def test_first_pass_builds_everything_and_requests_read_snapshots(polygon_client, fake_chain):
+    clock = Clock()
+    svc = build(polygon_client, clock)
+    assert svc.snapshots.refresh() == ["token_info", "top", "top_tx"]
+
+    fake_chain.http_posts = 0
+    assert svc.get_token_info()["totalSupply_formatted"] == 300
+    assert [a for a, _ in svc.get_top_holders(2)] == [ADDR_2, ADDR_1]
+    assert svc.get_top_holders_with_transactions(1) == [(ADDR_2, 200, None)]
+    assert fake_chain.http_posts == 0
+    # Larger n than the snapshot holds is computed on the request thread.
+    assert len(svc.get_top_holders(3)) == 3
+
+
+def test_only_affected_snapshots_are_rebuilt(polygon_client):
+    clock = Clock()
+    svc = build(polygon_client, clock)
+    svc.snapshots.refresh()
+
+    # Below the top-2 floor: nothing to do.
+    svc.holder_index.update(ADDR_3, 60 * 10 ** 18)
+    svc.snapshots.on_transfers(1, 2, {ADDR_3.lower(), ADDR_4.lower()})
+    assert svc.snapshots.refresh() == []
+
+    # Rises into the top 2.
+    svc.holder_index.update(ADDR_3, 500 * 10 ** 18)
+    svc.snapshots.on_transfers(3, 3, {ADDR_3.lower()})
+    assert svc.snapshots.refresh() == ["top", "top_tx"]
+    assert svc.get_top_holders(1) == [(ADDR_3, 500)]
+
+    # A mint changes totalSupply.
+    svc.snapshots.on_transfers(4, 4, {ZERO, ADDR_4.lower()})
+    assert svc.snapshots.refresh() == ["token_info"]
+
+    clock.now = 31
+    assert svc.snapshots.refresh() == ["token_info"]
+    assert svc.snapshots.refreshes == {"token_info": 3, "top": 2, "top_tx": 2}
+
+
+def test_stale_snapshots_are_not_served(polygon_client):
+    clock = Clock()
+    svc = build(polygon_client, clock)
+    svc.snapshots.refresh()
+    svc.holder_index.update(ADDR_3, 500 * 10 ** 18)
+    clock.now = 11
+    assert svc.get_top_holders(1) == [(ADDR_3, 500)]
+    assert svc.snapshots.status()["checked_seconds_ago"] == 11
+
+
+def test_holder_lists_record_the_index_checkpoint(polygon_client):
+    svc = build(polygon_client, Clock())
+    svc.on_transfers(1, 990, set())
+    svc.snapshots.refresh()
+    blocks = {name: s["block"] for name, s in svc.snapshots.status()["snapshots"].items()}
+    assert blocks == {"token_info": 1000, "top": 990, "top_tx": 990}
@@ -0,0 +1,66 @@
+import time
+from dataclasses import replace
+
+from config import ROOT, AppConfig, RpcConfig, get_config, load_abi
+from src.services.warmup import Warmup
+
+
+def test_config_and_abi_are_loaded_once():
+    assert get_config() is get_config()
+    assert load_abi(ROOT.joinpath("abi/erc20.json")) is get_config().contract.abi
+
+
+def test_create_app_does_not_wait_for_rpc(tmp_path):
+    from main import create_app
+
+    config = replace(AppConfig(), rpc=RpcConfig(urls=["http://127.0.0.1:9"]),
+                     holder_db_path=str(tmp_path / "holders.sqlite3"), ingest_follow=False)
+    started = time.perf_counter()
+    app = create_app(config)
+    assert time.perf_counter() - started < config.startup_time_budget
+    app.warmup.stop()
+
+    client = app.test_client()
+    assert client.get("/health").status_code == 200
+    resp = client.get("/ready")
+    assert resp.status_code == 503
+    body = resp.get_json()
+    assert body["ready"] is False and body["success"] is False
+    assert body["checks"]["rpc"] is False
+    assert body["startup_seconds"] < config.startup_time_budget
+
+
+def test_follow_without_start_block_does_not_index_from_genesis(tmp_path):
+    from main import build_services
+
+    config = replace(AppConfig(), rpc=RpcConfig(urls=["http://127.0.0.1:9"]),
+                     holder_db_path=str(tmp_path / "holders.sqlite3"), ingest_follow=True, ingest_start_block=0)
+    _, _, warmup = build_services(config)
+    assert "ingestor" not in warmup.status()["checks"]
+    _, _, warmup = build_services(replace(config, ingest_start_block=40_000_000))
+    assert "ingestor" in warmup.status()["checks"]
+
+
+def test_warmup_retries_failed_steps_until_ready():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("rpc down")
+
+    warmup = Warmup([("index", lambda: None), ("rpc", flaky)], retry_interval=0.001)
+    assert warmup.status()["ready"] is False
+    warmup.run()
+    status = warmup.status()
+    assert status["ready"] is True
+    assert status["checks"] == {"index": True, "rpc": True}
+    assert status["errors"] == {}
+    assert len(attempts) == 3
+
+
+def test_client_warm_up_marks_ready(polygon_client, fake_chain):
+    assert polygon_client.ready is False
+    assert fake_chain.http_posts == 0
+    polygon_client.warm_up()
+    assert polygon_client.ready is True
@@ -0,0 +1,93 @@
+import pytest
+from flask import Flask
+
+from src.api.errors import ValidationError
+from src.api.routes import api_bp
+from src.services.token_registry import TokenRegistry
+from src.services.token_service import TokenService
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+ADDR_2 = "0x0000000000000000000000000000000000000002"
+TOKEN_B = "0x00000000000000000000000000000000000000Bb"
+TOKEN_C = "0x00000000000000000000000000000000000000cC"
+TOKEN_D = "0x00000000000000000000000000000000000000dd"
+
+
+@pytest.fixture
+def registry(polygon_client, fake_chain):
+    fake_chain.add_token(TOKEN_B, {ADDR_1: 5 * 10 ** 6}, decimals=6, symbol="USDB")
+    return TokenRegistry(polygon_client, [TOKEN_B], max_tokens=2)
+
+
+def _reset(chain):
+    chain.requests.clear()
+    chain.http_posts = 0
+
+
+def test_clients_share_transport_and_head(registry, polygon_client):
+    other = registry.get(TOKEN_B.lower())
+    assert other is registry.get(TOKEN_B)
+    assert other.transport is polygon_client.transport
+    assert other.head is polygon_client.head
+    assert other.balance_cache is not polygon_client.balance_cache
+    with pytest.raises(ValidationError):
+        registry.get("0x12")
+
+
+def test_matrix_is_two_round_trips_then_served_from_caches(registry, polygon_client, fake_chain):
+    polygon_client.token_metadata()
+    polygon_client.head.current()
+    _reset(fake_chain)
+
+    result = registry.balance_matrix([ADDR_1, ADDR_2, "nope"], [polygon_client.contract_address, TOKEN_B])
+    token_b = registry.get(TOKEN_B).contract_address
+    assert result["tokens"][token_b] == {"symbol": "USDB", "decimals": 6}
+    row_1, row_2, invalid = result["balances"]
+    assert row_1["balances"][token_b]["balance_formatted"] == 5
+    assert row_2["balances"][polygon_client.contract_address]["balance_formatted"] == 200
+    assert row_2["balances"][token_b]["balance_wei"] == "0"
+    assert invalid == {"address": "nope", "error": "Invalid address", "success": False}
+    # One batch for the new token's metadata, one aggregate3 across both tokens.
+    assert fake_chain.http_posts == 2
+    assert fake_chain.requests["eth_call"] == 4
+
+    _reset(fake_chain)
+    registry.balance_matrix([ADDR_1, ADDR_2], [TOKEN_B, polygon_client.contract_address])
+    assert fake_chain.http_posts == 0
+
+
+def test_unknown_token_reports_per_token_error(registry, polygon_client):
+    result = registry.balance_matrix([ADDR_1], [TOKEN_C, polygon_client.contract_address])
+    token_c = registry.get(TOKEN_C).contract_address
+    assert "error" in result["tokens"][token_c]
+    assert "error" in result["balances"][0]["balances"][token_c]
+    assert result["balances"][0]["balances"][polygon_client.contract_address]["balance_formatted"] == 100
+
+
+def test_ad_hoc_tokens_are_evicted_but_configured_ones_stay(polygon_client):
+    registry = TokenRegistry(polygon_client, [TOKEN_B], max_tokens=3)
+    token_c = registry.get(TOKEN_C).contract_address
+    registry.get(TOKEN_D)
+    assert len(registry) == 3
+    assert token_c not in registry.tokens()
+    assert registry.get(TOKEN_B).contract_address in registry.tokens()
+
+
+def test_matrix_size_is_limited(polygon_client):
+    registry = TokenRegistry(polygon_client, max_cells=3)
+    with pytest.raises(ValidationError):
+        registry.balance_matrix([ADDR_1, ADDR_2], [TOKEN_B, TOKEN_C])
+
+
+def test_balance_matrix_route(registry, polygon_client):
+    app = Flask(__name__)
+    app.token_service = TokenService(polygon_client, registry=registry)
+    app.register_blueprint(api_bp, url_prefix="/api")
+    client = app.test_client()
+
+    resp = client.post("/api/get_balance_matrix", json={"addresses": [ADDR_1], "tokens": [TOKEN_B]})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["success"] is True and body["count"] == 1
+    assert client.post("/api/get_balance_matrix", json={"addresses": [ADDR_1]}).status_code == 400
+    assert client.post("/api/get_balance_matrix", json={"addresses": [ADDR_1], "tokens": ["0x12"]}).status_code == 400
@@ -28,3 +28,48 @@ def test_get_top_holders(token_service):
 def test_get_top_holders_with_transactions(token_service):
     holders = token_service.get_top_holders_with_transactions(1)
     assert holders == [("0x0000000000000000000000000000000000000001", 100, "2025-11-22")]
+
+
+def test_holder_queries_use_index(mock_polygon_client):
+    from src.services.holder_index import HolderIndex
+    from src.services.token_service import TokenService
+
+    mock_polygon_client.decimals.return_value = 18
+    index = HolderIndex()
+    index.load([
+        ("0x0000000000000000000000000000000000000001", 100 * 10 ** 18),
+        ("0x0000000000000000000000000000000000000002", 200 * 10 ** 18),
+        ("0x0000000000000000000000000000000000000003", 50 * 10 ** 18),
+    ])
+    svc = TokenService(mock_polygon_client, holder_index=index)
+
+    assert svc.get_top_holders(2) == [
+        ("0x0000000000000000000000000000000000000002", 200),
+        ("0x0000000000000000000000000000000000000001", 100),
+    ]
+    assert svc.get_holder_rank("0x0000000000000000000000000000000000000003")["rank"] == 3
+    # Unprefixed and mixed-case forms are the same holder.
+    assert svc.get_holder_rank("00000000000000000000000000000000000000AB")["rank"] is None
+    assert svc.get_holder_rank("0000000000000000000000000000000000000001")["rank"] == 2
+    assert svc.holder_balance("0X0000000000000000000000000000000000000002") == 200 * 10 ** 18
+    assert [a for a, _ in svc.get_holders_in_band("60", "150", 10)] == ["0x0000000000000000000000000000000000000001"]
+
+    page, cursor = svc.get_holders_page(None, 2)
+    assert len(page) == 2 and cursor is not None
+    rest, cursor = svc.get_holders_page(cursor, 2)
+    assert rest == [("0x0000000000000000000000000000000000000003", 50)]
+    assert cursor is None
+
+
+def test_stream_balances_keeps_order_and_reports_invalid_inline(polygon_client):
+    from src.services.token_service import TokenService
+
+    svc = TokenService(polygon_client, stream_chunk_size=2)
+    addresses = (a for a in [
+        "0x0000000000000000000000000000000000000001", "bad",
+        "0x0000000000000000000000000000000000000002", "0x0000000000000000000000000000000000000001", 7,
+    ])
+    results = list(svc.stream_balances(addresses))
+    assert [r["success"] for r in results] == [True, False, True, True, False]
+    assert results[1] == {"address": "bad", "error": "Invalid Ethereum address", "success": False}
+    assert [r.get("balance_formatted") for r in results] == [100, None, 200, 100, None]
@@ -0,0 +1,62 @@
+import pytest
+from src.testing.fake_chain import ZERO
+
+from src.services.log_ingestor import decode_transfer
+from src.services.transfer_decoder import decode_transfers
+
+A = "0x00000000000000000000000000000000000000aa"
+B = "0x00000000000000000000000000000000000000bb"
+C = "0x00000000000000000000000000000000000000cc"
+
+
+@pytest.fixture
+def logs(fake_chain):
+    fake_chain.transfer(ZERO, A, 500, block=10)
+    fake_chain.transfer(A, B, 2 ** 200, block=10)
+    fake_chain.transfer(B, C, 7, block=12)
+    fake_chain.transfer(A, C, 0, block=15)
+    fake_chain.logs[-1]["data"] = "0x"
+    fake_chain.transfer(C, A, 3, block=15)
+    return fake_chain.logs
+
+
+def test_columns_match_the_per_log_decoder(logs):
+    batch = decode_transfers(logs)
+    assert len(batch) == 5
+    assert len(batch.senders) == len(batch.recipients) == 100
+    for i, log in enumerate(logs):
+        block, sender, recipient, value = decode_transfer(log)
+        assert batch.blocks[i] == block and batch.values[i] == value
+        assert "0x" + batch.senders[20 * i:20 * i + 20].hex() == sender
+        assert "0x" + batch.recipients[20 * i:20 * i + 20].hex() == recipient
+    assert batch.addresses() == {ZERO, A, B, C}
+
+
+def test_net_deltas_in_one_pass(logs):
+    net, activity = decode_transfers(logs).net_deltas()
+    assert net == {ZERO: (-500, 10), A: (500 - 2 ** 200 + 3, 15), B: (2 ** 200 - 7, 12), C: (4, 15)}
+    assert activity[B] == (12, logs[2]["transactionHash"])
+    assert activity[A] == (15, logs[4]["transactionHash"])
+
+
+def test_block_deltas_start_at_the_journal_block(logs):
+    batch = decode_transfers(logs)
+    assert batch.block_deltas(12) == {12: {B: -7, C: 7}, 15: {A: 3, C: -3}}
+    assert batch.block_deltas(16) == {}
+    assert batch.last_block_hashes() == {10: logs[1]["blockHash"], 12: logs[2]["blockHash"],
+                                         15: logs[4]["blockHash"]}
+
+
+def test_removed_and_out_of_order_logs(logs):
+    logs[0]["removed"] = True
+    batch = decode_transfers([logs[3], logs[1], logs[4], logs[2], logs[0]])
+    assert list(batch.blocks) == [10, 12, 15, 15]
+    assert batch.values == [2 ** 200, 7, 0, 3]
+    assert ZERO not in batch.addresses()
+    assert decode_transfers([]).net_deltas() == ({}, {})
+
+
+def test_malformed_log_is_rejected(logs):
+    logs[2]["topics"] = logs[2]["topics"][:2]
+    with pytest.raises(ValueError, match="Malformed"):
+        decode_transfers(logs)
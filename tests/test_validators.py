@@ -0,0 +1,45 @@
+import secrets
+
+import pytest
+from web3 import Web3
+
+from src.api.errors import ValidationError
+from src.utils.validators import Address, is_valid_address, normalize, try_normalize, validate_addresses
+
+
+def test_checksum_matches_web3():
+    for _ in range(200):
+        raw = "0x" + secrets.token_hex(20)
+        address = normalize(raw)
+        assert address == Web3.to_checksum_address(raw)
+        assert address.raw == bytes.fromhex(raw[2:])
+        assert is_valid_address(raw.upper().replace("0X", "0x")) == Web3.is_address(raw.upper())
+
+
+def test_normalized_addresses_are_interned():
+    lower = "0x" + "ab" * 20
+    address = normalize(lower)
+    assert isinstance(address, Address)
+    assert normalize(lower) is address
+    assert normalize(address) is address
+    assert normalize("ab" * 20) == address
+
+
+@pytest.mark.parametrize("value", ["", "0x12", "0x" + "g" * 40, "0x" + "a" * 41, None, 42, b"\x00" * 20])
+def test_invalid_inputs_are_rejected(value):
+    assert try_normalize(value) is None
+    assert not is_valid_address(value)
+
+
+def test_bulk_validation_lists_invalid_entries():
+    good = "0x" + "01" * 20
+    assert validate_addresses([good, good]) == [normalize(good)] * 2
+    with pytest.raises(ValidationError) as exc:
+        validate_addresses(["0x12", good, "nope"])
+    assert exc.value.safe_message == "Invalid Ethereum address: 0x12, nope"
+
+
+def test_validate_addresses_lists_only_the_first_offenders():
+    with pytest.raises(ValidationError) as exc:
+        validate_addresses([f"bad{i}" for i in range(8)])
+    assert exc.value.safe_message == "Invalid Ethereum address: bad0, bad1, bad2, bad3, bad4 and 3 more"
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+from flask import Flask
+
+from src.api.errors import TooManyRequestsError, ValidationError
+from src.api.routes import api_bp
+from src.services.token_service import TokenService
+from src.services import watchlist
+from src.services.watchlist import WatchHub
+
+ADDR_1 = "0x0000000000000000000000000000000000000001"
+ADDR_2 = "0x0000000000000000000000000000000000000002"
+ADDR_3 = "0x0000000000000000000000000000000000000003"
+
+
+@pytest.fixture
+def hub(polygon_client):
+    return WatchHub(polygon_client, max_subscriptions=2, max_addresses=2, keepalive=0.01)
+
+
+def parse_sse(chunk: bytes | str) -> tuple[str, dict]:
+    text = chunk.decode() if isinstance(chunk, bytes) else chunk
+    fields = dict(line.split(": ", 1) for line in text.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+def test_only_watchers_of_touched_addresses_are_notified(hub, fake_chain, polygon_client):
+    polygon_client.token_metadata()
+    first = hub.subscribe([ADDR_1, ADDR_2.lower()])
+    second = hub.subscribe([ADDR_2])
+    assert hub.stats()["watched_addresses"] == 2
+
+    fake_chain.transfer(ADDR_1, ADDR_3, 10 * 10 ** 18, block=1001)
+    fake_chain.http_posts = 0
+    hub.on_transfers(1001, 1001, {ADDR_1, ADDR_3})
+    assert fake_chain.http_posts == 1
+    [event] = first.drain()
+    assert event["block_number"] == 1001
+    assert [(b["address"], b["balance_formatted"]) for b in event["balances"]] == [(ADDR_1, 90)]
+    assert second.drain() == []
+
+    hub.on_transfers(1002, 1002, {ADDR_3})
+    assert fake_chain.http_posts == 1
+
+    hub.unsubscribe(first)
+    hub.unsubscribe(first)
+    assert hub.stats()["watched_addresses"] == 1
+
+
+def test_backfill_ranges_are_not_reported(hub, fake_chain, polygon_client):
+    sub = hub.subscribe([ADDR_1])
+    polygon_client.head.current()
+    fake_chain.http_posts = 0
+    hub.on_transfers(1, 500, {ADDR_1.lower()})
+    assert fake_chain.http_posts == 0 and sub.drain() == []
+    hub.on_transfers(501, 1000, {ADDR_1.lower()})
+    assert sub.drain()[0]["block_number"] == 1000
+
+
+def test_poll_walks_a_long_gap_in_steps(hub, fake_chain, polygon_client, monkeypatch):
+    monkeypatch.setattr(watchlist, "_MAX_POLL_RANGE", 2)
+    hub.poll()
+    sub = hub.subscribe([ADDR_2])
+    fake_chain.transfer(ADDR_1, ADDR_2, 5 * 10 ** 18, block=1001)
+    fake_chain.block_number = 1005
+    polygon_client.head._fetched_at = 0
+    hub.poll()
+    assert fake_chain.requests["eth_getLogs"] == 3
+    [event] = sub.drain()
+    assert event["block_number"] == 1005
+    assert event["balances"][0]["balance_formatted"] == 205
+
+
+def test_subscription_limits(hub):
+    with pytest.raises(ValidationError):
+        hub.subscribe([ADDR_1, ADDR_2, ADDR_3])
+    with pytest.raises(ValidationError):
+        hub.subscribe(["0x12"])
+    hub.subscribe([ADDR_1])
+    hub.subscribe([ADDR_1])
+    with pytest.raises(TooManyRequestsError):
+        hub.subscribe([ADDR_1])
+
+
+def test_standalone_poll_reads_logs_only_while_watched(hub, fake_chain, polygon_client):
+    hub.poll()
+    fake_chain.block_number = 1005
+    polygon_client.head._fetched_at = 0
+    hub.poll()
+    assert fake_chain.requests["eth_getLogs"] == 0
+
+    sub = hub.subscribe([ADDR_2])
+    fake_chain.transfer(ADDR_1, ADDR_2, 5 * 10 ** 18, block=1006)
+    polygon_client.head._fetched_at = 0
+    hub.poll()
+    assert fake_chain.requests["eth_getLogs"] == 1
+    [event] = sub.drain()
+    assert event["balances"][0]["balance_formatted"] == 205
+
+
+def test_watch_balances_streams_sse(hub, polygon_client, fake_chain):
+    app = Flask(__name__)
+    app.token_service = TokenService(polygon_client)
+    app.register_blueprint(api_bp, url_prefix="/api")
+    client = app.test_client()
+    assert client.get("/api/watch_balances", query_string={"addresses": ADDR_1}).status_code == 503
+
+    app.token_service.watch_hub = hub
+    assert client.get("/api/watch_balances", query_string={"addresses": "nope"}).status_code == 400
+    resp = client.get("/api/watch_balances", query_string={"addresses": f"{ADDR_1},{ADDR_2}"})
+    assert resp.mimetype == "text/event-stream"
+    stream = iter(resp.response)
+    name, initial = parse_sse(next(stream))
+    assert name == "balances"
+    assert [b["balance_formatted"] for b in initial["balances"]] == [100, 200]
+
+    assert next(stream) in (b": keepalive\n\n", ": keepalive\n\n")
+    fake_chain.transfer(ADDR_2, ADDR_3, 50 * 10 ** 18, block=1001)
+    hub.on_transfers(1001, 1001, {ADDR_2.lower(), ADDR_3.lower()})
+    name, update = parse_sse(next(stream))
+    assert update["block_number"] == 1001
+    assert update["balances"][0]["balance_formatted"] == 150
+
+    resp.close()
+    assert len(hub) == 0